@@ -0,0 +1,147 @@
+"""Batched attribute writes, collected during a stage and applied in one flush.
+
+    with attr_batch.attribute_batch() as batch:
+        for loc in locators:
+            batch.set(f"{loc}Shape.overrideEnabled", 1)
+            batch.set(f"{loc}Shape.overrideColor", 21)
+
+Values use the cmds units (degrees, UI linear unit). With the Maya API the
+flush is a single MDGModifier, whose undo() reverts the whole batch. When
+the undo queue is on, or without the API (standalone backends), the flush
+falls back to one cmds.setAttr per plug so Ctrl+Z keeps working: an
+MDGModifier run outside of a plugin command is not recorded in the undo
+queue. Repeated writes to a plug keep the last value.
+"""
+from contextlib import contextmanager
+
+import maya.cmds as cmds
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:  # Standalone backends without the API
+    om = None
+
+totals = {"writes": 0, "calls": 0, "flushes": 0}  # Every flush of the session
+
+
+def use_modifier():
+    """True when a flush goes through a DG modifier rather than cmds."""
+    return om is not None and not cmds.undoInfo(query=True, state=True)
+
+
+class AttributeBatch:
+    """Collect (plug, value) pairs and write them in one flush."""
+
+    def __init__(self, modifier=None):
+        self.modifier = use_modifier() if modifier is None else modifier
+        self.values = {}  # plug -> (values, string type), in insertion order
+        self.writes = 0  # set() calls, the setAttr a direct write would cost
+        self.pending = 0  # set() calls since the last flush
+        self.calls = 0  # Scene round-trips actually made
+        self._modifiers = []  # Flushed MDGModifiers, for undo()
+
+    def __len__(self):
+        return len(self.values)
+
+    def set(self, plug, *values, type=None):
+        """Queue a write, a compound plug takes one value per child."""
+        if len(values) == 1 and isinstance(values[0], (tuple, list)):
+            values = tuple(values[0])
+        self.values.pop(plug, None)
+        self.values[plug] = (values, type)
+        self.writes += 1
+        self.pending += 1
+
+    def flush(self):
+        """Apply the queued writes, returns the number of plugs written."""
+        if not self.values:
+            return 0
+        count = len(self.values)
+        if self.modifier:
+            self._flush_modifier()
+            calls = 1
+        else:
+            for plug, (values, kind) in self.values.items():
+                if kind is None:
+                    cmds.setAttr(plug, *values)
+                else:
+                    cmds.setAttr(plug, *values, type=kind)
+            calls = count
+        self.calls += calls
+        totals["writes"] += self.pending
+        totals["calls"] += calls
+        totals["flushes"] += 1
+        self.values = {}
+        self.pending = 0
+        return count
+
+    def _flush_modifier(self):
+        selection = om.MSelectionList()
+        for plug in self.values:
+            selection.add(plug)
+        modifier = om.MDGModifier()
+        for i, (values, _) in enumerate(self.values.values()):
+            plug = selection.getPlug(i)
+            if plug.isCompound:
+                for child, value in enumerate(values):
+                    _queue_value(modifier, plug.child(child), value)
+            else:
+                _queue_value(modifier, plug, values[0])
+        modifier.doIt()
+        self._modifiers.append(modifier)
+
+    def undo(self):
+        """Revert the flushes done through a DG modifier, last first."""
+        while self._modifiers:
+            self._modifiers.pop().undoIt()
+
+    def saved(self):
+        """Scene round-trips saved compared to one setAttr per write."""
+        return self.writes - self.calls
+
+    def report(self):
+        """Print and return the writes and round-trips of the batch."""
+        report = {"writes": self.writes, "calls": self.calls, "saved": self.saved(),
+                  "modifier": bool(self.modifier)}
+        path = "one DG modifier" if self.modifier else "cmds.setAttr"
+        print(f"{self.writes} attribute writes in {self.calls} calls through {path}, "
+              f"{report['saved']} round-trips saved")
+        return report
+
+
+def _queue_value(modifier, plug, value):
+    """Queue one plug value on modifier, converting cmds units to internal ones."""
+    if isinstance(value, str):
+        modifier.newPlugValueString(plug, value)
+    elif isinstance(value, bool):
+        modifier.newPlugValueBool(plug, value)
+    elif plug.attribute().hasFn(om.MFn.kUnitAttribute):
+        unit = om.MFnUnitAttribute(plug.attribute()).unitType()
+        if unit == om.MFnUnitAttribute.kAngle:
+            modifier.newPlugValueMAngle(plug, om.MAngle(value, om.MAngle.kDegrees))
+        elif unit == om.MFnUnitAttribute.kDistance:
+            modifier.newPlugValueMDistance(plug, om.MDistance(value, om.MDistance.uiUnit()))
+        else:
+            modifier.newPlugValueDouble(plug, float(value))
+    elif isinstance(value, int):
+        modifier.newPlugValueInt(plug, value)
+    else:
+        modifier.newPlugValueDouble(plug, float(value))
+
+
+@contextmanager
+def attribute_batch(modifier=None, report=False):
+    """Yield an AttributeBatch flushed at the end of the block."""
+    batch = AttributeBatch(modifier)
+    yield batch
+    batch.flush()
+    if report:
+        batch.report()
+
+
+def report():
+    """Print and return the writes batched during the session."""
+    saved = totals["writes"] - totals["calls"]
+    print(f"{totals['writes']} attribute writes in {totals['calls']} calls "
+          f"over {totals['flushes']} flushes, {saved} round-trips saved")
+    return dict(totals, saved=saved)
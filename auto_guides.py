@@ -0,0 +1,262 @@
+"""Guides placed automatically from the character mesh.
+
+    import auto_guides
+    positions = auto_guides.guide_positions("body_geo")  # {"loc_Hips": (x, y, z), ...}
+
+The vertices are read in chunks of CHUNK_SIZE, one xform query per chunk,
+and accumulated into a front view grid of the character (vertex count and
+depth range per cell), so memory stays bounded on meshes of millions of
+vertices. The landmarks (floor, top, crotch, armpit, shoulder, wrist,
+fingertips, knee, ankle, toes) come from cross sections of that grid, and
+the template guides are fitted on them piecewise. The artist only touches
+up the result.
+
+The model is expected in T or A pose, facing +Z, its left side towards +X
+and centered on the YZ plane of its bounding box.
+"""
+import maya.cmds as cmds
+import numpy as np
+
+import guide_template
+
+CHUNK_SIZE = 200000  # Vertices per xform query
+GRID_SIZE = 256  # Cells along the largest side of the bounding box, at most
+GRID_DENSITY = 0.5  # Cells per square root of the vertex count, coarse meshes get larger cells
+HIP_ABOVE_CROTCH = 0.03  # Hip joint height above the crotch, fraction of the height
+ARM_RUN_RATIO = 1.8  # A row wider than this times the waist holds the arms
+ANKLE_RATIO = 0.6  # The ankle is the first row thinner than this times the foot length
+FINGER_REACH = 0.8  # Last finger guides, fraction of the wrist -> fingertip length
+FINGER_SPREAD = 0.8  # First finger guides spread, fraction of the palm width
+
+
+###########
+## Mesh reading
+###########
+def selected_mesh():
+    """Transform of the first selected mesh, None when no mesh is selected."""
+    for node in cmds.ls(selection=True) or []:
+        if cmds.nodeType(node) == "mesh":
+            return cmds.listRelatives(node, parent=True)[0]
+        if cmds.listRelatives(node, shapes=True, type="mesh"):
+            return node
+    return None
+
+
+def iter_vertex_chunks(mesh, chunk_size=CHUNK_SIZE, count=None):
+    """Yield the world positions of the mesh vertices as (N, 3) chunks."""
+    if count is None:
+        count = cmds.polyEvaluate(mesh, vertex=True)
+    for start in range(0, count, chunk_size):
+        end = min(start + chunk_size, count) - 1
+        flat = cmds.xform(f"{mesh}.vtx[{start}:{end}]", query=True, translation=True, worldSpace=True)
+        yield np.asarray(flat, dtype=np.float64).reshape(-1, 3)
+
+
+class SilhouetteGrid:
+    """Front view (x, y) grid of a mesh: vertex count and depth range per cell."""
+
+    def __init__(self, bounds, size=GRID_SIZE):
+        self.low = np.asarray(bounds[:3], dtype=np.float64)
+        self.high = np.asarray(bounds[3:], dtype=np.float64)
+        extent = self.high - self.low
+        self.cell = max(extent[0], extent[1]) / size or 1.0
+        self.shape = (int(extent[1] / self.cell) + 1, int(extent[0] / self.cell) + 1)
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.zmin = np.full(self.shape, np.inf)
+        self.zmax = np.full(self.shape, -np.inf)
+
+    def add(self, points):
+        """Accumulate a chunk of world positions."""
+        rows = ((points[:, 1] - self.low[1]) / self.cell).astype(np.intp)
+        cols = ((points[:, 0] - self.low[0]) / self.cell).astype(np.intp)
+        cells = np.clip(rows, 0, self.shape[0] - 1) * self.shape[1] + np.clip(cols, 0, self.shape[1] - 1)
+        self.counts += np.bincount(cells, minlength=self.counts.size).reshape(self.shape)
+        np.minimum.at(self.zmin.reshape(-1), cells, points[:, 2])
+        np.maximum.at(self.zmax.reshape(-1), cells, points[:, 2])
+
+    @classmethod
+    def from_mesh(cls, mesh, chunk_size=CHUNK_SIZE, size=None):
+        """Grid of a mesh, size adapted to its vertex count by default."""
+        count = cmds.polyEvaluate(mesh, vertex=True)
+        if size is None:
+            size = int(np.clip(np.sqrt(count) * GRID_DENSITY, 64, GRID_SIZE))
+        grid = cls(cmds.exactWorldBoundingBox(mesh), size)
+        for points in iter_vertex_chunks(mesh, chunk_size, count):
+            grid.add(points)
+        return grid
+
+
+###########
+## Landmarks
+###########
+def _masked_span(mask, zmin, zmax, axis):
+    """(low, high) depth of the masked cells along an axis, nan when empty."""
+    low = np.where(mask, zmin, np.inf).min(axis=axis)
+    high = np.where(mask, zmax, -np.inf).max(axis=axis)
+    empty = ~np.isfinite(low) | ~np.isfinite(high)
+    return np.where(empty, np.nan, low), np.where(empty, np.nan, high)
+
+
+def measure(grid):
+    """Landmarks of the character from the cross sections of its grid.
+
+    Heights are world y, x values are distances from the center plane on
+    the left side, depths are world z.
+    """
+    cell = grid.cell
+    floor, top = grid.low[1], grid.high[1]
+    height = top - floor
+    center_x = (grid.low[0] + grid.high[0]) / 2.0
+    c0 = min(int((center_x - grid.low[0]) / cell), grid.shape[1] - 1)
+
+    occupied = grid.counts > 0
+    # Close the one cell gaps left between the vertices of a coarse mesh
+    occupied[1:] |= grid.counts[:-1] > 0
+    occupied[:-1] |= grid.counts[1:] > 0
+    occupied[:, 1:] |= grid.counts[:, :-1] > 0
+    occupied[:, :-1] |= grid.counts[:, 1:] > 0
+    left = occupied[:, c0:]
+    zmin, zmax = grid.zmin[:, c0:], grid.zmax[:, c0:]
+    rows = np.arange(left.shape[0])
+    row_y = floor + (rows + 0.5) * cell
+    col_x = (np.arange(left.shape[1]) + 0.5) * cell
+
+    def row(fraction):
+        return int(np.clip(fraction * height / cell, 1, left.shape[0] - 1))
+
+    # Crotch: above the last empty cell of the center column, below the chest.
+    # Raw counts, the gap closing would fill the space between the legs.
+    empty = np.flatnonzero(grid.counts[: row(0.7), c0] == 0)
+    crotch = empty.max() + 1 if empty.size else row(0.47)
+
+    # Half width of the body connected to the center, per row
+    run = np.where(left.all(axis=1), left.shape[1], np.argmin(left, axis=1))
+    waist = max(np.median(run[crotch + row(0.05): crotch + row(0.2)]), 1.0)
+    arm_rows = np.flatnonzero((rows > crotch + row(0.1)) & (run > ARM_RUN_RATIO * waist))
+    armpit = arm_rows.min() if arm_rows.size else row(0.8)
+    shoulder_col = int(run[armpit - 1])
+
+    # Arms: the cells beyond the torso, above the legs
+    arm = left.copy()
+    arm[: crotch + row(0.05)] = False
+    arm[:, : shoulder_col + 1] = False
+    counts = arm.sum(axis=0)
+    columns = np.flatnonzero(counts)
+    if columns.size < 4:
+        raise ValueError("No arms found on the mesh, is the character in T or A pose?")
+    tip_col = columns.max()
+    center_y = (arm * row_y[:, None]).sum(axis=0) / np.maximum(counts, 1)
+    z_low, z_high = _masked_span(arm, zmin, zmax, axis=0)
+    depth = np.nan_to_num(z_high - z_low, nan=np.inf)
+    # Wrist: the thinnest cross section of the forearm end
+    span = tip_col - shoulder_col
+    search = np.arange(shoulder_col + int(0.55 * span), shoulder_col + int(0.9 * span) + 1)
+    search = search[counts[search] > 0]
+    wrist_col = search[np.argmin(counts[search] * cell * depth[search])] if search.size else shoulder_col + int(0.8 * span)
+    upper = columns[columns >= shoulder_col + 0.1 * span].min()
+    hand = np.arange(wrist_col, tip_col + 1)
+    hand = hand[counts[hand] > 0]
+    palm = hand[: max(len(hand) // 2, 1)]
+
+    # Legs: depth of each row on the left side, the foot rows are the longest
+    leg = left.copy()
+    leg[crotch:] = False
+    foot_low, foot_high = _masked_span(leg, zmin, zmax, axis=1)
+    length = np.nan_to_num(foot_high - foot_low)
+    foot = max(length[: row(0.04)].max(), cell)
+    thin = np.flatnonzero(length[: row(0.2)] < ANKLE_RATIO * foot)
+    ankle = thin.min() if thin.size else row(0.054)
+    knee = (crotch + ankle) // 2
+    knee_cols = np.flatnonzero(leg[knee])
+    waist_low, waist_high = _masked_span(left[crotch + row(0.1)], zmin[crotch + row(0.1)],
+                                         zmax[crotch + row(0.1)], axis=0)
+
+    return {
+        "floor": floor,
+        "top": top,
+        "center_x": center_x,
+        "center_z": float(np.nan_to_num((waist_low + waist_high) / 2.0)),
+        "crotch_y": row_y[crotch] - cell / 2.0,
+        "shoulder": (shoulder_col * cell, center_y[upper]),
+        "wrist": (col_x[wrist_col], center_y[wrist_col]),
+        "tip_x": col_x[tip_col] + cell / 2.0,
+        "hand_z": float(np.nanmedian((z_low[hand] + z_high[hand]) / 2.0)),
+        "palm_width": float(np.nanmedian(z_high[palm] - z_low[palm])),
+        "knee_x": col_x[knee_cols].mean() if knee_cols.size else None,
+        "ankle_y": row_y[ankle],
+        "ankle_z": float(np.nan_to_num((foot_low[ankle] + foot_high[ankle]) / 2.0)),
+        "toe_z": float(np.nanmax(foot_high[:ankle + 1])),
+    }
+
+
+###########
+## Fitting
+###########
+def fit_guides(landmarks, preset="default", guides=guide_template.BIPED_GUIDES):
+    """World position of every guide from the landmarks.
+
+    The template layout at the measured height is remapped piecewise:
+    heights through the ankle, hip and shoulder, the arms and hands along x
+    through the shoulder, wrist and fingertips, the feet and fingers in
+    depth. Returns {locator: (x, y, z)} with loc_base and loc_top, right side
+    guides are left to symmetrize.
+    """
+    floor, top = landmarks["floor"], landmarks["top"]
+    height = top - floor
+    names, positions, _ = guide_template.compute_layout(height, preset=preset, guides=guides)
+    template = dict(zip(names, positions))
+    regions = np.array([g[2] for g in guides])
+    x, y, z = positions.T.copy()
+
+    # Heights
+    shoulder_x, shoulder_y = landmarks["shoulder"]
+    wrist_x, wrist_y = landmarks["wrist"]
+    hip_y = landmarks["crotch_y"] + HIP_ABOVE_CROTCH * height
+    knots = [0.0, template["left_foot"][1], template["Hips"][1], template["left_shoulder"][1], height]
+    measured = np.maximum.accumulate([0.0, landmarks["ankle_y"] - floor, hip_y - floor, shoulder_y - floor, height])
+    new_y = floor + np.interp(y, knots, measured + np.arange(5) * 1e-6)
+
+    # Arms, hands, clavicles and pecs along x
+    upper = np.isin(regions, ("arm", "hand", "chest"))
+    knots = [0.0, template["left_shoulder"][0], template["left_hand"][0], template["left_middle_3"][0]]
+    measured = [0.0, shoulder_x, wrist_x, wrist_x + FINGER_REACH * (landmarks["tip_x"] - wrist_x)]
+    new_x = x.copy()
+    new_x[upper] = np.sign(x[upper]) * np.interp(np.abs(x[upper]), knots, np.maximum.accumulate(measured))
+    limb = np.isin(regions, ("arm", "hand")) & (np.abs(new_x) > shoulder_x)
+    slope = (wrist_y - shoulder_y) / max(wrist_x - shoulder_x, 1e-6)  # A pose arms go down
+    new_y[limb] += slope * (np.abs(new_x[limb]) - shoulder_x)
+    legs = regions == "leg"
+    if landmarks["knee_x"]:
+        new_x[legs] = x[legs] * landmarks["knee_x"] / template["left_leg"][0]
+
+    # Depth
+    new_z = z + landmarks["center_z"]
+    feet = np.isin(names, ("left_foot", "left_toes", "left_end"))
+    foot_z = template["left_foot"][2]
+    new_z[feet] = landmarks["ankle_z"] + (z[feet] - foot_z) * (
+        (landmarks["toe_z"] - landmarks["ankle_z"]) / (template["left_end"][2] - foot_z))
+    fingers = regions == "hand"
+    spread = template["left_index_1"][2] - template["left_pinkie_1"][2]
+    middle = (template["left_index_1"][2] + template["left_pinkie_1"][2]) / 2.0
+    new_z[fingers] = landmarks["hand_z"] + (z[fingers] - middle) * FINGER_SPREAD * landmarks["palm_width"] / spread
+
+    center_x, center_z = landmarks["center_x"], landmarks["center_z"]
+    points = np.stack([new_x + center_x, new_y, new_z], axis=1).round(guide_template.HASH_DECIMALS)
+    result = {"loc_base": (center_x, floor, center_z), "loc_top": (center_x, top, center_z)}
+    result.update((f"loc_{name}", tuple(point)) for name, point in zip(names, points.tolist()))
+    return result
+
+
+def guide_positions(mesh=None, preset="default", chunk_size=CHUNK_SIZE):
+    """Guide positions fitted on a mesh (the selected one by default).
+
+    Returns {locator: (x, y, z)}, empty when there is no mesh.
+    """
+    mesh = mesh or selected_mesh()
+    if mesh is None:
+        cmds.warning("Select the character mesh to place the guides automatically.")
+        return {}
+    landmarks = measure(SilhouetteGrid.from_mesh(mesh, chunk_size))
+    positions = fit_guides(landmarks, preset)
+    print(f"{len(positions)} guides placed from {mesh}, height {landmarks['top'] - landmarks['floor']:.2f}")
+    return positions
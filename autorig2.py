@@ -1,9 +1,30 @@
 import maya.cmds as cmds
+import maya.mel as mel
 import math
 import json
 import os
 
-CTRL_LIB = "ControlShape"  # Folder where controlShapes are located
+from attr_batch import attribute_batch
+import auto_guides
+import bind_pose
+from build_context import build_stage
+import control_factory
+import guide_template
+import joint_orient
+import mirror
+from node_registry import registry
+from shape_library import create_controller_from_file, merge_curves
+import skin_weights
+
+GUIDE_PRESET = "default"  # Body-type preset of guide_template.PRESETS
+THUMB_ORIENTATION = "auto"  # "auto" from the hand guides, "manual" to rotate the axes by hand
+MIRROR_PLANE = "YZ"  # Plane used by symmetrize through loc_base, see mirror.PLANES and symmetry_plane
+GUIDE_HASH_ATTRIBUTE = "guideHashes"  # Limb hashes of the last build, on Locator_grp
+LOCATOR_GROUP = "Locator_grp"  # Roles of the nodes the build looks up, see node_registry
+ROOT_CONTROL = "root_Ctrl"
+guide_seeds = {}  # Locator -> world position placed from the character mesh, see seed_guides
+character_mesh = None  # Mesh the guides were placed from, skinned by Control_Creation
+build_pose = None  # bind_pose.PoseSnapshot of the skeleton at the end of the build, see reset_pose
 
 ###########
 ##Helper Function
@@ -27,88 +48,141 @@ def deferred_execution(window,Nextfunction):
     cmds.deleteUI(window)
     cmds.evalDeferred(Nextfunction)
 
-def create_locator(name, translate_x, translate_y, translate_z, scaleV):
-    loc = cmds.spaceLocator(name=name)[0]
-    ratio = (get_distance_between_locators("loc_base", "loc_top"))/180
-    params = (  (f"{loc}.translateX", translate_x),
-                (f"{loc}.translateY", translate_y),
-                (f"{loc}.translateZ", translate_z),
-                (f"{loc}Shape.overrideEnabled", 1),
-                (f"{loc}Shape.overrideColor", 21)
-             )
-    cmds.scale(scaleV * ratio, scaleV * ratio, scaleV * ratio, loc, relative=True)
-
-    for name, value in params:
-        cmds.setAttr(name, value)
-        cmds.select(clear=True)
-    return loc
+def place_locators(names, positions, scales):
+    """Create locators at absolute positions and scales, one xform each."""
+    created = []
+    with attribute_batch() as batch:
+        for name, pos, scale in zip(names, positions, scales):
+            loc = cmds.spaceLocator(name=name)[0]
+            cmds.xform(loc, translation=tuple(pos), scale=(scale, scale, scale))
+            batch.set(f"{loc}Shape.overrideEnabled", 1)
+            batch.set(f"{loc}Shape.overrideColor", 21)
+            created.append(loc)
+    cmds.select(clear=True)
+    return registry.register_many(names, created)
+
+def symmetry_plane():
+    """MIRROR_PLANE moved through loc_base, the centre of the character, as
+    (normal, distance). Guides placed on a mesh away from the origin are
+    mirrored across the mesh centre."""
+    normal, distance = mirror.PLANES[MIRROR_PLANE]
+    base = registry.mapping(["loc_base"]).get("loc_base")
+    if base is not None:
+        position = cmds.xform(base, query=True, worldSpace=True, translation=True)
+        distance = sum(n * p for n, p in zip(normal, position))
+    return normal, distance
 
 def symmetrize_locator(left_locator, right_locator_name):
     """Create and symmetrize the right locator based on the left one."""
-    try:
-        # Duplicate the locator
-        duplicated_locator = cmds.duplicate(left_locator, renameChildren=True)[0]
-
-        # Ensure the correct name is applied
-        if cmds.objExists(right_locator_name):
-            cmds.delete(right_locator_name)  # Clean up any previous conflicts
-        duplicated_locator = cmds.rename(duplicated_locator, right_locator_name)
-
-        # Symmetrize by inverting the X position
-        current_x = cmds.getAttr(f"{duplicated_locator}.translateX")
-        inverted_x = -current_x
-        cmds.setAttr(f"{duplicated_locator}.translateX", inverted_x)
-
-        print(f"Symmetrized {left_locator} to {right_locator_name}")
-        return duplicated_locator
+    written = mirror.mirror_nodes([left_locator], [right_locator_name], plane=symmetry_plane())
+    return written[0] if written else None
 
+def symmetrize(parts, update_only=False):
+    """Mirror every loc_left_<part> onto loc_right_<part> in one batch."""
+    try:
+        mirror.mirror_nodes(
+            [f"loc_left_{part}" for part in parts],
+            [f"loc_right_{part}" for part in parts],
+            plane=symmetry_plane(), update_only=update_only,
+        )
     except Exception as e:
-        print(f"Error symmetrizing {left_locator} to {right_locator_name}: {e}")
-
-def symmetrize(parts):
-    for part in parts:
-        symmetrize_locator(f"loc_left_{part}", f"loc_right_{part}") 
-
-def create_joint_chain(locator_list, suffix=""):
-    """Crée des joints basés sur une liste de locators."""
-    for locator_name in locator_list:
-        if cmds.objExists(locator_name):
-            locator_pos = cmds.xform(locator_name, query=True, translation=True, worldSpace=True)
-            joint_name = "joint_" + locator_name.replace("loc_", "") + suffix
-            cmds.joint(position=locator_pos, radius=4, name=joint_name)
-            cmds.select(clear=True)
-            print(f"Joint {joint_name} created at the position of {locator_name}")
-        else:
+        print(f"Error symmetrizing {', '.join(parts)}: {e}")
+
+def build_joint_hierarchy(hierarchy, positions=None):
+    """Crée les joints directement sous leur parent, parents en premier.
+
+    hierarchy is the (joint, locator, parent, radius) list of
+    guide_template.joint_hierarchy. A joint is created with its parent
+    selected, so no reparenting is needed afterwards. The locator positions
+    read are added to the positions dict when one is given. Joints are
+    registered by their template name, the names returned are the ones Maya
+    gave them.
+    """
+    locators = registry.mapping(sorted({entry[1] for entry in hierarchy}))
+    positions = {} if positions is None else positions
+    created = {}  # Template name -> node
+    cmds.select(clear=True)
+    current = None  # Selected joint, the next joint is created under it
+    for joint_name, locator_name, parent, radius in hierarchy:
+        if locator_name not in locators:
             cmds.warning(f"Locator {locator_name} not found.")
-
-def adjust_joint_radius(joint_list, radius):
-    """Ajuste le rayon des joints dans une liste."""
-    for joint_name in joint_list:
-        if cmds.objExists(joint_name):
-            cmds.setAttr(f"{joint_name}.radius", radius)
-        else:
-            cmds.warning(f"Joint {joint_name} not found.")
-
-def parent_joints(parenting_rules):
-    """Parent les joints basés sur des règles."""
-    for child, parent in parenting_rules:
-        if cmds.objExists(child) and cmds.objExists(parent):
-            cmds.parent(child, parent)
-        else:
-            cmds.warning(f"Parenting failed for {child} -> {parent}.")
-
-def orient_joint(joint_list, orientation="xyz", secondary_axis="yup", zero_scale_orient=True, children=False):
-    """Oriente les joints spécifiés."""
-    for joint in joint_list:
-        if cmds.objExists(joint):
-            cmds.joint(
-                joint, edit=True, orientJoint=orientation,
-                secondaryAxisOrient=secondary_axis,
-                zeroScaleOrient=zero_scale_orient,
-                children=children
-            )
-        else:
-            cmds.warning(f"Joint {joint} not found.")
+            continue
+        if parent is not None and parent not in created:
+            cmds.warning(f"Joint {joint_name} skipped, its parent {parent} was not created.")
+            continue
+        if parent != current:
+            if parent is None:
+                cmds.select(clear=True)
+            else:
+                cmds.select(created[parent], replace=True)
+        if locator_name not in positions:
+            positions[locator_name] = cmds.xform(locators[locator_name], query=True, translation=True, worldSpace=True)
+        created[joint_name] = cmds.joint(position=positions[locator_name], radius=radius, name=joint_name)
+        current = joint_name
+    cmds.select(clear=True)
+    registry.register_many(created, created.values())
+    print(f"{len(created)} joints created from the locators")
+    return list(created.values())
+
+def clone_joint_chain(root, suffix, members):
+    """Copie une chaîne de joints déjà orientée en <joint><suffix>.
+
+    The bind joint root and its descendants are duplicated in one call, the
+    copies of joints that are not in members (the fingers under the hand)
+    are deleted and the others renamed. Orientations are copied as they are.
+    The copies are registered as <joint><suffix>, returns their names.
+    """
+    members = set(members)
+    nodes = registry.mapping([root, *members])
+    roles = {node: role for role, node in nodes.items()}
+    copy_root = cmds.duplicate(nodes[root], renameChildren=True, returnRootsOnly=True)[0]
+    originals = cmds.listRelatives(nodes[root], allDescendents=True, fullPath=True, type="joint") or []
+    copies = cmds.listRelatives(copy_root, allDescendents=True, fullPath=True, type="joint") or []
+    pairs = [(copy, roles.get(original.split("|")[-1])) for copy, original in zip(copies, originals)]
+    extra = [copy for copy, role in pairs if role not in members]
+    if extra:
+        cmds.delete(extra)
+
+    # Deepest joints first so the paths of the remaining copies stay valid
+    pairs = [(copy, role) for copy, role in pairs if role in members]
+    pairs.sort(key=lambda pair: pair[0].count("|"), reverse=True)
+    pairs.append((copy_root, root))
+    created = [cmds.rename(copy, f"{role}{suffix}") for copy, role in pairs]
+    registry.register_many([f"{role}{suffix}" for _, role in pairs], created)
+    return created[::-1]
+
+def store_guide_hashes(positions, node=None):
+    """Garde le hash de chaque membre sur le groupe des locators."""
+    node = node or registry.get(LOCATOR_GROUP)
+    hashes = guide_template.limb_hashes(positions)
+    if not cmds.attributeQuery(GUIDE_HASH_ATTRIBUTE, node=node, exists=True):
+        cmds.addAttr(node, longName=GUIDE_HASH_ATTRIBUTE, dataType="string")
+    cmds.setAttr(f"{node}.{GUIDE_HASH_ATTRIBUTE}", json.dumps(hashes, sort_keys=True), type="string")
+    return hashes
+
+def stored_guide_hashes(node=None):
+    """Limb hashes of the last build, empty when the rig has none."""
+    node = node or registry.get(LOCATOR_GROUP)
+    if node is None or not cmds.objExists(node) or not cmds.attributeQuery(GUIDE_HASH_ATTRIBUTE, node=node, exists=True):
+        return {}
+    return json.loads(cmds.getAttr(f"{node}.{GUIDE_HASH_ATTRIBUTE}") or "{}")
+
+def orient_thumbs(sides=("left", "right")):
+    """Oriente les pouces dans le plan main / index / pouce, sans intervention."""
+    oriented = []
+    for side in sides:
+        chain = registry.names([f"joint_{side}_thumb_{i}" for i in (1, 2, 3)])
+        plane = registry.names([f"joint_{side}_hand", f"joint_{side}_index_1"]) + chain[:1]
+        oriented += joint_orient.orient_in_plane(chain, plane)
+    print(f"Thumbs oriented automatically: {', '.join(oriented)}")
+    return oriented
+
+def orient_thumb_ends(sides=("right", "left")):
+    """Aligne le dernier joint des pouces sur le monde."""
+    for side in sides:
+        cmds.select(registry.get(f"joint_{side}_thumb_3"), r=True)
+        cmds.joint(e=True, oj="none", ch=True, zso=True)
+        cmds.select(clear=True)
 
 def thumb_orientation(joint_name):
    
@@ -134,361 +208,139 @@ def thumb_orientation(joint_name):
     # Sélectionner l'attribut 'rotateAxis' de 'joint_left_thumb_1'
     cmds.select(f"{joint_name}.rotateAxis", replace=True)
 
-def create_controller_from_file(file_name: str, directory: str = CTRL_LIB):
-    """Creates a Maya controller from a JSON file describing its shape."""
-    # Load the data from the JSON file
-    user_script_dir = cmds.internalVar(userScriptDir=True)
-    file_path = f"{user_script_dir}{directory}/{file_name}.shape"
-    try:
-        with open(file_path, 'r') as file:
-            shape_data = json.load(file)
-    except Exception as e:
-        cmds.error(f"Error reading the JSON file: {e}")
-        return
-    
-    # Iterate through the shapes in the file
-    for shape_name, shape_attributes in shape_data.items():
-        # Create a NURBS curve
-        cvs = shape_attributes.get("cvs", [])
-        knots = shape_attributes.get("knots", [])
-        degree = shape_attributes.get("degree", 3)
-        form = shape_attributes.get("form", 0)  # 0: Open, 1: Closed, 3: Periodic
-        
-        # Create the curve using the data
-        curve = cmds.curve(p=[tuple(cv[:3]) for cv in cvs], k=knots, d=degree)
-        
-        # Adjust the shape based on its properties (e.g., overrideColorRGB)
-        if "overrideColorRGB" in shape_attributes:
-            color = shape_attributes["overrideColorRGB"]
-            cmds.setAttr(f"{curve}.overrideEnabled", 1)
-            cmds.setAttr(f"{curve}.overrideRGBColors", 1)
-            cmds.setAttr(f"{curve}.overrideColorR", color[0])
-            cmds.setAttr(f"{curve}.overrideColorG", color[1])
-            cmds.setAttr(f"{curve}.overrideColorB", color[2])
-        
-        # Rename the shape with the specified name
-        curve = cmds.rename(curve, shape_name)
-        print(f"Controller created: {curve}")
-
-
 #########
 ##Function
 ########
 
-def create_leg_locators():
-    locator1 = "loc_base"
-    locator2 = "loc_top"
+def seed_guides(mesh=None):
+    """Place every guide from the character mesh (the selected one by default).
+
+    The guides are created at these positions by the following stages and
+    the mesh is skinned on the joints at the end of the build.
+    """
+    global character_mesh
+    character_mesh = mesh or auto_guides.selected_mesh()
+    guide_seeds.clear()
+    guide_seeds.update(auto_guides.guide_positions(mesh, preset=GUIDE_PRESET))
+    return guide_seeds
+
+def create_guides(stage, distance, preset=None):
+    """Create every guide locator of a template stage in one pass, at the
+    positions seeded from the mesh when there are some."""
+    names, positions, scales = guide_template.compute_layout(
+        distance, stage=stage, preset=preset or GUIDE_PRESET)
+    names = [f"loc_{name}" for name in names]
+    positions = [guide_seeds.get(name, position) for name, position in zip(names, positions.tolist())]
+    return place_locators(names, positions, scales.tolist())
 
-    # Calculate the distance
-    distance = get_distance_between_locators(locator1, locator2)
+def create_leg_locators():
+    # Distance between loc_base and loc_top, measured once for the stage
+    distance = get_distance_between_locators("loc_base", "loc_top")
     print(f"Distance between locators: {distance}")
 
-    # Create Hips Locator
-    distance_hips = distance / 2
-    loc_hips = cmds.spaceLocator(name="loc_Hips")[0]
-    cmds.setAttr(f"{loc_hips}.translateY", distance_hips)
-    cmds.setAttr(f"{loc_hips}Shape.overrideEnabled", 1)
-    cmds.setAttr(f"{loc_hips}Shape.overrideColor", 21)
-    cmds.scale(10, 10, 10, loc_hips, relative=True)
-    cmds.select(clear=True)
-
-    # Create Left Leg Locators
-    create_locator("loc_left_thig", distance / 18, distance / 1.9, 0, 10)
-    create_locator("loc_left_leg", distance / 16.5, distance / 3.6, distance / -66.6, 10)
-    create_locator("loc_left_foot", distance / 14.17, distance / 18.44, distance / -22.5, 10)
-    create_locator("loc_left_toes", distance / 14.17, distance / 103.8, distance / 52.2, 10)
-    create_locator("loc_left_end", distance / 14.17, distance / 103.8, distance / 17.25, 10)
+    # Hips and Left Leg Locators
+    create_guides("leg", distance)
 
 def symmetrize_leg():
-    symmetrize(("thig", "leg", "foot", "toes", "end"))
+    symmetrize(guide_template.mirrored_parts("leg"))
 
 def create_arm_locator(distance):
-    # Create Left arm Locators
-    create_locator("loc_left_shoulder", distance / 12.5, distance / 1.22, distance / -46.15, 10)
-    create_locator("loc_left_forearm", distance / 4.4, distance / 1.25, distance / -36.73, 10)
-    create_locator("loc_left_hand", distance / 2.7, distance / 1.23, distance / 114.95, 10)
-
-    create_locator("loc_left_pinkie_1", distance / 2.7, distance / 1.22, distance / -656.93, 1)
-    create_locator("loc_left_pinkie_2", distance / 2.46, distance / 1.23, distance / -156.11, 1)
-    create_locator("loc_left_pinkie_3", distance / 2.37, distance / 1.23, distance / -124.13, 1)
-
-    create_locator("loc_left_ring_1", distance / 2.66, distance / 1.22, distance / 188.48, 1)
-    create_locator("loc_left_ring_2", distance / 2.45, distance / 1.22, distance / 214.54, 1)
-    create_locator("loc_left_ring_3", distance / 2.31, distance / 1.22, distance / 268.255, 1)
-
-    create_locator("loc_left_middle_1", distance / 2.66, distance / 1.22, distance / 64.31, 1)
-    create_locator("loc_left_middle_2", distance / 2.45, distance / 1.22, distance / 60.34, 1)
-    create_locator("loc_left_middle_3", distance / 2.29, distance / 1.22, distance / 60.34, 1)
-
-    create_locator("loc_left_index_1", distance / 2.65, distance / 1.22, distance / 38.46, 1)
-    create_locator("loc_left_index_2", distance / 2.45, distance / 1.22, distance / 34.38, 1)
-    create_locator("loc_left_index_3", distance / 2.32, distance / 1.23, distance / 33.09, 1)
-
-    create_locator("loc_left_thumb_1", distance / 2.7, distance / 1.24, distance / 36.42, 1)
-    create_locator("loc_left_thumb_2", distance / 2.59, distance / 1.24, distance / 25.07, 1)
-    create_locator("loc_left_thumb_3", distance / 2.49, distance / 1.25, distance / 20.48, 1)
+    # Left arm and fingers Locators
+    create_guides("arm", distance)
 
 def symmetrize_arm():
-    symmetrize(("shoulder", "forearm", "hand",
-                "pinkie_1", "pinkie_2", "pinkie_3",
-                "ring_1", "ring_2", "ring_3",
-                "middle_1", "middle_2", "middle_3",
-                "index_1", "index_2", "index_3",
-                "thumb_1", "thumb_2", "thumb_3",))
+    symmetrize(guide_template.mirrored_parts("arm"))
 
 def create_spine_to_head_locators(distance):
-        
-    create_locator("loc_Spine_1", 0, distance / 1.7, 0, 10)
-    create_locator("loc_Spine_2", 0, distance / 1.54, 0, 10)
-    create_locator("loc_Spine_3", 0, distance / 1.38, 0, 10)
-    create_locator("loc_Spine_4", 0, distance / 1.2, distance / -46.15, 10)
-    create_locator("loc_neck", 0,distance / 1.13, distance / 814.47, 10)
-    create_locator("loc_head", 0,distance / 1.071, distance / 106.13, 10)
-
-    # Create clavicles
-    create_locator("loc_clavicle_right", distance / -55.197, distance / 1.224, distance / 124.602, 10)
-    create_locator("loc_clavicle_left", distance / 55.197, distance / 1.224, distance / 124.602, 10)
-
-    # Create pectorals
-    create_locator("loc_pec_right", distance / -16.912, distance / 1.363, distance / 12.961, 10)
-    create_locator("loc_pec_left", distance / 16.912, distance / 1.363, distance / 12.961, 10)
+    # Spine, neck, head, clavicles and pectorals
+    create_guides("spine", distance)
 
+@build_stage()
 def run_leg():
     create_leg_locators()
     show_window_symLeg()
     
+@build_stage()
 def run_symleg():
     symmetrize_leg()
     create_spine_to_head_locators(get_distance_between_locators("loc_base", "loc_top"))
     show_window_armL()
 
+@build_stage()
 def run_arm():
     create_arm_locator(get_distance_between_locators("loc_base", "loc_top"))
     show_window_symArm()
 
+@build_stage()
 def run_symArm():
     symmetrize_arm()
     show_window_CreaJoint()
 
-def CreaJoint():
-    # Select all the locators
-    cmds.select('loc_right_thumb_3', 'loc_right_thumb_2', 'loc_right_thumb_1', 'loc_right_index_3', 
-            'loc_right_index_2', 'loc_right_index_1', 'loc_right_middle_3', 'loc_right_middle_2', 
-            'loc_right_middle_1', 'loc_right_ring_3', 'loc_right_ring_2', 'loc_right_ring_1', 
-            'loc_right_pinkie_3', 'loc_right_pinkie_2', 'loc_right_pinkie_1', 'loc_right_hand', 
-            'loc_right_forearm', 'loc_right_shoulder', 'loc_left_thumb_3', 'loc_left_thumb_2', 
-            'loc_left_thumb_1', 'loc_left_index_3', 'loc_left_index_2', 'loc_left_index_1', 
-            'loc_left_middle_3', 'loc_left_middle_2', 'loc_left_middle_1', 'loc_left_ring_3', 
-            'loc_left_ring_2', 'loc_left_ring_1', 'loc_left_pinkie_3', 'loc_left_pinkie_2', 
-            'loc_left_pinkie_1', 'loc_left_hand', 'loc_left_forearm', 'loc_left_shoulder', 'loc_Spine_4', 
-            'loc_Spine_3', 'loc_Spine_2', 'loc_Spine_1', 'loc_neck', 'loc_head', 'loc_right_end', 
-            'loc_right_toes', 'loc_right_foot', 'loc_right_leg', 'loc_right_thig', 'loc_left_end', 
-            'loc_left_toes', 'loc_left_foot', 'loc_left_leg', 'loc_left_thig', 'loc_Hips', 'loc_top', 
-            'loc_base', 'loc_clavicle_right', 'loc_clavicle_left', 'loc_pec_right', 'loc_pec_left')
-
-    # Group the locators
-    cmds.Group(0, 1, 1)
-
-    # Rename the group
-    cmds.rename('group1', 'Locator_grp')
-
-        # Locator lists
-    main_locators = [
-        "loc_right_thumb_3", "loc_right_thumb_2", "loc_right_thumb_1", "loc_right_index_3", "loc_right_index_2", "loc_right_index_1", 
-        "loc_right_middle_3", "loc_right_middle_2", "loc_right_middle_1", "loc_right_ring_3", "loc_right_ring_2", "loc_right_ring_1", 
-        "loc_right_pinkie_3", "loc_right_pinkie_2", "loc_right_pinkie_1", "loc_right_hand", "loc_right_forearm", "loc_right_shoulder", 
-        "loc_left_thumb_3", "loc_left_thumb_2", "loc_left_thumb_1", "loc_left_index_3", "loc_left_index_2", "loc_left_index_1", 
-        "loc_left_middle_3", "loc_left_middle_2", "loc_left_middle_1", "loc_left_ring_3", "loc_left_ring_2", "loc_left_ring_1", 
-        "loc_left_pinkie_3", "loc_left_pinkie_2", "loc_left_pinkie_1", "loc_left_hand", "loc_left_forearm", "loc_left_shoulder", 
-        "loc_Spine_4", "loc_Spine_3", "loc_Spine_2", "loc_Spine_1", "loc_neck", "loc_head", "loc_right_end", "loc_right_toes", 
-        "loc_right_foot", "loc_right_leg", "loc_right_thig", "loc_left_end", "loc_left_toes", "loc_left_foot", "loc_left_leg", "loc_left_thig", 
-        "loc_Hips", "loc_clavicle_right", "loc_clavicle_left", "loc_pec_right", "loc_pec_left"
-    ]
-    ik_locators = [
-        "loc_right_hand", "loc_right_forearm", "loc_right_shoulder", "loc_left_hand", "loc_left_forearm", "loc_left_shoulder", 
-        "loc_right_foot", "loc_right_leg", "loc_right_thig", "loc_left_foot", "loc_left_leg", "loc_left_thig", "loc_right_end", "loc_right_toes", "loc_left_end", "loc_left_toes"
-    ]
-    fk_locators = [
-        "loc_right_hand", "loc_right_forearm", "loc_right_shoulder", "loc_left_hand", "loc_left_forearm", "loc_left_shoulder", 
-        "loc_right_foot", "loc_right_leg", "loc_right_thig", "loc_right_end", "loc_right_toes", "loc_left_foot", "loc_left_end", "loc_left_toes", "loc_left_leg", "loc_left_thig"
-    ]
+@build_stage()
+def CreaJoint(interactive=True):
+    # Locators and joint hierarchy come from the guide template
+    main_locators = guide_template.bind_locators()
 
-    # Create joints for each category
-    create_joint_chain(main_locators)
-    create_joint_chain(ik_locators, suffix="_IK")
-    create_joint_chain(fk_locators, suffix="_FK")
-
-    # Adjust radius
-    adjust_joint_radius([
-        "joint_right_pinkie_3", "joint_right_hand", "joint_right_thumb_1", "joint_right_thumb_2", "joint_right_thumb_3", 
-        "joint_right_index_1", "joint_right_index_2", "joint_right_index_3", "joint_right_middle_1", "joint_right_middle_2", "joint_right_middle_3", 
-        "joint_right_ring_1", "joint_right_ring_2", "joint_right_ring_3", "joint_right_pinkie_1", "joint_right_pinkie_2", 
-        "joint_left_pinkie_3", "joint_left_hand", "joint_left_thumb_1", "joint_left_thumb_2", "joint_left_thumb_3", 
-        "joint_left_index_1", "joint_left_index_2", "joint_left_index_3", "joint_left_middle_1", "joint_left_middle_2", "joint_left_middle_3", 
-        "joint_left_ring_1", "joint_left_ring_2", "joint_left_ring_3", "joint_left_pinkie_1", "joint_left_pinkie_2"
-    ], 1)
-
-    # Parent joints
-    parenting_rules = [
-        ("joint_right_thumb_3", "joint_right_thumb_2"),
-        ("joint_right_thumb_2", "joint_right_thumb_1"),
-        ("joint_right_index_3", "joint_right_index_2"),
-        ("joint_right_index_2", "joint_right_index_1"),
-        ("joint_right_middle_3", "joint_right_middle_2"),
-        ("joint_right_middle_2", "joint_right_middle_1"),
-        ("joint_right_ring_3", "joint_right_ring_2"),
-        ("joint_right_ring_2", "joint_right_ring_1"),
-        ("joint_right_pinkie_3", "joint_right_pinkie_2"),
-        ("joint_right_pinkie_2", "joint_right_pinkie_1"),
-        ("joint_right_thumb_1", "joint_right_hand"),
-        ("joint_right_index_1", "joint_right_hand"),
-        ("joint_right_middle_1", "joint_right_hand"),
-        ("joint_right_ring_1", "joint_right_hand"),
-        ("joint_right_pinkie_1", "joint_right_hand"),
-        ("joint_right_hand", "joint_right_forearm"),
-        ("joint_right_forearm", "joint_right_shoulder"),
-        ("joint_right_hand_IK", "joint_right_forearm_IK"),
-        ("joint_right_forearm_IK", "joint_right_shoulder_IK"),
-        ("joint_right_hand_FK", "joint_right_forearm_FK"),
-        ("joint_right_forearm_FK", "joint_right_shoulder_FK"),
-        ("joint_left_thumb_3", "joint_left_thumb_2"),
-        ("joint_left_thumb_2", "joint_left_thumb_1"),
-        ("joint_left_index_3", "joint_left_index_2"),
-        ("joint_left_index_2", "joint_left_index_1"),
-        ("joint_left_middle_3", "joint_left_middle_2"),
-        ("joint_left_middle_2", "joint_left_middle_1"),
-        ("joint_left_ring_3", "joint_left_ring_2"),
-        ("joint_left_ring_2", "joint_left_ring_1"),
-        ("joint_left_pinkie_3", "joint_left_pinkie_2"),
-        ("joint_left_pinkie_2", "joint_left_pinkie_1"),
-        ("joint_left_thumb_1", "joint_left_hand"),
-        ("joint_left_index_1", "joint_left_hand"),
-        ("joint_left_middle_1", "joint_left_hand"),
-        ("joint_left_ring_1", "joint_left_hand"),
-        ("joint_left_pinkie_1", "joint_left_hand"),
-        ("joint_left_hand", "joint_left_forearm"),
-        ("joint_left_forearm", "joint_left_shoulder"),
-        ("joint_left_hand_IK", "joint_left_forearm_IK"),
-        ("joint_left_forearm_IK", "joint_left_shoulder_IK"),
-        ("joint_left_hand_FK", "joint_left_forearm_FK"),
-        ("joint_left_forearm_FK", "joint_left_shoulder_FK"),
-        ("joint_Spine_4", "joint_Spine_3"),
-        ("joint_Spine_3", "joint_Spine_2"),
-        ("joint_Spine_2", "joint_Spine_1"),
-        ("joint_Spine_1", "joint_Hips"),
-        ("joint_neck", "joint_Spine_4"),
-        ("joint_head", "joint_neck"),
-        ("joint_right_toes", "joint_right_foot"),
-        ("joint_right_foot", "joint_right_leg"),
-        ("joint_right_leg", "joint_right_thig"),
-        ("joint_left_toes", "joint_left_foot"),
-        ("joint_left_foot", "joint_left_leg"),
-        ("joint_left_leg", "joint_left_thig"),
-        ("joint_right_thig", "joint_Hips"),
-        ("joint_left_thig", "joint_Hips"),
-        ("joint_left_end", "joint_left_toes"),
-        ("joint_right_end", "joint_right_toes"),  
-        ("joint_clavicle_right", "joint_Spine_4"),
-        ("joint_clavicle_left", "joint_Spine_4"),
-        ("joint_pec_right", "joint_clavicle_right"),
-        ("joint_pec_left", "joint_clavicle_left"),
-        ("joint_left_shoulder", "joint_clavicle_left"),
-        ("joint_right_shoulder", "joint_clavicle_right"),
-        ("joint_right_shoulder_IK", "joint_clavicle_right"),
-        ("joint_right_shoulder_FK", "joint_clavicle_right"),
-        ("joint_left_shoulder_IK", "joint_clavicle_left"),
-        ("joint_left_shoulder_FK", "joint_clavicle_left"),
-        ("joint_right_toes_IK", "joint_right_foot_IK"),
-        ("joint_right_foot_IK", "joint_right_leg_IK"),
-        ("joint_right_leg_IK", "joint_right_thig_IK"),
-        ("joint_left_toes_IK", "joint_left_foot_IK"),
-        ("joint_left_foot_IK", "joint_left_leg_IK"),
-        ("joint_left_leg_IK", "joint_left_thig_IK"),
-        ("joint_right_thig_IK", "joint_Hips"),
-        ("joint_left_thig_IK", "joint_Hips"),
-        ("joint_left_end_IK", "joint_left_toes_IK"),
-        ("joint_right_end_IK", "joint_right_toes_IK"),
-        ("joint_right_toes_FK", "joint_right_foot_FK"),
-        ("joint_right_foot_FK", "joint_right_leg_FK"),
-        ("joint_right_leg_FK", "joint_right_thig_FK"),
-        ("joint_left_toes_FK", "joint_left_foot_FK"),
-        ("joint_left_foot_FK", "joint_left_leg_FK"),
-        ("joint_left_leg_FK", "joint_left_thig_FK"),
-        ("joint_right_thig_FK", "joint_Hips"),
-        ("joint_left_thig_FK", "joint_Hips"),
-        ("joint_left_end_FK", "joint_left_toes_FK"),
-        ("joint_right_end_FK", "joint_right_toes_FK"),
-    ]
+    # Group the locators, whatever name the scene leaves for the group
+    locators = registry.names(main_locators + ["loc_top", "loc_base"])
+    registry.register(LOCATOR_GROUP, cmds.group(locators, name=LOCATOR_GROUP))
 
-    parent_joints(parenting_rules)
+    # Bind joints, each one created under its parent
+    positions = {}
+    build_joint_hierarchy(guide_template.joint_hierarchy(chains=False), positions)
+    store_guide_hashes(positions)
     orient_joint_groups()
 
-def orient_joint_groups():
-    """Oriente les groupes de joints selon les règles du MEL original."""
+    # IK and FK chains, copies of the oriented bind chains
+    for chain, root, members in guide_template.joint_chains():
+        clone_joint_chain(root, f"_{chain}", members)
+
+    # Thumbs, the manual orientation is an override skipped by the headless build
+    if THUMB_ORIENTATION == "auto":
+        orient_thumbs()
+        if interactive:
+            cmds.evalDeferred(Control_Creation)
+    elif interactive:
+        thumb_orientation("joint_left_thumb_1")
+        show_window_Left_Thumb1()
+
+# orientJoint rules of the original MEL, applied in order by orient_joint_groups:
+# (joints, orientation, secondary axis, children)
+ORIENT_RULES = [
     # Hips to Head
-    orient_joint(
-        ["joint_Hips", "joint_Spine_1", "joint_Spine_2", "joint_Spine_3", "joint_Spine_4", "joint_neck", "joint_head"],
-        orientation="yxz", secondary_axis="xup", children=True
-    )
-    # Head
-    orient_joint(["joint_head"], orientation="none", children=True)
-
-    # Left Arm
-    orient_joint(
-        ["joint_clavicle_left", "joint_left_shoulder", "joint_left_forearm", "joint_left_hand"],
-        orientation="xyz", secondary_axis="yup", children=True
-    )
-    orient_joint(["joint_left_hand"], orientation="none", children=True)
-
-    # Left Fingers
-    for finger in ["thumb", "index", "middle", "ring", "pinkie"]:
-        orient_joint(
-            [f"joint_left_{finger}_1", f"joint_left_{finger}_2", f"joint_left_{finger}_3"],
-            orientation="xyz", secondary_axis="yup", children=True
-        )
-    orient_joint(
-        ["joint_left_pinkie_3", "joint_left_ring_3", "joint_left_middle_3", "joint_left_index_3"],
-        orientation="none"
-    )
-
-    # Right Arm
-    orient_joint(
-        ["joint_clavicle_right", "joint_right_shoulder", "joint_right_forearm", "joint_right_hand"],
-        orientation="xyz", secondary_axis="yup", children=True
-    )
-    orient_joint(["joint_right_hand"], orientation="none", children=True)
-
-    # Right Fingers
-    for finger in ["thumb", "index", "middle", "ring", "pinkie"]:
-        orient_joint(
-            [f"joint_right_{finger}_1", f"joint_right_{finger}_2", f"joint_right_{finger}_3"],
-            orientation="xyz", secondary_axis="yup", children=True
-        )
-    orient_joint(
-        ["joint_right_pinkie_3", "joint_right_ring_3", "joint_right_middle_3", "joint_right_index_3"],
-        orientation="none"
-    )
-
-    # Legs (IK, FK, and default)
-    orient_joint(
-        [
-            "joint_right_thig_IK", "joint_right_leg_IK", "joint_right_foot_IK", "joint_right_toes_IK", "joint_right_end_IK",
-            "joint_left_thig_IK", "joint_left_leg_IK", "joint_left_foot_IK", "joint_left_toes_IK", "joint_left_end_IK",
-            "joint_right_thig_FK", "joint_right_leg_FK", "joint_right_foot_FK", "joint_right_toes_FK", "joint_right_end_FK",
-            "joint_left_thig_FK", "joint_left_leg_FK", "joint_left_foot_FK", "joint_left_toes_FK", "joint_left_end_FK",
-            "joint_left_thig", "joint_left_leg", "joint_left_foot", "joint_left_toes", "joint_left_end",
-            "joint_right_thig", "joint_right_leg", "joint_right_foot", "joint_right_toes", "joint_right_end"
-        ],
-        orientation="yxz", secondary_axis="xup", children=True
-    )
+    (["joint_Hips", "joint_Spine_1", "joint_Spine_2", "joint_Spine_3", "joint_Spine_4", "joint_neck", "joint_head"],
+     "yxz", "xup", True),
+    (["joint_head"], "none", "yup", True),
+]
+for side in ("left", "right"):
+    ORIENT_RULES += [
+        # Arm
+        ([f"joint_clavicle_{side}", f"joint_{side}_shoulder", f"joint_{side}_forearm", f"joint_{side}_hand"],
+         "xyz", "yup", True),
+        ([f"joint_{side}_hand"], "none", "yup", True),
+        # Fingers
+        *(([f"joint_{side}_{finger}_1", f"joint_{side}_{finger}_2", f"joint_{side}_{finger}_3"], "xyz", "yup", True)
+          for finger in ["thumb", "index", "middle", "ring", "pinkie"]),
+        ([f"joint_{side}_pinkie_3", f"joint_{side}_ring_3", f"joint_{side}_middle_3", f"joint_{side}_index_3"],
+         "none", "yup", False),
+    ]
+ORIENT_RULES += [
+    # Legs, the IK and FK chains are cloned from them afterwards
+    ([
+        "joint_left_thig", "joint_left_leg", "joint_left_foot", "joint_left_toes", "joint_left_end",
+        "joint_right_thig", "joint_right_leg", "joint_right_foot", "joint_right_toes", "joint_right_end"
+     ], "yxz", "xup", True),
     # End joints
-    orient_joint(
-        ["joint_right_end", "joint_left_end", "joint_left_end_FK", "joint_right_end_FK", "joint_left_end_IK", "joint_right_end_IK"],
-        orientation="none"
-    )
+    (["joint_right_end", "joint_left_end"], "none", "yup", False),
+]
 
-    thumb_orientation("joint_left_thumb_1")
-    show_window_Left_Thumb1()
+def orient_joint_groups():
+    """Oriente les groupes de joints selon les règles du MEL original, en une seule passe."""
+    hierarchy = [(joint, parent) for joint, _, parent, _ in guide_template.joint_hierarchy(chains=False)]
+    nodes = registry.mapping(joint for joint, _ in hierarchy)
+    hierarchy = [(nodes[joint], nodes.get(parent)) for joint, parent in hierarchy if joint in nodes]
+    rules = [([nodes[joint] for joint in joints if joint in nodes], *options) for joints, *options in ORIENT_RULES]
+    joint_orient.orient_hierarchy(hierarchy, rules)
 
 def Left_Thumb2():
     thumb_orientation("joint_left_thumb_2")
@@ -502,50 +354,51 @@ def Right_Thumb2():
     thumb_orientation("joint_right_thumb_2")
     show_window_Right_Thumb2()
 
+@build_stage()
 def Control_Creation():
-# Ajuster la vue pour inclure tous les objets
-cmds.viewFit("persp", all=True )
+    # Ajuster la vue pour inclure tous les objets
+    if not cmds.about(batch=True):
+        cmds.viewFit("persp", all=True )
 
-# Masquer les Locators
-cmds.hide("Locator_grp")
+    # Masquer les Locators
+    cmds.hide(registry.get(LOCATOR_GROUP))
 
-# OrientJoint L/R_Thumbs_3 
-cmds.select("joint_right_thumb_3", r=True)
-cmds.joint(e=True, oj="none", ch=True, zso=True)
-cmds.select(clear=True)
+    # OrientJoint L/R_Thumbs_3 
+    orient_thumb_ends()
 
-cmds.select("joint_left_thumb_3", r=True)
-cmds.joint(e=True, oj="none", ch=True, zso=True)
-cmds.select(clear=True)
+    # Créer le contrôleur Root, taille ajustée au squelette et appliquée directement aux CVs
+    root_scale = control_factory.fit_root_scale()
+    curves = create_controller_from_file("zoo_shapes/godnode_reg", scale=root_scale)
 
-# Créer le contrôleur Root
-create_controller_from_file("zoo_shapes\godnode_reg")
+    # Shapes under a single transform
+    registry.register(ROOT_CONTROL, merge_curves(curves, ROOT_CONTROL))
 
-# Select the objects
-cmds.select("godnode_regShape1", "godnode_regShape")
+    # Pose de construction du squelette, pour reset_pose
+    global build_pose
+    build_pose = bind_pose.PoseSnapshot.capture()
 
-# Apply transformations and freeze scale
-cmds.makeIdentity(apply=True, translate=True, rotate=True, scale=True, normal=False, preserveNormals=True)
+    # Skinner le mesh d'où viennent les guides
+    if character_mesh:
+        Skin_Binding(character_mesh)
 
-# Select the shapes
-cmds.select("godnode_regShapeShape",  "godnode_regShape1")
+@build_stage()
+def reset_pose():
+    """Put every joint (bind, IK and FK chains) back in its build pose.
 
-# Parent shapes under the same transform node
-cmds.parent(r=True, shape=True)
+    Returns the joints that had drifted, see bind_pose.PoseSnapshot.diff.
+    """
+    if build_pose is None:
+        cmds.warning("No build pose recorded, run Control_Creation first.")
+        return []
+    drift = build_pose.diff(bind_pose.PoseSnapshot.capture())
+    if drift:
+        build_pose.restore()
+    return drift
 
-# Select and delete the transform node
-cmds.select("godnode_regShape", replace=True)
-cmds.delete()
-cmds.rename("godnode_regShape1", "root_Ctrl")
-
-# Scale the objects
-root_scale = 54
-cmds.setAttr("root_Ctrl.scaleX", root_scale)
-cmds.setAttr("root_Ctrl.scaleY", root_scale)
-cmds.setAttr("root_Ctrl.scaleZ", root_scale)
-
-# Geler les transformations
-cmds.makeIdentity(apply=True, t=True, r=True, s=True, n=False)
+@build_stage()
+def Skin_Binding(mesh=None):
+    """Skin a mesh (the selected one by default) on the bind joints, see skin_weights."""
+    return skin_weights.bind_skin(mesh)
 
 
 #########
@@ -619,7 +472,8 @@ def show_window_CreaJoint():
                     "Check and adjust the locator positions.",
                     "Then click to proceed."
                 ],
-                btn_lbl="Continue to Left thumb Orientation ",
+                btn_lbl="Continue to Left thumb Orientation " if THUMB_ORIENTATION == "manual"
+                else "Continue to Joints and Controllers ",
                 cmd_var=CreaJoint,
                 ) 
 
@@ -666,33 +520,49 @@ def show_window_Right_Thumb2():
 
 
 
-# Script Beginning
-
-# Create Locator at Base and Top
-# Base Locator
-base_locator = cmds.spaceLocator(name="loc_base", position=(0, 0, 0))[0]
-cmds.setAttr(f"{base_locator}Shape.overrideEnabled", 1)
-cmds.setAttr(f"{base_locator}Shape.overrideColor", 21)
-cmds.scale(10, 10, 10, base_locator, relative=True)
-cmds.select(clear=True)
-
-# Top Locator
-top_locator = cmds.spaceLocator(name="loc_top", position=(0, 0, 0))[0]
-cmds.setAttr(f"{top_locator}.translateY", 180)
-cmds.setAttr(f"{top_locator}Shape.overrideEnabled", 1)
-cmds.setAttr(f"{top_locator}Shape.overrideColor", 21)
-cmds.scale(10, 10, 10, top_locator, relative=True)
-cmds.select(clear=True)
-
-show_window_leg()
-
-
-
-
-
-
-
-
+def create_base_locators(height=180):
+    """Create loc_base at the origin and loc_top at the given height.
 
+    They start a new build, the node registry is cleared.
+    """
+    registry.clear()
+    # Base Locator
+    base_locator = cmds.spaceLocator(name="loc_base", position=(0, 0, 0))[0]
+    cmds.setAttr(f"{base_locator}Shape.overrideEnabled", 1)
+    cmds.setAttr(f"{base_locator}Shape.overrideColor", 21)
+    cmds.scale(10, 10, 10, base_locator, relative=True)
+    cmds.select(clear=True)
 
+    # Top Locator
+    top_locator = cmds.spaceLocator(name="loc_top", position=(0, 0, 0))[0]
+    cmds.setAttr(f"{top_locator}.translateY", height)
+    cmds.setAttr(f"{top_locator}Shape.overrideEnabled", 1)
+    cmds.setAttr(f"{top_locator}Shape.overrideColor", 21)
+    cmds.scale(10, 10, 10, top_locator, relative=True)
+    cmds.select(clear=True)
 
+    # Floor and top of the character mesh
+    if guide_seeds:
+        cmds.xform(base_locator, translation=guide_seeds["loc_base"])
+        cmds.xform(top_locator, translation=guide_seeds["loc_top"])
+    return tuple(registry.register_many(["loc_base", "loc_top"], [base_locator, top_locator]))
+
+def start(mesh=None):
+    """Interactive build: create loc_base/loc_top and open the first window.
+
+    With a mesh, or a mesh selected, every guide is first placed from it and
+    the windows are a touch-up pass.
+    """
+    global character_mesh
+    character_mesh = None
+    guide_seeds.clear()
+    mesh = mesh or auto_guides.selected_mesh()
+    if mesh:
+        seed_guides(mesh)
+    create_base_locators()
+    show_window_leg()
+
+
+# Script Beginning, only when run from the Script Editor (see batch_build for mayapy)
+if __name__ == "__main__":
+    start()
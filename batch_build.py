@@ -0,0 +1,226 @@
+"""Headless biped build from a saved guide file.
+
+Runs every stage of the interactive build, from run_leg to
+Control_Creation, without any window and saves the result:
+
+    mayapy batch_build.py character_guides.json -o character_rig.ma
+
+A guide file is written from a scene with placed guides by
+save_guide_file(path).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import maya.cmds as cmds
+
+import auto_guides
+import autorig2
+import build_context
+import guide_template
+import mirror
+
+GUIDE_FILE_VERSION = 2
+READ_VERSIONS = (1, 2)  # Version 1 stored a {locator: [x, y, z]} dict
+
+
+###########
+## Guide file
+###########
+def guide_locators():
+    """Every guide locator name of the biped, loc_base and loc_top included."""
+    names = ["loc_base", "loc_top"]
+    names.extend(f"loc_{guide[0]}" for guide in guide_template.expand_guides())
+    return names
+
+def read_guide_positions(names=None):
+    """World position of every existing guide locator, read in one pass."""
+    names = names or guide_locators()
+    existing = set(cmds.ls(names) or [])
+    names = [name for name in names if name in existing]
+    if not names:
+        return {}
+    positions = mirror.read_world_matrices(names)[:, 3, :3].tolist()
+    return dict(zip(names, positions))
+
+def write_guide_file(path, positions, preset=None):
+    """Write guide positions with the content hash of every limb.
+
+    The file stores the names once and a flat list of rounded coordinates.
+    """
+    names = list(positions)
+    flat = [round(float(v), guide_template.HASH_DECIMALS) for name in names for v in positions[name]]
+    data = {
+        "version": GUIDE_FILE_VERSION,
+        "preset": preset or autorig2.GUIDE_PRESET,
+        "names": names,
+        "positions": flat,
+        "hashes": guide_template.limb_hashes(positions),
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file, separators=(",", ":"))
+    return path
+
+def save_guide_file(path, preset=None):
+    """Save the world position of every existing guide locator to a guide file."""
+    positions = read_guide_positions()
+    write_guide_file(path, positions, preset)
+    print(f"Saved {len(positions)} guides to {path}")
+    return path
+
+def read_guide_file(path):
+    """Return the guide file content as a dict, positions as {locator: [x, y, z]}."""
+    with open(path, 'r') as file:
+        data = json.load(file)
+    if data.get("version") not in READ_VERSIONS:
+        raise ValueError(f"Unsupported guide file version in {path}: {data.get('version')}")
+    if data["version"] >= 2:
+        flat = data["positions"]
+        data["positions"] = {name: flat[3 * i:3 * i + 3] for i, name in enumerate(data["names"])}
+    data.setdefault("hashes", guide_template.limb_hashes(data["positions"]))
+    return data
+
+def apply_guides(positions):
+    """Move the existing guide locators to their saved world positions."""
+    existing = set(cmds.ls(list(positions)) or [])
+    moved = 0
+    for name, position in positions.items():
+        if name in existing:
+            cmds.xform(name, translation=position, worldSpace=True)
+            moved += 1
+    return moved
+
+
+###########
+## Build
+###########
+def build_stages(positions, mesh=None):
+    """Return the ordered (stage name, callable) list of a headless build,
+    ending with the skinning of mesh when one is given."""
+    def base():
+        autorig2.create_base_locators()
+        apply_guides(positions)
+
+    def leg():
+        autorig2.create_leg_locators()
+        apply_guides(positions)
+
+    def symleg():
+        autorig2.symmetrize_leg()
+        autorig2.create_spine_to_head_locators(autorig2.get_distance_between_locators("loc_base", "loc_top"))
+        apply_guides(positions)
+
+    def arm():
+        autorig2.create_arm_locator(autorig2.get_distance_between_locators("loc_base", "loc_top"))
+        apply_guides(positions)
+
+    def symarm():
+        autorig2.symmetrize_arm()
+        apply_guides(positions)
+
+    stages = [
+        ("create_base_locators", base),
+        ("run_leg", leg),
+        ("run_symleg", symleg),
+        ("run_arm", arm),
+        ("run_symArm", symarm),
+        ("CreaJoint", lambda: autorig2.CreaJoint(interactive=False)),
+        ("Control_Creation", autorig2.Control_Creation),
+    ]
+    if mesh:
+        stages.append(("Skin_Binding", lambda: autorig2.Skin_Binding(mesh)))
+    return stages
+
+def build_from_guide_file(guide_path, output_path=None, new_scene=True, undo=False):
+    """Build a biped from a guide file without UI and return the stage timings.
+
+    Every stage runs in a build transaction, with the undo queue disabled
+    unless undo is set. Returns a list of (stage name, seconds). The scene is
+    saved to output_path when one is given (.ma or .mb).
+    """
+    data = read_guide_file(guide_path)
+    if new_scene:
+        cmds.file(new=True, force=True)
+    autorig2.GUIDE_PRESET = data.get("preset", autorig2.GUIDE_PRESET)
+    return build_from_positions(data["positions"], output_path, undo)
+
+def build_from_mesh(mesh=None, output_path=None, undo=False):
+    """Build a biped in the current scene from guides placed on a mesh (the
+    selected one by default) and skin it, see build_from_guide_file."""
+    mesh = mesh or auto_guides.selected_mesh()
+    positions = auto_guides.guide_positions(mesh, preset=autorig2.GUIDE_PRESET)
+    if not positions:
+        return []
+    return build_from_positions(positions, output_path, undo, mesh=mesh)
+
+def build_from_positions(positions, output_path=None, undo=False, mesh=None):
+    """Run every build stage on {locator: position} guides, returns the stage timings.
+
+    mesh, when given, is skinned on the joints by a last stage.
+    """
+    timings = []
+    for stage_name, stage in build_stages(positions, mesh):
+        start = time.perf_counter()
+        with build_context.build_transaction(stage_name, undo=undo):
+            stage()
+        timings.append((stage_name, time.perf_counter() - start))
+        print(f"[batch_build] {stage_name:<22} {timings[-1][1]:8.3f}s")
+    print(f"[batch_build] {'total':<22} {sum(t for _, t in timings):8.3f}s")
+
+    if output_path:
+        save_scene(output_path)
+    return timings
+
+def compare_transactions(guide_path, undo=True):
+    """Build the guide file with and without build transactions and print the savings."""
+    totals = {}
+    for enabled in (False, True):
+        build_context.ENABLED = enabled
+        try:
+            totals[enabled] = sum(t for _, t in build_from_guide_file(guide_path, undo=undo))
+        finally:
+            build_context.ENABLED = True
+    saved = totals[False] - totals[True]
+    ratio = saved / totals[False] if totals[False] else 0.0
+    print(f"[batch_build] without transactions {totals[False]:.3f}s, with {totals[True]:.3f}s, "
+          f"saved {saved:.3f}s ({ratio:.0%})")
+    return totals
+
+def save_scene(output_path):
+    """Save the current scene, the type comes from the file extension."""
+    file_type = "mayaBinary" if output_path.lower().endswith(".mb") else "mayaAscii"
+    cmds.file(rename=output_path)
+    cmds.file(save=True, type=file_type, force=True)
+    print(f"[batch_build] saved {output_path}")
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a biped rig from a guide file without UI.")
+    parser.add_argument("guide_file")
+    parser.add_argument("-o", "--output", help="scene to write (.ma or .mb)")
+    parser.add_argument("--timings", help="write the stage timings to this JSON file")
+    parser.add_argument("--compare-transactions", action="store_true",
+                        help="only measure the time saved by the build transactions")
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    try:
+        if args.compare_transactions:
+            compare_transactions(args.guide_file)
+            return 0
+        output = args.output or os.path.splitext(args.guide_file)[0] + "_rig.ma"
+        timings = build_from_guide_file(args.guide_file, output)
+        if args.timings:
+            with open(args.timings, 'w') as file:
+                json.dump(dict(timings), file, indent=1)
+    finally:
+        maya.standalone.uninitialize()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Benchmark of the guide auto-placement on fake_cmds meshes.
+
+Samples a T-pose character of 180 units (legs, feet, torso, neck, head,
+arms and flat hands) with 10k, 100k and 1M vertices, places the guides
+from it and prints the time, the peak Python memory and the landmarks
+found against the ones the body was made with. The smallest body is then
+moved --offset units along x and rigged: its right side joints must be the
+ones of the centred body moved by the same offset, mirrored across the
+mesh centre rather than x = 0:
+
+    python benchmarks/bench_auto_guides.py
+    python benchmarks/bench_auto_guides.py --vertices 2000000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import farm  # noqa: E402
+
+farm.install_backend("fake_cmds")
+
+import auto_guides  # noqa: E402
+import batch_build  # noqa: E402
+import fake_cmds  # noqa: E402
+import guide_template  # noqa: E402
+from bench_biped import write_shape_library  # noqa: E402
+from node_registry import registry  # noqa: E402
+
+VERTICES = (10000, 100000, 1000000)
+OFFSET = 25.0  # Units the off-centre body is moved along x
+# Landmarks of the sampled body: name -> (value, key in measure(), index)
+EXPECTED = {
+    "crotch_y": (85.0, "crotch_y", None),
+    "shoulder_x": (16.0, "shoulder", 0),
+    "shoulder_y": (143.0, "shoulder", 1),
+    "wrist_x": (65.0, "wrist", 0),
+    "tip_x": (84.0, "tip_x", None),
+    "ankle_y": (8.0, "ankle_y", None),
+    "knee_x": (10.0, "knee_x", None),
+}
+
+
+def cylinder(rng, count, axis, start, end, center, radius, end_radius=None):
+    """Points on a tapered cylinder along axis (0 for x, 1 for y)."""
+    t = rng.random(count)
+    angle = rng.random(count) * 2 * np.pi
+    r = radius if end_radius is None else radius + (end_radius - radius) * t
+    points = np.empty((count, 3))
+    points[:, axis] = start + (end - start) * t
+    others = [i for i in range(3) if i != axis]
+    points[:, others[0]] = center[0] + r * np.cos(angle)
+    points[:, others[1]] = center[1] + r * np.sin(angle)
+    return points
+
+
+def box(rng, count, low, high):
+    """Points on the faces of a box."""
+    points = rng.uniform(low, high, (count, 3))
+    axis = rng.integers(0, 3, count)
+    side = rng.integers(0, 2, count)
+    points[np.arange(count), axis] = np.where(side, np.asarray(high)[axis], np.asarray(low)[axis])
+    return points
+
+
+def sample_body(count, seed=0):
+    """(count, 3) vertices of a 180 units T-pose character facing +Z."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for side in (1, -1):
+        parts += [
+            (0.12, lambda n, s=side: cylinder(rng, n, 1, 8, 88, (10 * s, 0), 7)),
+            (0.04, lambda n, s=side: box(rng, n, (10 * s - 4.5, 0, -6), (10 * s + 4.5, 8, 20))),
+            (0.08, lambda n, s=side: cylinder(rng, n, 0, 14 * s, 65 * s, (143, 0), 5, 3.5)),
+            (0.04, lambda n, s=side: box(rng, n, (min(65 * s, 84 * s), 141, -4), (max(65 * s, 84 * s), 145, 6))),
+        ]
+    parts += [
+        (0.28, lambda n: cylinder(rng, n, 1, 85, 150, (0, 0), 1) * (16, 1, 11)),
+        (0.04, lambda n: cylinder(rng, n, 1, 150, 160, (0, 0), 6)),
+        (0.08, lambda n: rng.normal(size=(n, 3))),
+    ]
+    weights = np.array([w for w, _ in parts])
+    counts = np.floor(weights / weights.sum() * count).astype(int)
+    counts[0] += count - counts.sum()
+    points = [make(n) for (_, make), n in zip(parts, counts)]
+    # The head, a sphere of radius 11 on the neck
+    head = points[-1]
+    head /= np.linalg.norm(head, axis=1)[:, None]
+    points[-1] = head * 11 + (0, 169, 0)
+    return np.concatenate(points)
+
+
+def run(count):
+    fake_cmds.reset()
+    mesh = fake_cmds.create_mesh(sample_body(count), name="body_geo")
+    tracemalloc.start()
+    start = time.perf_counter()
+    grid = auto_guides.SilhouetteGrid.from_mesh(mesh)
+    landmarks = auto_guides.measure(grid)
+    positions = auto_guides.fit_guides(landmarks)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    errors = {}
+    for name, (value, key, index) in EXPECTED.items():
+        found = landmarks[key] if index is None else landmarks[key][index]
+        errors[name] = None if found is None else round(float(found) - value, 2)
+    print(f"{count:>9} vertices  {seconds:7.3f}s  {peak:7.1f} MB peak  {len(positions)} guides")
+    print(f"          landmark errors: {errors}")
+    return seconds, errors
+
+
+def right_joints(count, offset):
+    """World positions of the right side bind joints of the body moved by offset."""
+    fake_cmds.reset()
+    mesh = fake_cmds.create_mesh(sample_body(count) + (offset, 0.0, 0.0), name="body_geo")
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch_build.build_from_positions(auto_guides.guide_positions(mesh))
+    joints = [joint for joint, _, _, _ in guide_template.joint_hierarchy(chains=False) if "_right_" in joint]
+    nodes = registry.names(joints)
+    return np.array([fake_cmds.xform(node, query=True, worldSpace=True, translation=True) for node in nodes])
+
+
+def run_offset(count, offset):
+    """Largest distance between the right joints of the moved body and the
+    centred ones moved by offset."""
+    error = np.abs(right_joints(count, offset) - right_joints(count, 0.0) - (offset, 0.0, 0.0)).max()
+    print(f"{count:>9} vertices  moved {offset:g} along x, right side joints off by {error:.4f}")
+    return error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the guide auto-placement on the fake scene graph.")
+    parser.add_argument("--vertices", type=int, nargs="+", default=list(VERTICES))
+    parser.add_argument("--offset", type=float, default=OFFSET, help="x offset of the off-centre body")
+    args = parser.parse_args(argv)
+    for count in args.vertices:
+        run(count)
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["AUTORIG_SCRIPT_DIR"] = folder
+        write_shape_library(folder)
+        run_offset(min(args.vertices), args.offset)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Benchmark of the full guide -> joints -> controls build on fake_cmds.
+
+Builds 1, 10 and 100 characters with slightly different proportions and
+records wall time, maya.cmds call counts and peak Python memory, then
+compares them with benchmarks/baselines.json:
+
+    python benchmarks/bench_biped.py             # run and compare
+    python benchmarks/bench_biped.py --update    # store new baselines
+    python benchmarks/bench_biped.py --sizes 1 10
+
+Call counts are deterministic and must match the baseline exactly, time
+and memory may grow by --tolerance before being reported as regressions.
+The default layout is also built once to check that joint_Hips aims up the
+spine (CHECK lines).
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import farm  # noqa: E402
+
+farm.install_backend("fake_cmds")
+
+import batch_build  # noqa: E402
+import cmds_profiler  # noqa: E402
+import fake_cmds  # noqa: E402
+import guide_template  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SIZES = (1, 10, 100)
+TIMED_CHARACTERS = 5  # Minimum characters built per size for the timing
+MEMORY_CHARACTERS = 3  # Builds traced for the peak memory, tracemalloc is slow
+ORIENT_TOLERANCE = 1e-3  # Degrees of jointOrient allowed on joint_Hips, which aims up the spine
+
+
+def write_shape_library(script_dir):
+    """Root control shape used by Control_Creation, two circles."""
+    folder = os.path.join(script_dir, "ControlShape", "zoo_shapes")
+    os.makedirs(folder, exist_ok=True)
+    circle = [[math.cos(i / 8 * math.tau), 0.0, math.sin(i / 8 * math.tau)] for i in range(9)]
+    shapes = {
+        "godnode_regShape": {"cvs": circle, "knots": list(range(9)), "degree": 1},
+        "godnode_regShape1": {"cvs": [[v * 0.5 for v in cv] for cv in circle], "knots": list(range(9)), "degree": 1},
+    }
+    with open(os.path.join(folder, "godnode_reg.shape"), 'w') as file:
+        json.dump(shapes, file)
+
+
+def write_guide_files(folder, count, seed=0):
+    """One guide file per character, heights and proportions jittered."""
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        height = rng.uniform(150.0, 200.0)
+        names, positions, _ = guide_template.compute_layout(height)
+        guides = {"loc_base": [0.0, 0.0, 0.0], "loc_top": [0.0, height, 0.0]}
+        for name, position in zip(names, positions.tolist()):
+            guides[f"loc_{name}"] = [v + rng.uniform(-0.5, 0.5) for v in position]
+        path = os.path.join(folder, f"character_{index:03d}.json")
+        paths.append(batch_build.write_guide_file(path, guides, preset="default"))
+    return paths
+
+
+def write_default_guides(folder, height=180.0):
+    """Guide file of the default layout, without jitter."""
+    names, positions, _ = guide_template.compute_layout(height)
+    guides = {"loc_base": [0.0, 0.0, 0.0], "loc_top": [0.0, height, 0.0]}
+    guides.update({f"loc_{name}": position for name, position in zip(names, positions.tolist())})
+    return batch_build.write_guide_file(os.path.join(folder, "default.json"), guides, preset="default")
+
+
+def check_rig(folder):
+    """Return the problems of the default layout build: the Hips aim at
+    Spine_1, their jointOrient stays at 0."""
+    fake_cmds.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch_build.build_from_guide_file(write_default_guides(folder), new_scene=False)
+    orient = fake_cmds.getAttr("joint_Hips.jointOrient")[0]
+    if max(abs(value) for value in orient) > ORIENT_TOLERANCE:
+        return [f"joint_Hips jointOrient {tuple(round(value, 3) for value in orient)}, expected 0"]
+    return []
+
+
+def build_all(guide_files):
+    for path in guide_files:
+        fake_cmds.reset()
+        batch_build.build_from_guide_file(path, new_scene=False)
+
+
+def run_size(guide_files):
+    """Wall time, command counts and peak memory of building every guide file."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_all(guide_files[:1])  # Warm-up, fills the one time caches (script dir, shape index)
+        profiler = cmds_profiler.start()
+        try:
+            build_all(guide_files[:1])
+        finally:
+            cmds_profiler.stop()
+        counts = profiler.report()
+
+        # Small sizes are repeated and the best run kept, one build is too noisy
+        wall = float("inf")
+        for _ in range(max(1, TIMED_CHARACTERS // len(guide_files))):
+            start = time.perf_counter()
+            build_all(guide_files)
+            wall = min(wall, time.perf_counter() - start)
+
+        tracemalloc.start()
+        build_all(guide_files[:MEMORY_CHARACTERS])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "characters": len(guide_files),
+        "wall_seconds": wall,
+        "seconds_per_character": wall / len(guide_files),
+        "calls_per_character": counts["total_calls"],
+        "calls_per_stage": {name: data["calls"] for name, data in counts["stages"].items()},
+        "calls_per_command": {name: data["calls"] for name, data in counts["commands"].items()},
+        "peak_memory_mb": peak / 2**20,
+    }
+
+
+def compare(results, baselines, tolerance):
+    """Return the regression messages against the stored baselines."""
+    problems = []
+    for size, result in results.items():
+        baseline = baselines.get(size)
+        if baseline is None:
+            continue
+        if result["calls_per_character"] != baseline["calls_per_character"]:
+            problems.append(f"{size}: {result['calls_per_character']} calls per character, "
+                            f"baseline {baseline['calls_per_character']}")
+        for key in ("seconds_per_character", "peak_memory_mb"):
+            if result[key] > baseline[key] * (1.0 + tolerance):
+                problems.append(f"{size}: {key} {result[key]:.4f}, baseline {baseline[key]:.4f}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the biped build on the fake scene graph.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--update", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed time/memory growth, 0.5 = +50%%")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["AUTORIG_SCRIPT_DIR"] = folder
+        write_shape_library(folder)
+        guide_files = write_guide_files(folder, max(args.sizes))
+        results = {}
+        for size in args.sizes:
+            results[str(size)] = run_size(guide_files[:size])
+            result = results[str(size)]
+            print(f"{size:>4} characters {result['wall_seconds']:9.3f}s "
+                  f"{result['seconds_per_character'] * 1000:9.2f} ms/char "
+                  f"{result['calls_per_character']:6} calls/char {result['peak_memory_mb']:7.2f} MB peak")
+        checks = check_rig(folder)
+    for problem in checks:
+        print(f"CHECK {problem}")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r') as file:
+            baselines = json.load(file)
+    if args.update:
+        baselines.update(results)
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump(baselines, file, indent=1, sort_keys=True)
+        print(f"Baselines written to {BASELINE_PATH}")
+        return 1 if checks else 0
+
+    problems = compare(results, baselines, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems or checks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Benchmark of the FK/IK bake on fake_cmds.
+
+Builds one biped, animates the left arm and leg IK chains with smooth
+random curves over a shot, bakes the FK chains from them and prints the
+evaluation, solve and key times. The FK joints are then checked against
+the IK joints on sampled frames:
+
+    python benchmarks/bench_fkik_bake.py
+    python benchmarks/bench_fkik_bake.py --frames 1000 5000 20000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import farm  # noqa: E402
+
+farm.install_backend("fake_cmds")
+
+import maya.cmds as cmds  # noqa: E402
+
+import batch_build  # noqa: E402
+import fake_cmds  # noqa: E402
+import fkik_match  # noqa: E402
+from bench_biped import write_guide_files, write_shape_library  # noqa: E402
+from node_registry import registry  # noqa: E402
+
+FRAMES = (1000, 5000)
+LIMBS = ("joint_left_shoulder", "joint_left_thig")
+CHECKED_FRAMES = 20  # Frames compared between the chains after the bake
+
+
+def animate(nodes, frames, seed=0):
+    """Key every rotate channel of nodes with a sum of slow sines."""
+    rng = np.random.default_rng(seed)
+    for node in nodes:
+        for attribute in fkik_match.ROTATE_CHANNELS:
+            amplitude, period, phase = rng.uniform(10, 60), rng.uniform(50, 400), rng.uniform(0, 6)
+            values = amplitude * np.sin(frames / period + phase)
+            curve = cmds.createNode("animCurveTA")
+            cmds.setAttr(f"{curve}.ktv[0:{len(frames) - 1}]", *np.stack([frames, values], 1).reshape(-1).tolist())
+            cmds.connectAttr(f"{curve}.output", f"{node}.{attribute}")
+
+
+def run(guide_file, count):
+    fake_cmds.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch_build.build_from_guide_file(guide_file, new_scene=False)
+    frames = np.arange(1.0, count + 1.0)
+    for limb in LIMBS:
+        animate(registry.names(fkik_match.chain_joints(limb, "IK")[0]), frames)
+
+    errors = []
+    for limb in LIMBS:
+        timings = fkik_match.bake_limb(limb, source="IK", target="FK", start=1, end=count)
+        checked = np.linspace(1, count, CHECKED_FRAMES)
+        ik = fkik_match.evaluate_world_matrices(registry.names(fkik_match.chain_joints(limb, "IK")[0]), checked)
+        fk = fkik_match.evaluate_world_matrices(registry.names(fkik_match.chain_joints(limb, "FK")[0]), checked)
+        errors.append(np.abs(ik - fk).max())
+        print(f"{count:>7} frames  {limb:<20} {sum(timings.values()):7.3f}s")
+    print(f"        largest FK/IK world matrix difference: {max(errors):.2e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the FK/IK bake on the fake scene graph.")
+    parser.add_argument("--frames", type=int, nargs="+", default=list(FRAMES))
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["AUTORIG_SCRIPT_DIR"] = folder
+        write_shape_library(folder)
+        guide_file = write_guide_files(folder, 1)[0]
+        for count in args.frames:
+            run(guide_file, count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
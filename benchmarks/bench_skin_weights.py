@@ -0,0 +1,71 @@
+"""Benchmark of the automatic skin weights on fake_cmds meshes.
+
+Builds a biped from the sampled T-pose body of bench_auto_guides with 10k,
+100k and 1M vertices, skins it and prints the per-chunk timing reported by
+skin_weights, the total time and the working memory of the binding (peak
+Python memory above the weights kept by the fake skin cluster), which
+stays around MEMORY_BUDGET whatever the vertex count:
+
+    python benchmarks/bench_skin_weights.py
+    python benchmarks/bench_skin_weights.py --vertices 1000000 --budget 32
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import farm  # noqa: E402
+
+farm.install_backend("fake_cmds")
+
+import auto_guides  # noqa: E402
+import batch_build  # noqa: E402
+import fake_cmds  # noqa: E402
+import skin_weights  # noqa: E402
+from bench_auto_guides import sample_body  # noqa: E402
+from bench_biped import write_shape_library  # noqa: E402
+
+VERTICES = (10000, 100000, 1000000)
+
+
+def run(count, budget):
+    fake_cmds.reset()
+    mesh = fake_cmds.create_mesh(sample_body(count), name="body_geo")
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch_build.build_from_positions(auto_guides.guide_positions(mesh))
+    tracemalloc.start()
+    start = time.perf_counter()
+    _, timings = skin_weights.bind_skin(mesh, budget=budget)
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    working = (peak - current) / 2**20
+    tracemalloc.stop()
+    computed = sum(c for _, c, _ in timings)
+    print(f"{count:>9} vertices  {seconds:7.3f}s  (weights {computed:.3f}s)  {len(timings)} chunks  "
+          f"{working:7.1f} MB working")
+    return seconds, working
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the automatic skin weights on the fake scene graph.")
+    parser.add_argument("--vertices", type=int, nargs="+", default=list(VERTICES))
+    parser.add_argument("--budget", type=float, default=skin_weights.MEMORY_BUDGET / 2**20,
+                        help="memory budget of the weight chunks, in MB")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["AUTORIG_SCRIPT_DIR"] = folder
+        write_shape_library(folder)
+        for count in args.vertices:
+            run(count, int(args.budget * 2**20))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Benchmark of the build transactions (build_context) on fake_cmds.
+
+Builds one character with and without the build transactions, with the
+undo queue on (undo chunk per stage) and off (farm builds), through
+batch_build.compare_transactions, and keeps the best of --repeats runs.
+The stand-in scene graph has no viewport and a cheap undo queue, so the
+numbers are the cost of the transactions themselves; the saving of the
+suspended refresh is measured in Maya with
+"mayapy batch_build.py guides.json --compare-transactions".
+
+    python benchmarks/bench_transactions.py
+    python benchmarks/bench_transactions.py --update    # store in baselines.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import farm  # noqa: E402
+
+farm.install_backend("fake_cmds")
+
+import batch_build  # noqa: E402
+from bench_biped import BASELINE_PATH, write_guide_files, write_shape_library  # noqa: E402
+
+REPEATS = 5
+
+
+def measure(guide_file, undo, repeats=REPEATS):
+    """Best build seconds without and with transactions, and the saving."""
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            totals = batch_build.compare_transactions(guide_file, undo=undo)
+        for enabled, seconds in totals.items():
+            best[enabled] = min(best[enabled], seconds)
+    saved = best[False] - best[True]
+    return {
+        "without_seconds": best[False],
+        "with_seconds": best[True],
+        "saved_seconds": saved,
+        "saved_ratio": saved / best[False] if best[False] else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the build transactions on the fake scene graph.")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--update", action="store_true", help="store the results in baselines.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["AUTORIG_SCRIPT_DIR"] = folder
+        write_shape_library(folder)
+        guide_file = write_guide_files(folder, 1)[0]
+        for name, undo in (("undo", True), ("no_undo", False)):
+            result = results[name] = measure(guide_file, undo, args.repeats)
+            print(f"{name:<8} without {result['without_seconds'] * 1000:8.2f} ms  "
+                  f"with {result['with_seconds'] * 1000:8.2f} ms  saved {result['saved_ratio']:6.1%}")
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r') as file:
+            baselines = json.load(file)
+    if args.update:
+        baselines["transactions"] = results
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump(baselines, file, indent=1, sort_keys=True)
+        print(f"Baselines written to {BASELINE_PATH}")
+    elif "transactions" in baselines:
+        for name, result in baselines["transactions"].items():
+            print(f"baseline {name:<8} saved {result['saved_ratio']:6.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
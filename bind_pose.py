@@ -0,0 +1,147 @@
+"""Snapshots of the skeleton pose, restored and compared in bulk.
+
+    import bind_pose
+    pose = bind_pose.PoseSnapshot.capture()  # bind joints and _IK/_FK chains
+    ...
+    pose.diff(bind_pose.PoseSnapshot.capture())  # what moved since
+    pose.restore()
+
+A snapshot is one (J, 12) array of the local channels of every joint
+(translate, rotate, scale, jointOrient, in cmds units) and one (J, 4, 4)
+array of their local matrices. Reading goes through a single selection
+list with the Maya API, writing through one attribute batch (see
+attr_batch), and comparing two snapshots is a few array operations.
+"""
+import maya.cmds as cmds
+import numpy as np
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:  # Standalone backends without the API
+    om = None
+
+import attr_batch
+import guide_template
+from node_registry import registry
+
+CHANNELS = ("translate", "rotate", "scale", "jointOrient")  # 3 columns each in the snapshot
+TRANSLATE_TOLERANCE = 1e-4  # Drift reported above this distance
+ROTATE_TOLERANCE = 1e-3  # Drift reported above this angle, in degrees
+
+
+def skeleton_joints():
+    """Roles of every joint CreaJoint builds, bind joints and chains, parents first."""
+    return [joint for joint, _, _, _ in guide_template.joint_hierarchy()]
+
+
+###########
+## Scene IO
+###########
+def _api_channels(plug):
+    """Values of a compound plug in cmds units."""
+    values = []
+    for i in range(plug.numChildren()):
+        child = plug.child(i)
+        unit = om.MFnUnitAttribute(child.attribute()).unitType() \
+            if child.attribute().hasFn(om.MFn.kUnitAttribute) else None
+        if unit == om.MFnUnitAttribute.kAngle:
+            values.append(child.asMAngle().asUnits(om.MAngle.kDegrees))
+        elif unit == om.MFnUnitAttribute.kDistance:
+            values.append(child.asMDistance().asUnits(om.MDistance.uiUnit()))
+        else:
+            values.append(child.asDouble())
+    return values
+
+
+def read_pose(nodes):
+    """(channels (N, 12), local matrices (N, 4, 4)) of nodes.
+
+    Uses a single selection list through the API when available, falls back
+    to one xform query of all the nodes per channel and a jointOrient getAttr
+    per node.
+    """
+    if om is not None:
+        selection = om.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+        channels, matrices = [], []
+        for i in range(len(nodes)):
+            fn = om.MFnDependencyNode(selection.getDependNode(i))
+            channels.append([value for name in CHANNELS for value in _api_channels(fn.findPlug(name, False))])
+            matrices.append(list(om.MFnTransform(selection.getDagPath(i)).transformation().asMatrix()))
+    else:
+        columns = [cmds.xform(nodes, query=True, translation=True, objectSpace=True),
+                   cmds.xform(nodes, query=True, rotation=True, objectSpace=True),
+                   cmds.xform(nodes, query=True, scale=True, relative=True),
+                   [value for node in nodes for value in cmds.getAttr(f"{node}.jointOrient")[0]]]
+        channels = np.concatenate([np.reshape(column, (-1, 3)) for column in columns], axis=1)
+        matrices = cmds.xform(nodes, query=True, matrix=True, objectSpace=True)
+    return np.asarray(channels, dtype=np.float64).reshape(-1, 12), \
+        np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+
+
+def write_pose(nodes, channels):
+    """Set the channels of every node through one attribute batch."""
+    with attr_batch.attribute_batch() as batch:
+        for node, values in zip(nodes, np.asarray(channels).reshape(-1, 12).tolist()):
+            for i, name in enumerate(CHANNELS):
+                batch.set(f"{node}.{name}", values[3 * i:3 * i + 3])
+
+
+###########
+## Snapshots
+###########
+def rotation_angles(a, b):
+    """Angle in degrees between the rotations of (N, 4, 4) matrices a and b."""
+    a = a[:, :3, :3] / np.linalg.norm(a[:, :3, :3], axis=2, keepdims=True)
+    b = b[:, :3, :3] / np.linalg.norm(b[:, :3, :3], axis=2, keepdims=True)
+    cosines = (np.einsum("nij,nij->n", a, b) - 1.0) / 2.0
+    return np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+
+
+class PoseSnapshot:
+    """Local channels and matrices of a set of joints, by role."""
+
+    def __init__(self, joints, channels, matrices):
+        self.joints = list(joints)
+        self.channels = channels
+        self.matrices = matrices
+
+    def __len__(self):
+        return len(self.joints)
+
+    @classmethod
+    def capture(cls, joints=None):
+        """Snapshot of the joints (every skeleton joint by default) that exist."""
+        nodes = registry.mapping(skeleton_joints() if joints is None else joints)
+        channels, matrices = read_pose(list(nodes.values()))
+        return cls(nodes, channels, matrices)
+
+    def restore(self):
+        """Put the joints back in the snapshot pose, returns the joints written."""
+        nodes = registry.mapping(self.joints)
+        rows = [i for i, joint in enumerate(self.joints) if joint in nodes]
+        write_pose([nodes[self.joints[i]] for i in rows], self.channels[rows])
+        print(f"Pose restored on {len(rows)} joints")
+        return [self.joints[i] for i in rows]
+
+    def diff(self, other, translate_tolerance=TRANSLATE_TOLERANCE, rotate_tolerance=ROTATE_TOLERANCE):
+        """Drift of other from this snapshot on the joints of both.
+
+        Returns [(joint, distance, degrees, jointOrient degrees)] of the joints
+        that moved more than the tolerances, largest distance first.
+        """
+        index = {joint: i for i, joint in enumerate(other.joints)}
+        mine = [i for i, joint in enumerate(self.joints) if joint in index]
+        joints = [self.joints[i] for i in mine]
+        theirs = [index[joint] for joint in joints]
+        a, b = self.channels[mine], other.channels[theirs]
+        distances = np.linalg.norm(b[:, 0:3] - a[:, 0:3], axis=1)
+        degrees = rotation_angles(self.matrices[mine], other.matrices[theirs])
+        orients = np.abs(b[:, 9:12] - a[:, 9:12]).max(axis=1)
+        moved = (distances > translate_tolerance) | (degrees > rotate_tolerance) | (orients > rotate_tolerance)
+        drift = sorted(((joints[i], float(distances[i]), float(degrees[i]), float(orients[i]))
+                        for i in np.flatnonzero(moved)), key=lambda entry: -entry[1])
+        print(f"{len(drift)} of {len(joints)} joints drifted"
+              + (f", at most {distances.max():.4f} units and {degrees.max():.3f} degrees" if drift else ""))
+        return drift
@@ -0,0 +1,83 @@
+import functools
+import time
+from contextlib import contextmanager
+
+import maya.cmds as cmds
+
+ENABLED = True  # Set to False to run the stages without transactions
+_active = []  # Names of the transactions currently open, outermost first
+timings = {}  # Last wall-clock time of each transaction, in seconds
+
+
+def _node_ids():
+    return set(cmds.ls(uuid=True) or [])
+
+
+@contextmanager
+def build_transaction(name="autorig", undo=True, suspend_refresh=True, rollback=True):
+    """Run a build stage as one transaction.
+
+    The viewport refresh is suspended, every command goes into a single undo
+    chunk and an exception undoes the whole stage before being re-raised.
+    With undo=False (farm builds) the undo queue is turned off for the stage
+    and a failure deletes the nodes created since the start instead, as it
+    does when the undo queue is already off (batch and standalone sessions).
+
+    Nested transactions join the outermost one.
+    """
+    if _active or not ENABLED:
+        yield
+        return
+
+    interactive = not cmds.about(batch=True)
+    undo_state = cmds.undoInfo(query=True, state=True)
+    # Without the undo queue there is nothing to undo, the new nodes are deleted
+    undoable = undo and undo_state
+    created_before = _node_ids() if rollback and not undoable else None
+
+    _active.append(name)
+    if suspend_refresh and interactive:
+        cmds.refresh(suspend=True)
+    if undoable:
+        cmds.undoInfo(openChunk=True, chunkName=name)
+    elif undo_state:
+        cmds.undoInfo(stateWithoutFlush=False)
+
+    start = time.perf_counter()
+    chunk_open = undoable
+    try:
+        yield
+    except Exception:
+        if rollback:
+            if undoable:
+                cmds.undoInfo(closeChunk=True)
+                chunk_open = False
+                cmds.undo()
+            else:
+                new_nodes = cmds.ls(list(_node_ids() - created_before)) or []
+                if new_nodes:
+                    cmds.delete(new_nodes)
+            print(f"[build] {name} failed, scene rolled back")
+        raise
+    finally:
+        timings[name] = time.perf_counter() - start
+        if chunk_open:
+            cmds.undoInfo(closeChunk=True)
+        if not undo and undo_state:
+            cmds.undoInfo(stateWithoutFlush=True)
+        if suspend_refresh and interactive:
+            cmds.refresh(suspend=False)
+            cmds.refresh()
+        _active.pop()
+    print(f"[build] {name} {timings[name]:.3f}s")
+
+
+def build_stage(name=None, **options):
+    """Decorator running a function inside build_transaction."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with build_transaction(name or function.__name__, **options):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,219 @@
+"""maya.cmds call counter and timer, per command and per pipeline stage.
+
+    import cmds_profiler
+    cmds_profiler.start()
+    ...  # run the build, interactively or through batch_build
+    cmds_profiler.stop()
+    cmds_profiler.print_report()
+    cmds_profiler.write_json("profile.json")
+
+start() swaps maya.cmds for a counting proxy in every loaded module that
+uses it (and for later imports), and wraps the autorig2 stage functions so
+each command is attributed to the innermost running stage. Nothing is
+patched until start(), so a disabled profiler costs nothing.
+"""
+import datetime
+import functools
+import json
+import runpy
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+TOP_STAGE = "<top>"
+
+# autorig2 functions reported as pipeline stages
+STAGE_FUNCTIONS = (
+    "run_leg", "run_symleg", "run_arm", "run_symArm",
+    "create_leg_locators", "symmetrize_leg", "create_spine_to_head_locators",
+    "create_arm_locator", "symmetrize_arm", "CreaJoint", "orient_joint_groups",
+    "Control_Creation",
+)
+
+
+class CommandProfiler:
+    """Proxy of the cmds module that counts and times every command."""
+
+    def __init__(self, cmds_module):
+        self._cmds = cmds_module
+        self._wrapped = {}
+        self.stages = [TOP_STAGE]
+        self.counts = defaultdict(lambda: defaultdict(int))  # stage -> command -> calls
+        self.times = defaultdict(lambda: defaultdict(float))  # stage -> command -> seconds
+        self.stage_times = defaultdict(float)
+
+    def __getattr__(self, name):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        command = getattr(self._cmds, name)
+        if not callable(command):
+            return command
+
+        @functools.wraps(command)
+        def wrapped(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                stage = self.stages[-1]
+                self.counts[stage][name] += 1
+                self.times[stage][name] += time.perf_counter() - start
+
+        self._wrapped[name] = wrapped
+        return wrapped
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute the commands run inside the block to a stage."""
+        self.stages.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[name] += time.perf_counter() - start
+            self.stages.pop()
+
+    def reset(self):
+        self.counts.clear()
+        self.times.clear()
+        self.stage_times.clear()
+
+    def report(self):
+        """Return the counters as a JSON friendly dict."""
+        commands = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        stages = {}
+        for stage, counts in self.counts.items():
+            stage_commands = {}
+            for name, calls in counts.items():
+                seconds = self.times[stage][name]
+                stage_commands[name] = {"calls": calls, "seconds": seconds}
+                commands[name]["calls"] += calls
+                commands[name]["seconds"] += seconds
+            stages[stage] = {
+                "calls": sum(counts.values()),
+                "seconds": self.stage_times.get(stage, 0.0),
+                "commands": stage_commands,
+            }
+        return {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "total_calls": sum(c["calls"] for c in commands.values()),
+            "total_seconds": sum(c["seconds"] for c in commands.values()),
+            "commands": dict(commands),
+            "stages": stages,
+        }
+
+
+###########
+## Install / uninstall
+###########
+_profiler = None
+_last = None  # Last stopped profiler, kept for the reports
+_patched = []  # (module, attribute, original value)
+
+
+def _patch(module, attribute, value):
+    _patched.append((module, attribute, getattr(module, attribute)))
+    setattr(module, attribute, value)
+
+
+def _stage_wrapper(profiler, name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with profiler.stage(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def start(stage_functions=STAGE_FUNCTIONS):
+    """Start counting every maya.cmds call, returns the profiler."""
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+    import maya.cmds as real_cmds
+    _profiler = CommandProfiler(real_cmds)
+
+    # Modules already holding maya.cmds, and the import system for later ones
+    for module in list(sys.modules.values()):
+        if module is not None and getattr(module, "cmds", None) is real_cmds:
+            _patch(module, "cmds", _profiler)
+    _patch(sys.modules["maya"], "cmds", _profiler)
+    sys.modules["maya.cmds"] = _profiler
+
+    autorig2 = sys.modules.get("autorig2")
+    if autorig2 is not None:
+        for name in stage_functions:
+            if hasattr(autorig2, name):
+                _patch(autorig2, name, _stage_wrapper(_profiler, name, getattr(autorig2, name)))
+    return _profiler
+
+
+def stop():
+    """Restore the real maya.cmds everywhere, the counters are kept."""
+    global _profiler, _last
+    if _profiler is None:
+        return None
+    while _patched:
+        module, attribute, value = _patched.pop()
+        setattr(module, attribute, value)
+    sys.modules["maya.cmds"] = _profiler._cmds
+    _last, _profiler = _profiler, None
+    return _last
+
+
+def active():
+    """The running profiler, or the last stopped one."""
+    return _profiler or _last
+
+
+def profile_script(path):
+    """Run a script file (controlleur.py for example) with counting enabled."""
+    profiler = start()
+    try:
+        with profiler.stage(path):
+            runpy.run_path(path, run_name="__main__")
+    finally:
+        stop()
+    return profiler
+
+
+###########
+## Reports
+###########
+def print_report(report=None, limit=20):
+    """Print the busiest commands and the per stage totals as tables."""
+    report = report or active().report()
+    print(f"{'command':<24} {'calls':>8} {'seconds':>10}")
+    ranked = sorted(report["commands"].items(), key=lambda item: item[1]["calls"], reverse=True)
+    for name, data in ranked[:limit]:
+        print(f"{name:<24} {data['calls']:>8} {data['seconds']:>10.4f}")
+    print()
+    print(f"{'stage':<32} {'calls':>8} {'seconds':>10}  top commands")
+    for name, data in report["stages"].items():
+        top = sorted(data["commands"].items(), key=lambda item: item[1]["calls"], reverse=True)[:3]
+        top = ", ".join(f"{command} x{info['calls']}" for command, info in top)
+        print(f"{name:<32} {data['calls']:>8} {data['seconds']:>10.4f}  {top}")
+    print(f"{'total':<32} {report['total_calls']:>8} {report['total_seconds']:>10.4f}")
+
+
+def write_json(path, report=None):
+    """Write the report as a JSON artifact."""
+    report = report or active().report()
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=1, sort_keys=True)
+    return path
+
+
+def compare(old_path, new_path):
+    """Print the call count change per command between two JSON reports."""
+    with open(old_path, 'r') as file:
+        old = json.load(file)["commands"]
+    with open(new_path, 'r') as file:
+        new = json.load(file)["commands"]
+    print(f"{'command':<24} {'old':>8} {'new':>8} {'delta':>8}")
+    for name in sorted(set(old) | set(new)):
+        before = old.get(name, {}).get("calls", 0)
+        after = new.get(name, {}).get("calls", 0)
+        if before != after:
+            print(f"{name:<24} {before:>8} {after:>8} {after - before:>+8}")
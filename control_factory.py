@@ -0,0 +1,191 @@
+"""Parametric controllers, curves generated already sized and shared by type.
+
+    factory = ControlFactory()
+    factory.create("left_thig_FK_Ctrl", "box", color=9, size=(20, 28, 23))
+    factory.create("left_leg_FK_Ctrl", "circle", color=9, driver="joint_left_leg")
+    factory.report()
+
+The CVs of a shape (box, circle, half_circle, arrow or a registered one) are
+computed with NumPy already scaled, rotated and offset, and memoized on
+those parameters, so every curve is created by one command with nothing to
+freeze. With a driver joint the size is fitted on its bone length and on
+the box of its child joints, and the control is placed on the joint.
+
+With instance=True (default) controls with the same shape and parameters
+share one curve shape through instancing, color goes on the control
+transform. With instance=False each control gets its own curve.
+"""
+import functools
+import math
+
+import maya.cmds as cmds
+import numpy as np
+
+import mirror
+from node_registry import registry
+
+BYTES_PER_VALUE = 8  # CVs and knots are doubles
+CIRCLE_POINTS = 24  # Segments of the circle shapes
+FIT_RATIO = 0.35  # Minimum control width, as a fraction of the driven bone length
+CACHE_SIZE = 256  # Memoized (shape, size, orient, offset) curves
+ROOT_RATIO = 0.325  # Root control scale, fraction of the skeleton height (54 on the 180 units template)
+ROOT_EXTENTS = ("joint_head", "joint_left_end", "joint_right_end", "joint_left_hand", "joint_right_hand")
+
+# Unit shapes, about 1 unit wide: name -> (degree, points). Circles lie in
+# the YZ plane, around the x axis the joints aim with.
+_CIRCLE = [(0.0, 0.5 * math.cos(a), 0.5 * math.sin(a))
+           for a in np.linspace(0.0, math.tau, CIRCLE_POINTS + 1).tolist()]
+SHAPES = {
+    "box": (1, (
+        (0.5, 0.5, 0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5),
+        (0.5, 0.5, 0.5), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5), (-0.5, 0.5, 0.5),
+        (-0.5, 0.5, -0.5), (-0.5, -0.5, -0.5), (-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5),
+        (0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5),
+        (-0.5, -0.5, 0.5),
+    )),
+    "circle": (1, tuple(_CIRCLE)),
+    "half_circle": (1, tuple(_CIRCLE[:CIRCLE_POINTS // 2 + 1])),
+    "arrow": (1, (
+        (-0.5, 0.0, -0.15), (0.1, 0.0, -0.15), (0.1, 0.0, -0.35), (0.5, 0.0, 0.0),
+        (0.1, 0.0, 0.35), (0.1, 0.0, 0.15), (-0.5, 0.0, 0.15), (-0.5, 0.0, -0.15),
+    )),
+}
+
+
+def register_shape(name, points, degree=1):
+    """Add a unit curve definition usable by every factory."""
+    SHAPES[name] = (degree, tuple(tuple(float(v) for v in point) for point in points))
+    shape_points.cache_clear()
+
+
+def shape_bytes(shape):
+    """Approximate size of the CV and knot data of one curve of a shape."""
+    degree, points = SHAPES[shape]
+    knots = len(points) + degree - 1
+    return (len(points) * 3 + knots) * BYTES_PER_VALUE
+
+
+###########
+## Generator
+###########
+def _rotation(orient):
+    """3x3 rotation (row vectors) of xyz euler angles in degrees."""
+    x, y, z = np.radians(orient)
+    rx = np.array([[1, 0, 0], [0, math.cos(x), math.sin(x)], [0, -math.sin(x), math.cos(x)]])
+    ry = np.array([[math.cos(y), 0, -math.sin(y)], [0, 1, 0], [math.sin(y), 0, math.cos(y)]])
+    rz = np.array([[math.cos(z), math.sin(z), 0], [-math.sin(z), math.cos(z), 0], [0, 0, 1]])
+    return rx @ ry @ rz
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def shape_points(shape, size=(1.0, 1.0, 1.0), orient=(0.0, 0.0, 0.0), offset=(0.0, 0.0, 0.0)):
+    """(degree, points) of a shape scaled by size, rotated by orient and moved by offset.
+
+    Arguments must be hashable, results are memoized.
+    """
+    degree, points = SHAPES[shape]
+    points = np.asarray(points, dtype=np.float64) * np.asarray(size, dtype=np.float64)
+    if any(orient):
+        points = points @ _rotation(orient)
+    points = points + np.asarray(offset, dtype=np.float64)
+    return degree, tuple(tuple(point) for point in np.round(points, 6).tolist())
+
+
+def _key(values, digits=4):
+    if np.isscalar(values):
+        values = (values, values, values)
+    return tuple(round(float(v), digits) for v in values)
+
+
+def fit_size(joint, ratio=FIT_RATIO, others=None):
+    """Fit a control on a joint, returns (size, offset, position).
+
+    The control covers the box of the joint and of others (its child joints
+    by default), and is at least ratio times the longest distance to them
+    wide (the bone to the parent for a leaf). offset is the center of the
+    box relative to the joint, position the joint world position.
+    """
+    leaf = False
+    if others is None:
+        others = cmds.listRelatives(joint, children=True, type="joint") or []
+        if not others:
+            others = cmds.listRelatives(joint, parent=True, type="joint") or []
+            leaf = True
+    others = list(others)
+    positions = mirror.read_world_matrices([joint] + others)[:, 3, :3]
+    length = float(np.linalg.norm(positions[1:] - positions[0], axis=1).max()) if others else 1.0
+    if leaf and others:
+        positions = positions[:1]  # A leaf only borrows the bone length of its parent
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    size = np.maximum(high - low, length * ratio)
+    return _key(size, 3), _key((low + high) / 2.0 - positions[0], 3), positions[0].tolist()
+
+
+def fit_root_scale(ratio=ROOT_RATIO):
+    """Scale of the root control, ratio times the skeleton height from the
+    Hips box covering the head, the toe ends and the hands."""
+    nodes = registry.mapping(("joint_Hips",) + ROOT_EXTENTS)
+    size = fit_size(nodes.pop("joint_Hips"), others=nodes.values())[0]
+    return ratio * size[1]
+
+
+###########
+## Factory
+###########
+class ControlFactory:
+    """Create controllers, one curve shape per shape and parameters when instancing."""
+
+    def __init__(self, instance=True):
+        self.instance = instance
+        self.masters = {}  # (shape, size, orient, offset) -> curve shape shared by the controls
+        self.controls = []  # (control, shape name)
+
+    def create(self, name, shape, color=None, size=None, orient=(0, 0, 0), offset=(0, 0, 0), driver=None):
+        """Create a control transform named name, returns its name.
+
+        size is a number or (x, y, z), fitted on the driver joint when not
+        given. A control with a driver is placed on it.
+        """
+        position = None
+        if driver is not None and size is None:
+            size, offset, position = fit_size(driver)
+        key = (shape, _key(1.0 if size is None else size), _key(orient), _key(offset))
+
+        master = self.masters.get(key) if self.instance else None
+        if master is None:
+            degree, points = shape_points(*key)
+            control = cmds.curve(name=name, d=degree, p=points)
+            if self.instance:
+                self.masters[key] = cmds.listRelatives(control, shapes=True)[0]
+        else:
+            control = cmds.createNode("transform", name=name)
+            cmds.parent(master, control, add=True, shape=True)
+
+        if position is not None:
+            cmds.xform(control, translation=position, worldSpace=True)
+        if color is not None:
+            cmds.setAttr(f"{control}.overrideEnabled", 1)
+            cmds.setAttr(f"{control}.overrideColor", color)
+        self.controls.append((control, shape))
+        return control
+
+    def report(self):
+        """Print and return the shape nodes and curve data saved by instancing."""
+        shared = [shape for _, shape in self.controls]
+        shapes = len(self.masters) if self.instance else len(shared)
+        total = sum(shape_bytes(shape) for shape in shared)
+        stored = sum(shape_bytes(key[0]) for key in self.masters) if self.instance else total
+        saved_bytes = total - stored
+        cache = shape_points.cache_info()
+        report = {
+            "controls": len(shared),
+            "shape_nodes": shapes,
+            "shape_nodes_saved": len(shared) - shapes,
+            "bytes_saved": saved_bytes,
+            "cache_hits": cache.hits,
+            "cache_misses": cache.misses,
+        }
+        print(f"{report['controls']} controls on {shapes} shapes: {report['shape_nodes_saved']} shape nodes "
+              f"and {saved_bytes / 1024:.1f} KB of curve data saved, "
+              f"{cache.hits} CV cache hits / {cache.misses} misses")
+        return report
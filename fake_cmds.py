@@ -0,0 +1,1036 @@
+"""In-memory stand-in for the subset of maya.cmds used by the autorig.
+
+The scene is a real DAG of transforms (translate, rotate, scale, rotateAxis,
+jointOrient) with world matrices, so guides, joints, parenting, joint
+orientation and curves behave like Maya closely enough to run the whole
+pipeline and count commands outside of Maya:
+
+    import farm
+    farm.install_backend("fake_cmds")  # before importing autorig2
+    import batch_build
+
+Simplifications: short names are unique in the whole scene, rotate order
+is always xyz, pivots are ignored and the UI commands do nothing. Animation
+curves are linear and only evaluated by getAttr -time.
+"""
+import copy
+import json
+import math
+import os
+import types
+import uuid as uuid_module
+
+import numpy as np
+
+SHAPE_TYPES = ("locator", "nurbsCurve", "mesh")
+_IDENTITY3 = np.eye(3)
+_IDENTITY3.flags.writeable = False
+
+
+###########
+## Math (row vectors, world = local @ parent world, like Maya)
+###########
+def euler_matrix(rotation):
+    """3x3 rotation matrix of xyz euler angles in degrees."""
+    if not any(rotation):
+        return _IDENTITY3
+    x, y, z = (math.radians(a) for a in rotation)
+    cx, sx, cy, sy, cz, sz = math.cos(x), math.sin(x), math.cos(y), math.sin(y), math.cos(z), math.sin(z)
+    # rx @ ry @ rz expanded
+    return np.array([
+        [cy * cz, cy * sz, -sy],
+        [sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy],
+        [cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy],
+    ])
+
+
+def matrix_euler(matrix):
+    """xyz euler angles in degrees of a 3x3 rotation matrix."""
+    y = math.asin(max(-1.0, min(1.0, -matrix[0, 2])))
+    if abs(matrix[0, 2]) < 0.999999:
+        x = math.atan2(matrix[1, 2], matrix[2, 2])
+        z = math.atan2(matrix[0, 1], matrix[0, 0])
+    else:  # Gimbal lock, put everything on x
+        x = math.atan2(-matrix[2, 1], matrix[1, 1])
+        z = 0.0
+    return [math.degrees(x), math.degrees(y), math.degrees(z)]
+
+
+def compose(translate, rotate, scale, rotate_axis=(0, 0, 0), joint_orient=(0, 0, 0)):
+    """Local matrix: scale * rotateAxis * rotate * jointOrient * translate."""
+    matrix = np.eye(4)
+    rotation = euler_matrix(rotate)
+    if any(rotate_axis):
+        rotation = euler_matrix(rotate_axis) @ rotation
+    if any(joint_orient):
+        rotation = rotation @ euler_matrix(joint_orient)
+    matrix[:3, :3] = np.asarray(scale, dtype=np.float64)[:, None] * rotation
+    matrix[3, :3] = translate
+    return matrix
+
+
+###########
+## Scene
+###########
+class Node:
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.children = []
+        self.uuid = str(uuid_module.uuid4()).upper()
+        self.t = [0.0, 0.0, 0.0]
+        self.r = [0.0, 0.0, 0.0]
+        self.s = [1.0, 1.0, 1.0]
+        self.ra = [0.0, 0.0, 0.0]
+        self.jo = [0.0, 0.0, 0.0]
+        self.attrs = {"visibility": True, "overrideEnabled": False, "overrideColor": 0,
+                      "overrideRGBColors": False, "overrideColorR": 0.0, "overrideColorG": 0.0,
+                      "overrideColorB": 0.0}
+        self.data = {}  # Shape payload (CVs, knots, local position, points)
+        self.inputs = {}  # Attribute -> animation curve node driving it
+
+    @property
+    def is_shape(self):
+        return self.type in SHAPE_TYPES
+
+    def local_matrix(self):
+        if self.is_shape:
+            return np.eye(4)
+        return compose(self.t, self.r, self.s, self.ra, self.jo)
+
+    def world_matrix(self):
+        matrix = self.local_matrix()
+        parent = self.parent
+        while parent is not None:
+            matrix = matrix @ parent.local_matrix()
+            parent = parent.parent
+        return matrix
+
+    def parent_matrix(self):
+        return self.parent.world_matrix() if self.parent is not None else np.eye(4)
+
+    def set_world_matrix(self, world):
+        """Set t/r/s so the node lands on a world matrix, jointOrient kept."""
+        local = np.asarray(world, dtype=np.float64) @ np.linalg.inv(self.parent_matrix())
+        self.set_local_matrix(local)
+
+    def set_local_matrix(self, local):
+        rows = local[:3, :3]
+        scale = np.linalg.norm(rows, axis=1)
+        scale[scale == 0] = 1.0
+        rotation = rows / scale[:, None]
+        rotation = euler_matrix(self.ra).T @ rotation @ euler_matrix(self.jo).T
+        self.t = local[3, :3].tolist()
+        self.s = scale.tolist()
+        self.r = matrix_euler(rotation)
+
+
+class Scene:
+    def __init__(self):
+        self.nodes = {}
+        self.selection = []
+        self.file_name = ""
+        self.time = 1.0
+        self.animated = []  # Nodes with a curve connected, see _evaluated
+        self.playback = [1.0, 120.0]
+
+    def unique_name(self, name):
+        if name not in self.nodes:
+            return name
+        base = name.rstrip("0123456789")
+        digits = name[len(base):]
+        index = int(digits) + 1 if digits else 1
+        while f"{base}{index}" in self.nodes:
+            index += 1
+        return f"{base}{index}"
+
+    def create(self, name, node_type, parent=None):
+        node = Node(self.unique_name(name), node_type, parent)
+        self.nodes[node.name] = node
+        if parent is not None:
+            parent.children.append(node)
+        return node
+
+    def get(self, name):
+        name = _short(name)
+        try:
+            return self.nodes[name]
+        except KeyError:
+            raise ValueError(f"No object matches name: {name}") from None
+
+    def reparent(self, node, parent):
+        """Move a node under parent (None for the world), keeping its world matrix."""
+        world = node.world_matrix()
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+        if not node.is_shape:
+            node.set_world_matrix(world)
+
+    def remove(self, node):
+        for child in list(node.children):
+            self.remove(child)
+        if node.parent is not None and node in node.parent.children:
+            node.parent.children.remove(node)
+        self.nodes.pop(node.name, None)
+        if node.name in self.selection:
+            self.selection.remove(node.name)
+
+    def rename(self, node, new_name):
+        del self.nodes[node.name]
+        old_name = node.name
+        node.name = self.unique_name(_short(new_name))
+        self.nodes[node.name] = node
+        self.selection = [node.name if n == old_name else n for n in self.selection]
+        # Maya renames the shapes of a renamed transform after it
+        for child in node.children:
+            if child.is_shape:
+                self.rename(child, f"{node.name}Shape")
+        return node.name
+
+    def descendants(self, node):
+        for child in node.children:
+            yield child
+            yield from self.descendants(child)
+
+    def path(self, node):
+        names = []
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return "|" + "|".join(reversed(names))
+
+
+scene = Scene()
+_undo = {"state": True, "chunks": 0, "stack": []}
+
+
+def _short(name):
+    return str(name).split("|")[-1]
+
+
+def _flatten(args):
+    for arg in args:
+        if isinstance(arg, (list, tuple, set)):
+            yield from _flatten(arg)
+        elif arg is not None:
+            yield arg
+
+
+def _targets(args):
+    """Nodes named in the arguments, or the selection when there are none."""
+    names = [str(a).split(".")[0] for a in _flatten(args)]
+    if not names:
+        names = list(scene.selection)
+    return [scene.get(name) for name in names]
+
+
+def _flag(kwargs, *names, default=None):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default
+
+
+###########
+## Attributes
+###########
+_CHANNELS = {
+    "translate": "t", "rotate": "r", "scale": "s", "rotateAxis": "ra", "jointOrient": "jo",
+    "t": "t", "r": "r", "s": "s", "ra": "ra", "jo": "jo",
+}
+_AXES = {"X": 0, "Y": 1, "Z": 2, "x": 0, "y": 1, "z": 2}
+_ALIASES = {"v": "visibility"}
+
+
+def _plug(plug):
+    node_name, attribute = plug.split(".", 1)
+    return scene.get(node_name), attribute
+
+
+def _channel(attribute):
+    """(channel, axis) of a transform attribute, axis is None for compounds."""
+    if attribute in _CHANNELS:
+        return _CHANNELS[attribute], None
+    base, axis = attribute[:-1], attribute[-1:]
+    if axis in _AXES and base in _CHANNELS:
+        return _CHANNELS[base], _AXES[axis]
+    return None, None
+
+
+def getAttr(plug, **kwargs):
+    if "time" in kwargs or "t" in kwargs:
+        with _evaluated(_flag(kwargs, "time", "t")):
+            return getAttr(plug)
+    node, attribute = _plug(plug)
+    if attribute.startswith("worldMatrix"):
+        return node.world_matrix().reshape(-1).tolist()
+    if attribute == "matrix":
+        return node.local_matrix().reshape(-1).tolist()
+    channel, axis = _channel(attribute)
+    if channel is not None:
+        values = getattr(node, channel)
+        return values[axis] if axis is not None else [tuple(values)]
+    attribute = _ALIASES.get(attribute, attribute)
+    if attribute in node.attrs:
+        return node.attrs[attribute]
+    if attribute in node.data:
+        return node.data[attribute]
+    raise ValueError(f"No attribute '{attribute}' on {node.name}")
+
+
+def setAttr(plug, *values, **kwargs):
+    node, attribute = _plug(plug)
+    if attribute.startswith(("ktv[", "keyTimeValue[")):
+        _set_keys(node, attribute, list(_flatten(values)))
+        return
+    channel, axis = _channel(attribute)
+    if channel is not None:
+        values = list(_flatten(values))
+        target = getattr(node, channel)
+        if axis is not None:
+            target[axis] = float(values[0])
+        else:
+            target[:] = [float(v) for v in values[:3]]
+        return
+    attribute = _ALIASES.get(attribute, attribute)
+    node.attrs[attribute] = values[0] if len(values) == 1 else list(values)
+
+
+def addAttr(node, longName=None, ln=None, **kwargs):
+    scene.get(node).attrs[longName or ln] = kwargs.get("defaultValue", kwargs.get("dv", 0))
+
+
+def attributeQuery(attribute, node=None, n=None, exists=False, ex=False, **kwargs):
+    node = scene.get(node or n)
+    return attribute in node.attrs or _channel(attribute)[0] is not None
+
+
+###########
+## Creation
+###########
+def _select_created(node):
+    scene.selection = [node.name]
+
+
+def spaceLocator(name="locator1", position=(0, 0, 0), p=None, **kwargs):
+    transform = scene.create(name, "transform")
+    shape = scene.create(f"{transform.name}Shape", "locator", transform)
+    shape.data["localPosition"] = list(p or position)
+    _select_created(transform)
+    return [transform.name]
+
+
+def joint(*args, **kwargs):
+    if _flag(kwargs, "edit", "e"):
+        return _edit_joint(args, kwargs)
+    if _flag(kwargs, "query", "q"):
+        node = _targets(args)[0]
+        if _flag(kwargs, "position", "p"):
+            return node.world_matrix()[3, :3].tolist()
+        return None
+
+    parent = None
+    if scene.selection:
+        candidate = scene.nodes.get(scene.selection[-1])
+        if candidate is not None and candidate.type == "joint":
+            parent = candidate
+    node = scene.create(_flag(kwargs, "name", "n", default="joint1"), "joint", parent)
+    node.attrs["radius"] = float(_flag(kwargs, "radius", "rad", default=1.0))
+    position = _flag(kwargs, "position", "p", default=(0, 0, 0))
+    world = np.eye(4)
+    world[3, :3] = position
+    node.set_world_matrix(world)
+    _select_created(node)
+    return node.name
+
+
+def curve(p=(), k=None, d=1, name="curve1", **kwargs):
+    name = kwargs.get("n", name)
+    transform = scene.create(name, "transform")
+    shape = scene.create(f"curveShape{transform.name[len('curve'):] or '1'}"
+                         if transform.name.startswith("curve") else f"{transform.name}Shape",
+                         "nurbsCurve", transform)
+    shape.data["cvs"] = [list(point) for point in p]
+    shape.data["knots"] = list(k) if k is not None else []
+    shape.data["degree"] = d
+    _select_created(transform)
+    return transform.name
+
+
+def group(*args, **kwargs):
+    nodes = [] if _flag(kwargs, "empty", "em") else _targets(args)
+    parent = scene.get(kwargs["parent"]) if "parent" in kwargs else None
+    node = scene.create(_flag(kwargs, "name", "n", default="group1"), "transform", parent)
+    for child in nodes:
+        scene.reparent(child, node)
+    _select_created(node)
+    return node.name
+
+
+def Group(*args):
+    """Runtime command grouping the selection under a new group1."""
+    group()
+
+
+def createNode(node_type, name=None, parent=None, **kwargs):
+    parent_node = scene.get(parent) if parent else None
+    return scene.create(name or f"{node_type}1", node_type, parent_node).name
+
+
+def duplicate(*args, **kwargs):
+    created = []
+    roots = []
+    for node in _targets(args):
+        copy_root = _copy_tree(node, node.parent, created)
+        roots.append(copy_root.name)
+    scene.selection = list(roots)
+    return roots if _flag(kwargs, "returnRootsOnly", "rr") else created
+
+
+def _copy_tree(node, parent, created):
+    new = scene.create(node.name, node.type, parent)
+    for field in ("t", "r", "s", "ra", "jo"):
+        setattr(new, field, list(getattr(node, field)))
+    new.attrs = copy.deepcopy(node.attrs)
+    new.data = copy.deepcopy(node.data)
+    created.append(new.name)
+    for child in node.children:
+        _copy_tree(child, new, created)
+    return new
+
+
+###########
+## Hierarchy and names
+###########
+def parent(*args, **kwargs):
+    names = list(_flatten(args))
+    if _flag(kwargs, "world", "w"):
+        for node in _targets(names):
+            scene.reparent(node, None)
+        return [n.name for n in _targets(names)]
+    nodes = _targets(names)
+    target = nodes[-1]
+    children = nodes[:-1]
+    for child in children:
+        if _flag(kwargs, "shape", "s") and _flag(kwargs, "addObject", "add"):
+            # Instance: a second shape node sharing the same curve data
+            instance = scene.create(child.name, child.type, target)
+            instance.data = child.data
+            instance.attrs = child.attrs
+        elif _flag(kwargs, "shape", "s") and _flag(kwargs, "relative", "r"):
+            # Move the shapes under the target transform as they are
+            shapes = [child] if child.is_shape else [c for c in child.children if c.is_shape]
+            for shape in shapes:
+                shape.parent.children.remove(shape)
+                shape.parent = target
+                target.children.append(shape)
+        else:
+            ancestor = target
+            while ancestor is not None:
+                if ancestor is child:
+                    raise RuntimeError(f"Cannot parent {child.name} under its descendant {target.name}")
+                ancestor = ancestor.parent
+            scene.reparent(child, target)
+    return [c.name for c in children]
+
+
+def rename(*args, **kwargs):
+    if len(args) == 1:
+        old, new = scene.selection[-1], args[0]
+    else:
+        old, new = args[0], args[1]
+    return scene.rename(scene.get(old), new)
+
+
+def delete(*args, **kwargs):
+    for node in _targets(args):
+        if node.name in scene.nodes:
+            scene.remove(node)
+
+
+def objExists(name):
+    return _short(str(name).split(".")[0]) in scene.nodes
+
+
+def ls(*args, **kwargs):
+    names = list(_flatten(args))
+    by_uuid = {node.uuid: node for node in scene.nodes.values()}
+    if _flag(kwargs, "selection", "sl"):
+        nodes = [scene.nodes[n] for n in scene.selection if n in scene.nodes]
+    elif names:
+        nodes = []
+        for name in names:
+            node = by_uuid.get(name) or scene.nodes.get(_short(name))
+            if node is not None:
+                nodes.append(node)
+    else:
+        nodes = list(scene.nodes.values())
+    node_type = _flag(kwargs, "type", "typ")
+    if node_type:
+        types_ = {node_type} if isinstance(node_type, str) else set(node_type)
+        nodes = [n for n in nodes if n.type in types_]
+    if _flag(kwargs, "uuid"):
+        return [n.uuid for n in nodes]
+    if _flag(kwargs, "long", "l"):
+        return [scene.path(n) for n in nodes]
+    return [n.name for n in nodes]
+
+
+def listRelatives(*args, **kwargs):
+    result = []
+    for node in _targets(args):
+        if _flag(kwargs, "parent", "p"):
+            related = [node.parent] if node.parent is not None else []
+        elif _flag(kwargs, "allDescendents", "ad"):
+            related = list(scene.descendants(node))
+        else:
+            related = list(node.children)
+        if _flag(kwargs, "shapes", "s"):
+            related = [n for n in related if n.is_shape]
+        node_type = _flag(kwargs, "type", "typ")
+        if node_type:
+            related = [n for n in related if n.type == node_type]
+        if _flag(kwargs, "fullPath", "f"):
+            result.extend(scene.path(n) for n in related)
+        else:
+            result.extend(n.name for n in related)
+    return result or None
+
+
+def nodeType(name):
+    return scene.get(name).type
+
+
+def select(*args, **kwargs):
+    names = [_short(str(a).split(".")[0]) for a in _flatten(args)]
+    if _flag(kwargs, "clear", "cl"):
+        scene.selection = []
+        return
+    for name in names:
+        scene.get(name)
+    if _flag(kwargs, "add", "af", "tgl"):
+        scene.selection.extend(n for n in names if n not in scene.selection)
+    elif _flag(kwargs, "deselect", "d"):
+        scene.selection = [n for n in scene.selection if n not in names]
+    else:
+        scene.selection = names
+
+
+def hide(*args, **kwargs):
+    for node in _targets(args):
+        node.attrs["visibility"] = False
+
+
+###########
+## Meshes
+###########
+def create_mesh(points, name="pMesh1"):
+    """Helper standing for an imported model: a mesh made of vertices only."""
+    transform = scene.create(name, "transform")
+    shape = scene.create(f"{transform.name}Shape", "mesh", transform)
+    shape.data["points"] = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    _select_created(transform)
+    return transform.name
+
+
+def _mesh_shape(node):
+    if node.type == "mesh":
+        return node
+    return next(child for child in node.children if child.type == "mesh")
+
+
+def _world_points(shape, world_space=True, start=0, end=None):
+    points = shape.data["points"][start:end]
+    if not world_space:
+        return points
+    matrix = shape.parent.world_matrix()
+    return points @ matrix[:3, :3] + matrix[3, :3]
+
+
+def _vertex_positions(components, world_space):
+    values = []
+    for component in components:
+        node_name, indices = str(component).split(".vtx[")
+        shape = _mesh_shape(scene.get(node_name))
+        indices = indices.rstrip("]")
+        if indices == "*":
+            start, end = 0, len(shape.data["points"]) - 1
+        else:
+            start, _, end = indices.partition(":")
+            start, end = int(start), int(end or start)
+        values.append(_world_points(shape, world_space, start, end + 1))
+    return np.concatenate(values).reshape(-1).tolist()
+
+
+def polyEvaluate(*args, **kwargs):
+    shape = _mesh_shape(_targets(args)[0])
+    if _flag(kwargs, "vertex", "v"):
+        return len(shape.data["points"])
+    return None
+
+
+def exactWorldBoundingBox(*args, **kwargs):
+    points = np.concatenate([_world_points(_mesh_shape(node)) for node in _targets(args)])
+    return points.min(axis=0).tolist() + points.max(axis=0).tolist()
+
+
+###########
+## Skinning
+###########
+def skinCluster(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        skin = _targets(args)[0]
+        if _flag(kwargs, "influence", "inf"):
+            return list(skin.data["influences"])
+        if _flag(kwargs, "geometry", "g"):
+            return [skin.data["geometry"]]
+        return None
+    nodes = _targets(args)
+    shape = _mesh_shape(nodes[-1])
+    if any(n.type == "skinCluster" and n.data["geometry"] == shape.name for n in scene.nodes.values()):
+        raise RuntimeError(f"Skin on {shape.name} was already bound")
+    skin = scene.create(_flag(kwargs, "name", "n", default="skinCluster1"), "skinCluster")
+    skin.data.update(influences=[n.name for n in nodes[:-1]], geometry=shape.name, weights={})
+    return [skin.name]
+
+
+def _skin_vertices(components):
+    for component in _flatten([components]):
+        node_name, indices = str(component).split(".vtx[")
+        start, _, end = indices.rstrip("]").partition(":")
+        yield from range(int(start), int(end or start) + 1)
+
+
+def skinPercent(skin, *components, **kwargs):
+    skin = scene.get(skin)
+    weights = skin.data["weights"]
+    vertices = list(_skin_vertices(components))
+    if _flag(kwargs, "query", "q"):
+        influences = skin.data["influences"]
+        return [weights.get(vertices[0], {}).get(name, 0.0) for name in influences]
+    values = dict(_flag(kwargs, "transformValue", "tv", default=()))
+    for vertex in vertices:
+        if _flag(kwargs, "zeroRemainingInfluences", "zri"):
+            weights[vertex] = dict(values)
+        else:
+            weights.setdefault(vertex, {}).update(values)
+    return None
+
+
+def listHistory(*args, **kwargs):
+    nodes = _targets(args)
+    shapes = {n.name for node in nodes for n in [node] + node.children if n.type == "mesh"}
+    skins = [n.name for n in scene.nodes.values() if n.type == "skinCluster" and n.data["geometry"] in shapes]
+    return [node.name for node in nodes] + skins
+
+
+###########
+## Animation (linear curves, keys as [time, value] by index like keyTimeValue)
+###########
+def _set_keys(curve, attribute, values):
+    start, _, end = attribute[attribute.index("[") + 1:-1].partition(":")
+    start, end = int(start), int(end or start)
+    keys = curve.data.setdefault("keys", [])
+    keys.extend([None] * (end + 1 - len(keys)))
+    for index, pair in zip(range(start, end + 1), zip(values[0::2], values[1::2])):
+        keys[index] = [float(pair[0]), float(pair[1])]
+    curve.data.pop("arrays", None)
+
+
+def _sorted_keys(curve):
+    return sorted(key for key in curve.data.get("keys", []) if key is not None)
+
+
+def _key_arrays(curve):
+    """(times, values) arrays of a curve, cached until its keys change."""
+    if "arrays" not in curve.data:
+        keys = np.array(_sorted_keys(curve), dtype=np.float64).reshape(-1, 2)
+        curve.data["arrays"] = (keys[:, 0], keys[:, 1])
+    return curve.data["arrays"]
+
+
+def _curve(plug):
+    node, _, attribute = str(plug).partition(".")
+    node = scene.get(node)
+    if node.type.startswith("animCurve"):
+        return node
+    return node.inputs.get(attribute)
+
+
+def connectAttr(source, destination, **kwargs):
+    node, attribute = _plug(destination)
+    node.inputs[attribute] = _plug(source)[0]
+    if node not in scene.animated:
+        scene.animated.append(node)
+
+
+def listConnections(*args, **kwargs):
+    result = []
+    node_type = _flag(kwargs, "type", "t")
+    for plug in _flatten(args):
+        node, attribute = _plug(plug)
+        inputs = node.inputs.items() if "." not in plug else [(attribute, node.inputs.get(attribute))]
+        for name, curve in inputs:
+            if curve is None or curve.name not in scene.nodes or \
+                    (node_type and not curve.type.startswith(node_type)):
+                continue
+            if _flag(kwargs, "connections", "c"):
+                result.append(f"{node.name}.{name}")
+            result.append(curve.name)
+    return result or None
+
+
+def keyframe(*args, **kwargs):
+    values = []
+    for plug in _flatten(args):
+        curve = _curve(plug)
+        if curve is None:
+            continue
+        for time_, value in _sorted_keys(curve):
+            if _flag(kwargs, "timeChange", "tc"):
+                values.append(time_)
+            if _flag(kwargs, "valueChange", "vc"):
+                values.append(value)
+    return values or None
+
+
+def cutKey(*args, **kwargs):
+    start, end = _flag(kwargs, "time", "t", default=(-math.inf, math.inf))
+    for plug in _flatten(args):
+        curve = _curve(plug)
+        if curve is not None:
+            curve.data["keys"] = [key for key in _sorted_keys(curve) if not start <= key[0] <= end]
+            curve.data.pop("arrays", None)
+    return None
+
+
+class _evaluated:
+    """Channels driven by curves set to their value at a time, then restored."""
+
+    def __init__(self, time_):
+        self.time = float(time_)
+        self.saved = []
+
+    def __enter__(self):
+        for node in scene.animated:
+            for attribute, curve in node.inputs.items():
+                times, curve_values = _key_arrays(curve)
+                if not len(times) or curve.name not in scene.nodes:
+                    continue
+                channel, axis = _channel(attribute)
+                values = getattr(node, channel)
+                self.saved.append((values, axis, values[axis]))
+                values[axis] = float(np.interp(self.time, times, curve_values))
+
+    def __exit__(self, *exc):
+        for values, axis, value in reversed(self.saved):
+            values[axis] = value
+
+
+def playbackOptions(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        if _flag(kwargs, "minTime", "min"):
+            return scene.playback[0]
+        if _flag(kwargs, "maxTime", "max"):
+            return scene.playback[1]
+        return None
+    if "minTime" in kwargs or "min" in kwargs:
+        scene.playback[0] = float(_flag(kwargs, "minTime", "min"))
+    if "maxTime" in kwargs or "max" in kwargs:
+        scene.playback[1] = float(_flag(kwargs, "maxTime", "max"))
+
+
+def currentTime(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return scene.time
+    scene.time = float(args[0])
+    return scene.time
+
+
+###########
+## Transforms
+###########
+def xform(*args, **kwargs):
+    components = [a for a in _flatten(args) if ".vtx[" in str(a)]
+    if components and _flag(kwargs, "query", "q"):
+        return _vertex_positions(components, _flag(kwargs, "worldSpace", "ws", default=False))
+    nodes = _targets(args)
+    world_space = _flag(kwargs, "worldSpace", "ws", default=False)
+    if _flag(kwargs, "query", "q"):
+        # Several objects give their values one after the other
+        values = [_query_xform(node, kwargs, world_space) for node in nodes]
+        return None if values[0] is None else [value for node_values in values for value in node_values]
+
+    for node in nodes:
+        matrix = _flag(kwargs, "matrix", "m")
+        if matrix is not None:
+            matrix = np.asarray(matrix, dtype=np.float64).reshape(4, 4)
+            if world_space:
+                node.set_world_matrix(matrix)
+            else:
+                node.set_local_matrix(matrix)
+        translation = _flag(kwargs, "translation", "t")
+        if translation is not None:
+            if world_space and node.parent is not None:
+                world = node.world_matrix()
+                world[3, :3] = translation
+                node.set_world_matrix(world)
+            else:
+                node.t = [float(v) for v in translation]
+        rotation = _flag(kwargs, "rotation", "ro")
+        if rotation is not None:
+            node.r = [float(v) for v in rotation]
+        rotate_axis = _flag(kwargs, "rotateAxis", "ra")
+        if rotate_axis is not None:
+            node.ra = [float(v) for v in rotate_axis]
+        scale_ = _flag(kwargs, "scale", "s")
+        if scale_ is not None:
+            node.s = [float(v) for v in scale_]
+
+
+def _query_xform(node, kwargs, world_space):
+    if _flag(kwargs, "matrix", "m"):
+        matrix = node.world_matrix() if world_space else node.local_matrix()
+        return matrix.reshape(-1).tolist()
+    if _flag(kwargs, "translation", "t"):
+        if world_space:
+            return node.world_matrix()[3, :3].tolist()
+        return list(node.t)
+    if _flag(kwargs, "rotation", "ro"):
+        if world_space:
+            rows = node.world_matrix()[:3, :3]
+            return matrix_euler(rows / np.linalg.norm(rows, axis=1)[:, None])
+        return list(node.r)
+    if _flag(kwargs, "scale", "s"):
+        return list(node.s)
+    if _flag(kwargs, "rotateAxis", "ra"):
+        return list(node.ra)
+    return None
+
+
+def move(x, y, z, *args, **kwargs):
+    for node in _targets(args):
+        if _flag(kwargs, "relative", "r"):
+            node.t = [a + b for a, b in zip(node.t, (x, y, z))]
+        else:
+            xform(node.name, translation=(x, y, z), worldSpace=True)
+
+
+def scale(x, y, z, *args, **kwargs):
+    for node in _targets(args):
+        if _flag(kwargs, "relative", "r"):
+            node.s = [a * b for a, b in zip(node.s, (x, y, z))]
+        else:
+            node.s = [float(x), float(y), float(z)]
+
+
+def makeIdentity(*args, **kwargs):
+    """Freeze transforms: bake them into curve CVs and jointOrient."""
+    if not _flag(kwargs, "apply", "a"):
+        for node in _targets(args):
+            node.t, node.r, node.s = [0.0] * 3, [0.0] * 3, [1.0] * 3
+        return
+    for node in _targets(args):
+        _freeze(node)
+
+
+def _freeze(node):
+    if node.is_shape:
+        return
+    children_world = [(child, child.world_matrix()) for child in node.children if not child.is_shape]
+    local = node.local_matrix()
+    if node.type == "joint":
+        rotation = euler_matrix(node.ra) @ euler_matrix(node.r) @ euler_matrix(node.jo)
+        node.jo = matrix_euler(rotation)
+        node.r = [0.0, 0.0, 0.0]
+        node.ra = [0.0, 0.0, 0.0]
+    else:
+        for shape in node.children:
+            if shape.is_shape and "cvs" in shape.data:
+                points = np.asarray(shape.data["cvs"], dtype=np.float64).reshape(-1, 3)
+                points = points @ local[:3, :3] + local[3, :3]
+                shape.data["cvs"] = points.tolist()
+        node.t, node.r, node.s, node.ra = [0.0] * 3, [0.0] * 3, [1.0] * 3, [0.0] * 3
+    for child, world in children_world:
+        child.set_world_matrix(world)
+        _freeze(child)
+
+
+###########
+## Joint orientation
+###########
+_UP_VECTORS = {
+    "xup": (1, 0, 0), "xdown": (-1, 0, 0), "yup": (0, 1, 0), "ydown": (0, -1, 0),
+    "zup": (0, 0, 1), "zdown": (0, 0, -1), "none": (0, 1, 0),
+}
+
+
+def aim_rotation(aim, up, orientation="xyz"):
+    """World rotation rows pointing axis orientation[0] along aim, orientation[1] toward up."""
+    aim = np.asarray(aim, dtype=np.float64)
+    aim = aim / np.linalg.norm(aim)
+    up = np.asarray(up, dtype=np.float64)
+    secondary = up - np.dot(up, aim) * aim
+    if np.linalg.norm(secondary) < 1e-8:  # Aim along up, fall back on another world axis
+        alt = np.array([0.0, 0.0, 1.0]) if abs(aim[2]) < 0.9 else np.array([1.0, 0.0, 0.0])
+        secondary = alt - np.dot(alt, aim) * aim
+    secondary = secondary / np.linalg.norm(secondary)
+    axes = "xyz"
+    first, second, third = (axes.index(a) for a in orientation)
+    rows = np.zeros((3, 3))
+    rows[first] = aim
+    rows[second] = secondary
+    # Complete a right-handed frame: row i = row (i+1) x row (i+2)
+    rows[third] = np.cross(rows[(third + 1) % 3], rows[(third + 2) % 3])
+    return rows
+
+
+def _orient(node, orientation, secondary_axis):
+    children_world = [(child, child.world_matrix()) for child in node.children if not child.is_shape]
+    world = node.world_matrix()
+    parent_rotation = node.parent_matrix()[:3, :3]
+    parent_rotation = parent_rotation / np.linalg.norm(parent_rotation, axis=1)[:, None]
+    joints = [child for child in node.children if child.type == "joint"]
+    if orientation == "none":
+        target = np.eye(3)
+    elif joints:
+        aim = joints[0].world_matrix()[3, :3] - world[3, :3]
+        if np.linalg.norm(aim) < 1e-8:
+            target = parent_rotation
+        else:
+            target = aim_rotation(aim, _UP_VECTORS[secondary_axis], orientation)
+    else:
+        target = parent_rotation
+    node.jo = matrix_euler(target @ parent_rotation.T)
+    node.r = [0.0, 0.0, 0.0]
+    node.ra = [0.0, 0.0, 0.0]
+    for child, child_world in children_world:
+        child.set_world_matrix(child_world)
+
+
+def _edit_joint(args, kwargs):
+    orientation = _flag(kwargs, "orientJoint", "oj")
+    if orientation is None:
+        return None
+    secondary_axis = _flag(kwargs, "secondaryAxisOrient", "sao", default="yup")
+    for node in _targets(args):
+        nodes = [node]
+        if _flag(kwargs, "children", "ch"):
+            nodes.extend(n for n in scene.descendants(node) if n.type == "joint")
+        for target in nodes:
+            _orient(target, orientation, secondary_axis)
+    return None
+
+
+###########
+## Scene, undo and environment
+###########
+def file(*args, **kwargs):
+    if kwargs.get("new"):
+        reset()
+        return ""
+    if "rename" in kwargs or "rn" in kwargs:
+        scene.file_name = _flag(kwargs, "rename", "rn")
+        return scene.file_name
+    if _flag(kwargs, "query", "q"):
+        return scene.file_name
+    if _flag(kwargs, "save", "s"):
+        _save(scene.file_name)
+        return scene.file_name
+    return None
+
+
+def _save(path):
+    nodes = {}
+    for node in scene.nodes.values():
+        nodes[node.name] = {
+            "type": node.type, "parent": node.parent.name if node.parent else None,
+            "t": node.t, "r": node.r, "s": node.s, "jo": node.jo, "ra": node.ra,
+            "attrs": node.attrs, "data": node.data,
+        }
+    with open(path, 'w') as file_:
+        json.dump({"fake_scene": 1, "nodes": nodes}, file_,
+                  default=lambda value: value.tolist() if hasattr(value, "tolist") else float(value))
+
+
+def reset():
+    """Start a new empty scene."""
+    global scene
+    scene = Scene()
+    _undo["stack"].clear()
+    _undo["chunks"] = 0
+
+
+def undoInfo(*args, **kwargs):
+    if _flag(kwargs, "query", "q"):
+        return _undo["state"]
+    if "state" in kwargs or "st" in kwargs:
+        _undo["state"] = bool(_flag(kwargs, "state", "st"))
+        if not _undo["state"]:
+            _undo["stack"].clear()
+    if "stateWithoutFlush" in kwargs or "swf" in kwargs:
+        _undo["state"] = bool(_flag(kwargs, "stateWithoutFlush", "swf"))
+    if _flag(kwargs, "openChunk", "ock"):
+        if _undo["chunks"] == 0 and _undo["state"]:
+            _undo["stack"].append(copy.deepcopy(scene))
+        _undo["chunks"] += 1
+    if _flag(kwargs, "closeChunk", "cck"):
+        _undo["chunks"] = max(0, _undo["chunks"] - 1)
+
+
+def undo(*args, **kwargs):
+    """Undo the last closed chunk, single commands are not recorded."""
+    global scene
+    if _undo["stack"]:
+        scene = _undo["stack"].pop()
+    else:
+        warning("Nothing to undo in the fake scene.")
+
+
+def about(batch=False, **kwargs):
+    if batch:
+        return True
+    return "fake"
+
+
+def internalVar(userScriptDir=False, **kwargs):
+    path = os.environ.get("AUTORIG_SCRIPT_DIR", os.getcwd())
+    return os.path.join(path, "")
+
+
+def evalDeferred(command, *args, **kwargs):
+    if callable(command):
+        command()
+
+
+def warning(message, *args, **kwargs):
+    print(f"Warning: {message}")
+
+
+def error(message, *args, **kwargs):
+    raise RuntimeError(message)
+
+
+def refresh(*args, **kwargs):
+    return None
+
+
+def window(*args, **kwargs):
+    if _flag(kwargs, "exists", "ex"):
+        return False
+    return args[0] if args else "window1"
+
+
+def _ui(*args, **kwargs):
+    return args[0] if args else "ui1"
+
+
+# UI and viewport commands do nothing outside of Maya
+viewFit = deleteUI = showWindow = columnLayout = text = button = textField = _ui
+textScrollList = setToolTo = manipRotateContext = hilite = _ui
+
+mel = types.SimpleNamespace(eval=lambda *args, **kwargs: None)
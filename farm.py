@@ -0,0 +1,172 @@
+"""Local farm runner: build many bipeds in parallel from guide files.
+
+Each job is one guide file built by batch_build in its own standalone
+interpreter (mayapy by default), so builds run one per core:
+
+    mayapy farm.py guides/*.json -o rigs -j 8 --retries 1 --timeout 900
+
+Every attempt logs to <out>/logs/<job>.<attempt>.log and the run ends with
+a summary table and <out>/summary.json. --backend swaps maya.cmds for
+another module (for example a stand-in scene graph) in the workers.
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+MAYA_BACKEND = "maya"
+
+
+###########
+## Worker side
+###########
+def install_backend(backend=MAYA_BACKEND):
+    """Make maya.cmds available in this interpreter.
+
+    "maya" initializes maya.standalone, any other value is a module name
+    imported and registered as maya.cmds (and maya.mel).
+    """
+    if backend == MAYA_BACKEND:
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+        return
+    module = importlib.import_module(backend)
+    maya = types.ModuleType("maya")
+    maya.cmds = module
+    maya.mel = getattr(module, "mel", module)
+    sys.modules["maya"] = maya
+    sys.modules["maya.cmds"] = maya.cmds
+    sys.modules["maya.mel"] = maya.mel
+
+def run_worker(guide_file, output, result_path, backend=MAYA_BACKEND):
+    """Build one guide file and write its stage timings to result_path."""
+    install_backend(backend)
+    try:
+        import batch_build
+        timings = batch_build.build_from_guide_file(guide_file, output)
+        with open(result_path, 'w') as file:
+            json.dump({"stages": dict(timings)}, file, indent=1)
+    finally:
+        if backend == MAYA_BACKEND:
+            # mayapy can hang or crash on exit when Maya is left running
+            import maya.standalone
+            maya.standalone.uninitialize()
+    return 0
+
+
+###########
+## Runner side
+###########
+def job_name(guide_file):
+    return os.path.splitext(os.path.basename(guide_file))[0]
+
+def run_job(guide_file, out_dir, python=sys.executable, backend=MAYA_BACKEND, retries=0, timeout=None):
+    """Run one job with retries and return its result dict."""
+    name = job_name(guide_file)
+    output = os.path.join(out_dir, f"{name}_rig.ma")
+    result_path = os.path.join(out_dir, "logs", f"{name}.result.json")
+    command = [
+        python, os.path.abspath(__file__), "--worker", guide_file,
+        "--output", output, "--result", result_path, "--backend", backend,
+    ]
+    result = {"job": name, "guide": guide_file, "output": output, "status": "failed", "attempts": 0}
+    start = time.perf_counter()
+    for attempt in range(1, retries + 2):
+        result["attempts"] = attempt
+        log_path = os.path.join(out_dir, "logs", f"{name}.{attempt}.log")
+        result["log"] = log_path
+        # A result left by an earlier run or attempt must not pass for this one
+        try:
+            os.remove(result_path)
+        except FileNotFoundError:
+            pass
+        with open(log_path, 'w') as log:
+            try:
+                process = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, timeout=timeout,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+                status = "ok" if process.returncode == 0 else f"exit {process.returncode}"
+            except subprocess.TimeoutExpired:
+                status = "timeout"
+        if status == "ok":
+            # A worker that exits 0 without its result file failed like any other
+            try:
+                with open(result_path, 'r') as file:
+                    result["stages"] = json.load(file)["stages"]
+            except (OSError, ValueError, KeyError):
+                status = "no result"
+            else:
+                result["status"] = "ok"
+                break
+        result["status"] = status
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def run_jobs(guide_files, out_dir, workers=None, **job_options):
+    """Run every guide file on a pool of worker interpreters.
+
+    Returns the summary dict, also written to <out_dir>/summary.json.
+    """
+    # Workers run from the repository folder, so every path is made absolute
+    out_dir = os.path.abspath(out_dir)
+    guide_files = [os.path.abspath(guide_file) for guide_file in guide_files]
+    os.makedirs(os.path.join(out_dir, "logs"), exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, guide_file, out_dir, **job_options) for guide_file in guide_files]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+
+    summary = {
+        "workers": workers,
+        "wall_seconds": wall,
+        "jobs": len(results),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "jobs_per_minute": len(results) / wall * 60 if wall else 0.0,
+        "results": results,
+    }
+    with open(os.path.join(out_dir, "summary.json"), 'w') as file:
+        json.dump(summary, file, indent=1)
+    print_summary(summary)
+    return summary
+
+def print_summary(summary):
+    print(f"{'job':<30} {'status':<10} {'tries':>5} {'seconds':>9}")
+    for result in summary["results"]:
+        print(f"{result['job']:<30} {result['status']:<10} {result['attempts']:>5} {result['seconds']:>9.2f}")
+    print(f"{summary['ok']}/{summary['jobs']} ok on {summary['workers']} workers in "
+          f"{summary['wall_seconds']:.2f}s ({summary['jobs_per_minute']:.1f} jobs/min)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build many biped rigs in parallel from guide files.")
+    parser.add_argument("guide_files", nargs="+")
+    parser.add_argument("-o", "--out-dir", default="rigs")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes, default one per core")
+    parser.add_argument("--retries", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per attempt")
+    parser.add_argument("--python", default=sys.executable, help="interpreter of the workers (mayapy)")
+    parser.add_argument("--backend", default=MAYA_BACKEND, help="maya.cmds provider of the workers")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args.guide_files[0], args.output, args.result, args.backend)
+
+    summary = run_jobs(
+        args.guide_files, args.out_dir, workers=args.workers, python=args.python,
+        backend=args.backend, retries=args.retries, timeout=args.timeout,
+    )
+    return 0 if not summary["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
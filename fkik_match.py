@@ -0,0 +1,216 @@
+"""Match and bake the _FK and _IK limb chains onto each other.
+
+    import fkik_match
+    fkik_match.match_limb("joint_left_shoulder", source="IK", target="FK")
+    fkik_match.bake_limb("joint_left_shoulder", source="IK", target="FK", start=1, end=5000)
+
+A limb is named by its bind root joint (see guide_template.joint_chains).
+The world matrices of the source chain and of the parent of the target
+chain are evaluated at every frame without moving the timeline (a DG
+context with the API, getAttr -time otherwise). The rotate values that put
+every target joint on its source joint are then solved for all the frames
+in one NumPy pass, and each rotate channel gets its keys in one call:
+MFnAnimCurve.addKeys when the undo queue is off, a keyTimeValue setAttr on
+the channel curve otherwise so the bake stays undoable.
+
+The joints are assumed to use the xyz rotate order of the build.
+"""
+import time
+
+import maya.cmds as cmds
+import numpy as np
+
+try:
+    import maya.api.OpenMaya as om
+    import maya.api.OpenMayaAnim as oma
+except ImportError:  # Standalone backends without the API
+    om = oma = None
+
+import attr_batch
+import guide_template
+import joint_orient
+from node_registry import registry
+
+CHAINS = ("IK", "FK")
+ROTATE_CHANNELS = ("rotateX", "rotateY", "rotateZ")
+
+
+###########
+## Chains
+###########
+def limbs():
+    """Bind root joints of the limbs that have IK and FK chains."""
+    return sorted({root for _, root, _ in guide_template.joint_chains()})
+
+
+def chain_joints(root, chain):
+    """(joints, parent of the chain root) of the chain copy of a limb, parents first."""
+    hierarchy = [(joint, parent) for joint, _, parent, _ in guide_template.joint_hierarchy()]
+    top = f"{root}_{chain}"
+    joints = []
+    outside = None
+    for joint, parent in hierarchy:
+        if joint == top:
+            joints.append(joint)
+            outside = parent
+        elif parent in joints and joint.endswith(f"_{chain}"):
+            joints.append(joint)
+    return joints, outside
+
+
+###########
+## Evaluation
+###########
+def evaluate_world_matrices(nodes, frames):
+    """(F, N, 4, 4) world matrices of nodes at every frame, timeline untouched."""
+    frames = np.asarray(frames, dtype=np.float64)
+    if om is not None:
+        selection = om.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+        plugs = [om.MFnDagNode(selection.getDagPath(i)).findPlug("worldMatrix", False).elementByLogicalIndex(0)
+                 for i in range(len(nodes))]
+        unit = om.MTime.uiUnit()
+        flat = []
+        for frame in frames.tolist():
+            with om.MDGContextGuard(om.MDGContext(om.MTime(frame, unit))):
+                flat.extend(list(om.MFnMatrixData(plug.asMObject()).matrix()) for plug in plugs)
+    else:
+        flat = [cmds.getAttr(f"{node}.worldMatrix", time=frame) for frame in frames.tolist() for node in nodes]
+    return np.asarray(flat, dtype=np.float64).reshape(len(frames), len(nodes), 4, 4)
+
+
+def solve_rotations(source_worlds, parent_worlds, parents, rotate_axes, joint_orients):
+    """(F, J, 3) rotate values putting the target joints on the source ones.
+
+    source_worlds is (F, J, 4, 4), parent_worlds (F, 4, 4) the world of the
+    target chain parent, parents the index of the parent of every joint in
+    the chain (-1 for the root). rotate_axes and joint_orients are the (J, 3)
+    static values of the target joints. Angles are unwrapped over the frames
+    so the curves have no flips.
+    """
+    frames, count = source_worlds.shape[:2]
+    worlds = joint_orient.rotation_rows(source_worlds.reshape(-1, 4, 4)).reshape(frames, count, 3, 3)
+    parent_rows = joint_orient.rotation_rows(parent_worlds.reshape(-1, 4, 4)).reshape(frames, 1, 3, 3)
+    parents = np.asarray(parents)
+    parent_rotations = np.where((parents < 0)[None, :, None, None], parent_rows, worlds[:, np.maximum(parents, 0)])
+    # world = rotateAxis @ rotate @ jointOrient @ parent world
+    local = worlds @ parent_rotations.transpose(0, 1, 3, 2)
+    axes = joint_orient.euler_rotations(rotate_axes)
+    orients = joint_orient.euler_rotations(joint_orients)
+    rotations = axes.transpose(0, 2, 1)[None] @ local @ orients.transpose(0, 2, 1)[None]
+    angles = joint_orient.euler_xyz(rotations.reshape(-1, 3, 3)).reshape(frames, count, 3)
+    return np.degrees(np.unwrap(np.radians(angles), axis=0))
+
+
+###########
+## Keys
+###########
+def write_keys(nodes, frames, values, attributes=ROTATE_CHANNELS):
+    """Key (F, N, len(attributes)) values on the attributes of nodes at frames.
+
+    The keys already in the frame range are replaced, each channel is written
+    in one call.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    plugs = [f"{node}.{attribute}" for node in nodes for attribute in attributes]
+    values = np.asarray(values, dtype=np.float64).reshape(len(frames), len(plugs))
+    cmds.cutKey(plugs, time=(float(frames[0]), float(frames[-1])), clear=True)
+    if oma is not None and attr_batch.use_modifier():
+        _write_api_keys(plugs, frames, values)
+        return
+    connections = cmds.listConnections(plugs, source=True, destination=False, connections=True,
+                                       type="animCurve") or []
+    curves = dict(zip(connections[0::2], connections[1::2]))
+    for column, plug in enumerate(plugs):
+        curve = curves.get(plug)
+        times, keys = frames, values[:, column]
+        if curve is None:
+            curve_type = "animCurveTA" if plug.rsplit(".", 1)[1].startswith("rotate") else "animCurveTU"
+            curve = cmds.createNode(curve_type, name=plug.replace(".", "_"))
+            cmds.connectAttr(f"{curve}.output", plug)
+        else:
+            # Keys left outside the range, merged in time order
+            kept = np.reshape(cmds.keyframe(curve, query=True, timeChange=True, valueChange=True) or [], (-1, 2))
+            times = np.concatenate([kept[:, 0], times])
+            keys = np.concatenate([kept[:, 1], keys])
+            order = np.argsort(times, kind="stable")
+            times, keys = times[order], keys[order]
+        flat = np.stack([times, keys], axis=1).reshape(-1).tolist()
+        cmds.setAttr(f"{curve}.ktv[0:{len(times) - 1}]", *flat)
+
+
+def _write_api_keys(plugs, frames, values):
+    selection = om.MSelectionList()
+    for plug in plugs:
+        selection.add(plug)
+    unit = om.MTime.uiUnit()
+    times = om.MTimeArray([om.MTime(frame, unit) for frame in frames.tolist()])
+    for column in range(len(plugs)):
+        plug = selection.getPlug(column)
+        curve = oma.MFnAnimCurve()
+        sources = plug.connectedTo(True, False)
+        if sources and sources[0].node().hasFn(om.MFn.kAnimCurve):
+            curve.setObject(sources[0].node())
+        else:
+            curve.create(plug)
+        keys = values[:, column]
+        if curve.animCurveType == oma.MFnAnimCurve.kAnimCurveTA:
+            keys = np.radians(keys)  # Internal unit of angle curves
+        curve.addKeys(times, om.MDoubleArray(keys.tolist()), oma.MFnAnimCurve.kTangentAuto,
+                      oma.MFnAnimCurve.kTangentAuto, True)
+
+
+###########
+## Match / bake
+###########
+def _solve(root, source, target, frames):
+    """(target nodes, (F, J, 3) rotate values, evaluation seconds)."""
+    if {source, target} != set(CHAINS):
+        raise ValueError(f"Match between the {' and '.join(CHAINS)} chains, not {source} -> {target}")
+    sources, _ = chain_joints(root, source)
+    targets, outside = chain_joints(root, target)
+    nodes = registry.mapping(sources + targets + [outside])
+    missing = [joint for joint in sources + targets + [outside] if joint not in nodes]
+    if missing:
+        raise ValueError(f"Missing joints for {root}: {', '.join(missing)}")
+    target_nodes = [nodes[joint] for joint in targets]
+
+    start = time.perf_counter()
+    worlds = evaluate_world_matrices([nodes[joint] for joint in sources] + [nodes[outside]], frames)
+    evaluated = time.perf_counter() - start
+    index = {joint: i for i, joint in enumerate(targets)}
+    parents = [index.get(parent, -1) for joint, _, parent, _ in guide_template.joint_hierarchy() if joint in index]
+    rotate_axes = np.reshape(cmds.xform(target_nodes, query=True, rotateAxis=True), (-1, 3))
+    joint_orients = [cmds.getAttr(f"{node}.jointOrient")[0] for node in target_nodes]
+    values = solve_rotations(worlds[:, :-1], worlds[:, -1], parents, rotate_axes, joint_orients)
+    return target_nodes, values, evaluated
+
+
+def match_limb(root, source="IK", target="FK"):
+    """Put the target chain of a limb on its source chain at the current frame."""
+    target_nodes, values, _ = _solve(root, source, target, [cmds.currentTime(query=True)])
+    with attr_batch.attribute_batch() as batch:
+        for node, rotate in zip(target_nodes, values[0].tolist()):
+            batch.set(f"{node}.rotate", rotate)
+    return target_nodes
+
+
+def bake_limb(root, source="IK", target="FK", start=None, end=None, step=1.0):
+    """Key the target chain of a limb on its source chain over a frame range.
+
+    The range defaults to the playback range. Returns the timings of the
+    evaluation, solve and key steps, in seconds.
+    """
+    start = cmds.playbackOptions(query=True, minTime=True) if start is None else start
+    end = cmds.playbackOptions(query=True, maxTime=True) if end is None else end
+    frames = np.arange(start, end + step / 2.0, step)
+    begin = time.perf_counter()
+    target_nodes, values, evaluated = _solve(root, source, target, frames)
+    solved = time.perf_counter()
+    write_keys(target_nodes, frames, values)
+    timings = {"evaluate": evaluated, "solve": solved - begin - evaluated,
+               "keys": time.perf_counter() - solved}
+    print(f"[bake] {root} {target} from {source}: {len(frames)} frames, "
+          + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings.items()))
+    return timings
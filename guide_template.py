@@ -0,0 +1,287 @@
+import hashlib
+import json
+
+import numpy as np
+
+###########
+## Biped guide template
+###########
+# Every guide of the biped is described once here. Proportions are the
+# divisors of the loc_base -> loc_top height that used to be hardcoded in the
+# create_*_locator calls (a guide at "distance / 14.17" is stored as 14.17,
+# 0 means the guide sits on that axis).
+#
+# Columns:
+#   name      guide name, the locator is "loc_<name>", the joint "joint_<name>"
+#   stage     window step that creates the guide ("leg", "spine", "arm")
+#   region    body region, used by the presets
+#   mirror    True when the right side is generated by symmetrize
+#   divisors  (x, y, z) divisors of the height
+#   scale     locator display scale at the 180 units reference height
+#   radius    joint radius of the bind joint
+#   parent    parent guide name (None for the root)
+#   chains    extra joint chains built on this guide ("IK", "FK")
+
+REFERENCE_HEIGHT = 180.0
+JOINT_RADIUS = 4
+
+BIPED_GUIDES = (
+    # Legs
+    ("Hips", "leg", "spine", False, (0, 2, 0), 10, 4, None, ()),
+    ("left_thig", "leg", "leg", True, (18, 1.9, 0), 10, 4, "Hips", ("IK", "FK")),
+    ("left_leg", "leg", "leg", True, (16.5, 3.6, -66.6), 10, 4, "left_thig", ("IK", "FK")),
+    ("left_foot", "leg", "leg", True, (14.17, 18.44, -22.5), 10, 4, "left_leg", ("IK", "FK")),
+    ("left_toes", "leg", "leg", True, (14.17, 103.8, 52.2), 10, 4, "left_foot", ("IK", "FK")),
+    ("left_end", "leg", "leg", True, (14.17, 103.8, 17.25), 10, 4, "left_toes", ("IK", "FK")),
+
+    # Spine to head
+    ("Spine_1", "spine", "spine", False, (0, 1.7, 0), 10, 4, "Hips", ()),
+    ("Spine_2", "spine", "spine", False, (0, 1.54, 0), 10, 4, "Spine_1", ()),
+    ("Spine_3", "spine", "spine", False, (0, 1.38, 0), 10, 4, "Spine_2", ()),
+    ("Spine_4", "spine", "spine", False, (0, 1.2, -46.15), 10, 4, "Spine_3", ()),
+    ("neck", "spine", "head", False, (0, 1.13, 814.47), 10, 4, "Spine_4", ()),
+    ("head", "spine", "head", False, (0, 1.071, 106.13), 10, 4, "neck", ()),
+    ("clavicle_right", "spine", "chest", False, (-55.197, 1.224, 124.602), 10, 4, "Spine_4", ()),
+    ("clavicle_left", "spine", "chest", False, (55.197, 1.224, 124.602), 10, 4, "Spine_4", ()),
+    ("pec_right", "spine", "chest", False, (-16.912, 1.363, 12.961), 10, 4, "clavicle_right", ()),
+    ("pec_left", "spine", "chest", False, (16.912, 1.363, 12.961), 10, 4, "clavicle_left", ()),
+
+    # Arms
+    ("left_shoulder", "arm", "arm", True, (12.5, 1.22, -46.15), 10, 4, "clavicle_left", ("IK", "FK")),
+    ("left_forearm", "arm", "arm", True, (4.4, 1.25, -36.73), 10, 4, "left_shoulder", ("IK", "FK")),
+    ("left_hand", "arm", "arm", True, (2.7, 1.23, 114.95), 10, 1, "left_forearm", ("IK", "FK")),
+
+    # Fingers
+    ("left_pinkie_1", "arm", "hand", True, (2.7, 1.22, -656.93), 1, 1, "left_hand", ()),
+    ("left_pinkie_2", "arm", "hand", True, (2.46, 1.23, -156.11), 1, 1, "left_pinkie_1", ()),
+    ("left_pinkie_3", "arm", "hand", True, (2.37, 1.23, -124.13), 1, 1, "left_pinkie_2", ()),
+    ("left_ring_1", "arm", "hand", True, (2.66, 1.22, 188.48), 1, 1, "left_hand", ()),
+    ("left_ring_2", "arm", "hand", True, (2.45, 1.22, 214.54), 1, 1, "left_ring_1", ()),
+    ("left_ring_3", "arm", "hand", True, (2.31, 1.22, 268.255), 1, 1, "left_ring_2", ()),
+    ("left_middle_1", "arm", "hand", True, (2.66, 1.22, 64.31), 1, 1, "left_hand", ()),
+    ("left_middle_2", "arm", "hand", True, (2.45, 1.22, 60.34), 1, 1, "left_middle_1", ()),
+    ("left_middle_3", "arm", "hand", True, (2.29, 1.22, 60.34), 1, 1, "left_middle_2", ()),
+    ("left_index_1", "arm", "hand", True, (2.65, 1.22, 38.46), 1, 1, "left_hand", ()),
+    ("left_index_2", "arm", "hand", True, (2.45, 1.22, 34.38), 1, 1, "left_index_1", ()),
+    ("left_index_3", "arm", "hand", True, (2.32, 1.23, 33.09), 1, 1, "left_index_2", ()),
+    ("left_thumb_1", "arm", "hand", True, (2.7, 1.24, 36.42), 1, 1, "left_hand", ()),
+    ("left_thumb_2", "arm", "hand", True, (2.59, 1.24, 25.07), 1, 1, "left_thumb_1", ()),
+    ("left_thumb_3", "arm", "hand", True, (2.49, 1.25, 20.48), 1, 1, "left_thumb_2", ()),
+)
+
+# Body-type presets: per region (x, y, z) multipliers applied to the
+# proportions, tune them here rather than in the guide functions.
+PRESETS = {
+    "default": {},
+    "child": {
+        "leg": (1.1, 0.92, 1.0),
+        "spine": (1.0, 0.94, 1.0),
+        "chest": (0.9, 0.96, 1.0),
+        "arm": (0.92, 0.96, 1.0),
+        "hand": (0.9, 0.96, 1.0),
+    },
+    "heavy": {
+        "leg": (1.3, 1.0, 1.2),
+        "spine": (1.0, 1.0, 1.35),
+        "chest": (1.3, 1.0, 1.4),
+        "arm": (1.15, 1.0, 1.2),
+        "hand": (1.12, 1.0, 1.1),
+    },
+    "stylized": {
+        "leg": (1.0, 0.85, 1.0),
+        "spine": (1.0, 0.9, 1.0),
+        "head": (1.0, 0.97, 1.5),
+        "chest": (1.2, 0.93, 1.0),
+        "arm": (1.05, 0.93, 1.0),
+        "hand": (1.25, 0.93, 1.2),
+    },
+}
+
+STAGES = ("leg", "spine", "arm")
+
+# Limbs hashed for the incremental rebuild: region -> limb, the side of the
+# guide is prepended ("left_leg"). The clavicles and pecs go with the arms.
+LIMB_REGIONS = {"leg": "leg", "spine": "spine", "head": "spine", "chest": "arm", "arm": "arm", "hand": "hand"}
+BASE_LIMB = "base"  # loc_base and loc_top
+HASH_DECIMALS = 4  # Positions are rounded before hashing and saving
+
+
+def mirror_name(name):
+    """Return the right side name of a left side guide."""
+    if name.endswith("_left"):
+        return name[:-len("_left")] + "_right"
+    return name.replace("left_", "right_")
+
+
+def expand_guides(guides=BIPED_GUIDES):
+    """Return the template with the mirrored right side guides appended."""
+    expanded = list(guides)
+    for name, stage, region, mirror, divisors, scale, radius, parent, chains in guides:
+        if not mirror:
+            continue
+        x, y, z = divisors
+        expanded.append((
+            mirror_name(name), stage, region, False, (-x, y, z), scale, radius,
+            mirror_name(parent) if parent else None, chains,
+        ))
+    return tuple(expanded)
+
+
+def mirrored_parts(stage, guides=BIPED_GUIDES):
+    """Return the part names ("thig", "leg", ...) symmetrized after a stage."""
+    return tuple(g[0].replace("left_", "", 1) for g in guides if g[1] == stage and g[3])
+
+
+def compute_layout(height, stage=None, preset="default", guides=BIPED_GUIDES):
+    """Compute every guide position and scale in one pass.
+
+    Returns (names, positions, scales) where positions is a (N, 3) array in
+    world units and scales is a (N,) array of locator scales.
+    """
+    if preset not in PRESETS:
+        raise KeyError(f"Unknown guide preset '{preset}', expected one of {sorted(PRESETS)}")
+    if stage is not None:
+        guides = tuple(g for g in guides if g[1] == stage)
+
+    names = [g[0] for g in guides]
+    divisors = np.array([g[4] for g in guides], dtype=np.float64).reshape(-1, 3)
+    scales = np.array([g[5] for g in guides], dtype=np.float64)
+
+    factors = PRESETS[preset]
+    multipliers = np.array([factors.get(g[2], (1.0, 1.0, 1.0)) for g in guides],
+                           dtype=np.float64).reshape(-1, 3)
+
+    ratios = np.divide(1.0, divisors, out=np.zeros_like(divisors), where=divisors != 0)
+    positions = ratios * multipliers * height
+    scales = scales * (height / REFERENCE_HEIGHT)
+    return names, positions, scales
+
+
+def bind_locators(guides=BIPED_GUIDES):
+    """Locators of the bind joints CreaJoint builds, in template order."""
+    return [f"loc_{g[0]}" for g in expand_guides(guides)]
+
+
+def sort_hierarchy(parents):
+    """Order a {child: parent} graph so every parent comes before its children.
+
+    Roots have None as parent. The order is depth first (a parent is followed
+    by its whole subtree, children in declaration order) so a chain can be
+    created joint after joint. Raises ValueError on an unknown parent or a
+    cycle, before anything is built.
+    """
+    children = {}
+    roots = []
+    for child, parent in parents.items():
+        if parent is None:
+            roots.append(child)
+        elif parent not in parents:
+            raise ValueError(f"'{child}' has an unknown parent '{parent}'")
+        else:
+            children.setdefault(parent, []).append(child)
+
+    order = []
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(reversed(children.get(node, ())))
+
+    if len(order) != len(parents):
+        # Every node has a single parent, so the unreached ones form cycles
+        cycle = sorted(set(parents) - set(order))
+        raise ValueError(f"Cycle in the joint hierarchy: {', '.join(cycle)}")
+    return order
+
+
+def _chain_members(guides):
+    """{chain: set of guide names} of the "IK"/"FK" chains."""
+    members = {}
+    for g in guides:
+        for chain in g[8]:
+            members.setdefault(chain, set()).add(g[0])
+    return members
+
+
+def joint_hierarchy(guides=BIPED_GUIDES, chains=True):
+    """Every joint to build, parents first.
+
+    Returns a list of (joint, locator, parent joint, radius), the parent is
+    None for the root. Chain joints ("_IK", "_FK") use their chain parent, or
+    the bind joint when the parent is not part of the chain (thig_IK -> Hips),
+    and the radius of their bind joint. chains=False lists the bind joints
+    only, the chains being cloned from them (see joint_chains).
+    """
+    guides = expand_guides(guides)
+    chain_members = _chain_members(guides) if chains else {}
+    # A joint aims at its first child (orientJoint, joint_orient.solve_rotations),
+    # the children continuing the region of their parent come first so the
+    # Hips aim at Spine_1 rather than at a thigh
+    regions = {g[0]: g[2] for g in guides}
+    guides = sorted(guides, key=lambda g: g[7] is not None and regions[g[7]] != g[2])
+
+    joints = {}
+    for name, _, _, _, _, _, radius, parent, _ in guides:
+        joints[f"joint_{name}"] = (f"loc_{name}", f"joint_{parent}" if parent else None, radius)
+    for chain in sorted(chain_members):
+        for name, _, _, _, _, _, radius, parent, chains_ in guides:
+            if chain not in chains_:
+                continue
+            chain_parent = f"{parent}_{chain}" if parent in chain_members[chain] else parent
+            joints[f"joint_{name}_{chain}"] = (
+                f"loc_{name}", f"joint_{chain_parent}" if chain_parent else None, radius)
+
+    order = sort_hierarchy({joint: data[1] for joint, data in joints.items()})
+    return [(joint,) + joints[joint] for joint in order]
+
+
+def joint_chains(guides=BIPED_GUIDES):
+    """Bind sub-chains copied as "IK"/"FK" chains.
+
+    Returns a list of (chain, root joint, member joints): the chain is the
+    copy of the bind joint root and of its descendants in members, named
+    "<joint>_<chain>".
+    """
+    guides = expand_guides(guides)
+    chains = []
+    for chain, members in sorted(_chain_members(guides).items()):
+        member_joints = [f"joint_{g[0]}" for g in guides if g[0] in members]
+        for name, _, _, _, _, _, _, parent, chains_ in guides:
+            if chain in chains_ and parent not in members:
+                chains.append((chain, f"joint_{name}", member_joints))
+    return chains
+
+
+def guide_side(name):
+    """Side of a guide name: "left", "right" or None on the middle line."""
+    for side in ("left", "right"):
+        if name.startswith(f"{side}_") or name.endswith(f"_{side}"):
+            return side
+    return None
+
+
+def guide_limbs(guides=BIPED_GUIDES):
+    """Map every limb ("left_leg", "spine", "right_hand"...) to its locator names."""
+    limbs = {BASE_LIMB: ["loc_base", "loc_top"]}
+    for name, _, region, *_ in expand_guides(guides):
+        limb = LIMB_REGIONS.get(region, region)
+        side = guide_side(name)
+        if side:
+            limb = f"{side}_{limb}"
+        limbs.setdefault(limb, []).append(f"loc_{name}")
+    return limbs
+
+
+def limb_hashes(positions, guides=BIPED_GUIDES):
+    """Content hash of every limb from the {locator: (x, y, z)} positions.
+
+    Positions are rounded to HASH_DECIMALS so a saved and reloaded guide file
+    hashes the same, a limb with a missing guide hashes it as None.
+    """
+    hashes = {}
+    for limb, locators in guide_limbs(guides).items():
+        content = [(locator, None if positions.get(locator) is None
+                    else [round(float(v), HASH_DECIMALS) + 0.0 for v in positions[locator]])
+                   for locator in locators]
+        hashes[limb] = hashlib.sha1(json.dumps(content).encode("utf-8")).hexdigest()[:16]
+    return hashes
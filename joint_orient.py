@@ -0,0 +1,294 @@
+"""Analytic joint orientation, the orientJoint rules solved in one NumPy pass.
+
+A rule is (joints, orientation, secondary_axis, children) with the values of
+`joint -edit -orientJoint`: "xyz"/"yup" for the limbs, "yxz"/"xup" for the
+spine and legs, "none" to align a joint with the world. Rules apply in
+order like the cmds calls did, so the last rule reaching a joint wins:
+
+    joint_orient.orient_hierarchy(hierarchy, rules)
+
+The aim frames of every joint are computed together from the world
+positions, the jointOrient, rotate, rotateAxis and translate values are then
+written in one batch, the joint positions do not move.
+"""
+import maya.cmds as cmds
+import numpy as np
+
+import attr_batch
+import mirror
+
+AXES = "xyz"
+UP_VECTORS = {
+    "xup": (1.0, 0.0, 0.0), "xdown": (-1.0, 0.0, 0.0),
+    "yup": (0.0, 1.0, 0.0), "ydown": (0.0, -1.0, 0.0),
+    "zup": (0.0, 0.0, 1.0), "zdown": (0.0, 0.0, -1.0),
+}
+
+
+###########
+## Math (row vectors, a rotation row is a joint axis in world space)
+###########
+def aim_frames(aims, up, orientation="xyz"):
+    """(N, 3, 3) rotations pointing orientation[0] along aims and orientation[1] toward up.
+
+    When an aim is parallel to up another world axis is used as up.
+    """
+    aims = np.asarray(aims, dtype=np.float64).reshape(-1, 3)
+    aims = aims / np.linalg.norm(aims, axis=1)[:, None]
+    ups = np.broadcast_to(np.asarray(up, dtype=np.float64), aims.shape)
+    secondary = ups - np.einsum("ij,ij->i", ups, aims)[:, None] * aims
+    degenerate = np.linalg.norm(secondary, axis=1) < 1e-8
+    if degenerate.any():
+        alternate = np.where(np.abs(aims[:, 2:3]) < 0.9, (0.0, 0.0, 1.0), (1.0, 0.0, 0.0))
+        alternate = alternate - np.einsum("ij,ij->i", alternate, aims)[:, None] * aims
+        secondary = np.where(degenerate[:, None], alternate, secondary)
+    secondary = secondary / np.linalg.norm(secondary, axis=1)[:, None]
+
+    first, second, third = (AXES.index(axis) for axis in orientation)
+    frames = np.zeros((len(aims), 3, 3))
+    frames[:, first] = aims
+    frames[:, second] = secondary
+    # Right-handed frame: row i = row (i + 1) x row (i + 2)
+    frames[:, third] = np.cross(frames[:, (third + 1) % 3], frames[:, (third + 2) % 3])
+    return frames
+
+
+def euler_xyz(rotations):
+    """xyz euler angles in degrees of (N, 3, 3) rotation matrices."""
+    m = np.asarray(rotations, dtype=np.float64).reshape(-1, 3, 3)
+    y = np.arcsin(np.clip(-m[:, 0, 2], -1.0, 1.0))
+    regular = np.abs(m[:, 0, 2]) < 0.999999
+    x = np.where(regular, np.arctan2(m[:, 1, 2], m[:, 2, 2]), np.arctan2(-m[:, 2, 1], m[:, 1, 1]))
+    z = np.where(regular, np.arctan2(m[:, 0, 1], m[:, 0, 0]), 0.0)  # Gimbal lock, all on x
+    return np.degrees(np.stack([x, y, z], axis=1))
+
+
+def euler_rotations(angles):
+    """(N, 3, 3) rotation matrices of xyz euler angles in degrees, see euler_xyz."""
+    x, y, z = np.radians(np.asarray(angles, dtype=np.float64).reshape(-1, 3)).T
+    cx, sx, cy, sy, cz, sz = np.cos(x), np.sin(x), np.cos(y), np.sin(y), np.cos(z), np.sin(z)
+    return np.stack([
+        np.stack([cy * cz, cy * sz, -sy], axis=1),
+        np.stack([sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy], axis=1),
+        np.stack([cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy], axis=1),
+    ], axis=1)
+
+
+def rotation_rows(matrices):
+    rows = matrices[:, :3, :3]
+    return rows / np.linalg.norm(rows, axis=2)[:, :, None]
+
+
+###########
+## Solver
+###########
+def apply_rules(joints, children, rules):
+    """Orientation history of every joint reached by the rules.
+
+    Returns {joint: [(step, orientation, secondary_axis), ...]} where step is
+    the rule index, children maps a joint to its child joints.
+    """
+    known = set(joints)
+    history = {}
+    for step, (rule_joints, orientation, secondary_axis, recursive) in enumerate(rules):
+        for joint in rule_joints:
+            if joint not in known:
+                cmds.warning(f"Joint {joint} not found.")
+                continue
+            stack = [joint]
+            while stack:
+                current = stack.pop()
+                history.setdefault(current, []).append((step, orientation, secondary_axis))
+                if recursive:
+                    stack.extend(children.get(current, ()))
+    return history
+
+
+def solve(joints, parents, matrices, rules, parent_matrices=None):
+    """Compute the orientation of every joint without touching the scene.
+
+    joints are ordered parents first, parents maps each joint to its parent
+    (None at the world), matrices are the (N, 4, 4) current world matrices.
+    parent_matrices holds the world matrix of parents that are not in
+    joints. Returns (joint_orients, translates), (N, 3) arrays of the
+    jointOrient in degrees and the translate keeping every joint in place,
+    rotate and rotateAxis are zero.
+    """
+    rotations = solve_rotations(joints, parents, matrices, rules, parent_matrices)
+    return local_values(joints, parents, matrices[:, 3, :3], rotations, parent_matrices)
+
+
+def solve_rotations(joints, parents, matrices, rules, parent_matrices=None):
+    """(N, 3, 3) world rotations of the joints once every rule is applied, see solve."""
+    index = {joint: i for i, joint in enumerate(joints)}
+    children = {}
+    for joint in joints:
+        if parents.get(joint) in index:
+            children.setdefault(parents[joint], []).append(joint)
+    positions = matrices[:, 3, :3]
+    current = rotation_rows(matrices)
+
+    # Aim frames of every joint with a child joint, one pass per convention.
+    # A joint aims at its first child like orientJoint.
+    aimed = [joint for joint in joints if joint in children
+             and np.linalg.norm(positions[index[children[joint][0]]] - positions[index[joint]]) > 1e-8]
+    aimed_ids = np.array([index[joint] for joint in aimed], dtype=int)
+    aims = np.array([positions[index[children[joint][0]]] for joint in aimed]).reshape(-1, 3)
+    aims = aims - positions[aimed_ids]
+    frames = {}
+    for orientation, secondary_axis in {(rule[1], rule[2]) for rule in rules if rule[1] != "none"}:
+        solved = aim_frames(aims, UP_VECTORS[secondary_axis], orientation)
+        frames.update(((joint, orientation, secondary_axis), frame) for joint, frame in zip(aimed, solved))
+
+    history = apply_rules(joints, children, rules)
+    external = {}
+    for parent, matrix in (parent_matrices or {}).items():
+        external[parent] = rotation_rows(np.asarray(matrix, dtype=np.float64).reshape(1, 4, 4))[0]
+
+    def parent_rotation(joint, step):
+        parent = parents.get(joint)
+        if parent in index:
+            return rotation(parent, step)
+        return external.get(parent, np.eye(3))
+
+    cache = {}
+
+    def rotation(joint, step=len(rules)):
+        """World rotation of a joint once the rules up to step are applied."""
+        applied = [entry for entry in history.get(joint, ()) if entry[0] <= step]
+        if not applied:
+            return current[index[joint]]
+        last_step, orientation, secondary_axis = applied[-1]
+        key = (joint, last_step)
+        if key not in cache:
+            if orientation == "none":
+                cache[key] = np.eye(3)
+            else:
+                # Joints without a child to aim at follow their parent
+                frame = frames.get((joint, orientation, secondary_axis))
+                cache[key] = frame if frame is not None else parent_rotation(joint, last_step)
+        return cache[key]
+
+    return np.array([rotation(joint) for joint in joints]).reshape(-1, 3, 3)
+
+
+def local_values(joints, parents, positions, rotations, parent_matrices=None):
+    """jointOrient and translate placing each joint at a world position and rotation.
+
+    positions and rotations are the (N, 3) and (N, 3, 3) targets in world
+    space, parent_matrices holds the world matrix of the parents that are not
+    in joints (the world when missing). Returns (joint_orients, translates)
+    like solve.
+    """
+    index = {joint: i for i, joint in enumerate(joints)}
+    external = {}
+    for parent, matrix in (parent_matrices or {}).items():
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(1, 4, 4)
+        external[parent] = (rotation_rows(matrix)[0], matrix[0, 3, :3])
+    world = (np.eye(3), np.zeros(3))
+    parent_rotations = np.array([
+        rotations[index[parents[joint]]] if parents.get(joint) in index
+        else external.get(parents.get(joint), world)[0]
+        for joint in joints]).reshape(-1, 3, 3)
+    parent_positions = np.array([
+        positions[index[parents[joint]]] if parents.get(joint) in index
+        else external.get(parents.get(joint), world)[1]
+        for joint in joints]).reshape(-1, 3)
+
+    joint_orients = euler_xyz(rotations @ np.transpose(parent_rotations, (0, 2, 1)))
+    translates = np.einsum("ij,ikj->ik", positions - parent_positions, parent_rotations)
+    return joint_orients, translates
+
+
+def plane_frames(chain, plane, current=None):
+    """Frames of a joint chain lying in the plane of three points.
+
+    chain is the (N, 3) positions of the chain, every joint but the last aims
+    x at the next one with y along the plane normal, the last one copies the
+    previous frame. The normal is flipped to stay on the side of the current
+    y axes when given, so an oriented chain does not flip.
+    """
+    chain = np.asarray(chain, dtype=np.float64).reshape(-1, 3)
+    a, b, c = np.asarray(plane, dtype=np.float64).reshape(3, 3)
+    normal = np.cross(b - a, c - a)
+    if np.linalg.norm(normal) < 1e-8:
+        raise ValueError("The plane points are aligned")
+    if current is not None and np.dot(normal, np.asarray(current)[:, 1].sum(axis=0)) < 0:
+        normal = -normal
+    frames = aim_frames(chain[1:] - chain[:-1], normal, "xyz")
+    return np.concatenate([frames, frames[-1:]])
+
+
+###########
+## Scene IO
+###########
+def write_orientations(joints, joint_orients, translates, roots=()):
+    """Write jointOrient, translate and reset rotate/rotateAxis of every joint.
+
+    Without undo (farm builds) everything goes through one DG modifier,
+    otherwise a setAttr and an xform per joint keep the edit undoable.
+    Translates of the roots are left untouched.
+    """
+    roots = set(roots)
+    if attr_batch.use_modifier():
+        with attr_batch.attribute_batch(modifier=True) as batch:
+            for joint, joint_orient, translate in zip(joints, joint_orients.tolist(), translates.tolist()):
+                batch.set(f"{joint}.jointOrient", joint_orient)
+                batch.set(f"{joint}.rotate", 0.0, 0.0, 0.0)
+                batch.set(f"{joint}.rotateAxis", 0.0, 0.0, 0.0)
+                if joint not in roots:
+                    batch.set(f"{joint}.translate", translate)
+        return
+
+    for joint, joint_orient, translate in zip(joints, joint_orients.tolist(), translates.tolist()):
+        cmds.setAttr(f"{joint}.jointOrient", *joint_orient)
+        if joint in roots:
+            cmds.xform(joint, rotation=(0, 0, 0), rotateAxis=(0, 0, 0))
+        else:
+            cmds.xform(joint, rotation=(0, 0, 0), rotateAxis=(0, 0, 0), translation=translate)
+
+
+def orient_hierarchy(hierarchy, rules):
+    """Orient a joint hierarchy with orientJoint rules in one pass.
+
+    hierarchy is a parents first list of (joint, parent), missing joints are
+    skipped. Returns the list of oriented joints.
+    """
+    existing = set(cmds.ls([joint for joint, _ in hierarchy]) or [])
+    hierarchy = [(joint, parent) for joint, parent in hierarchy if joint in existing]
+    if not hierarchy:
+        return []
+    joints = [joint for joint, _ in hierarchy]
+    parents = dict(hierarchy)
+    roots = [joint for joint, parent in hierarchy if parent not in parents]
+    outside = sorted({parents[root] for root in roots if parents[root] is not None})
+    parent_matrices = dict(zip(outside, mirror.read_world_matrices(outside))) if outside else None
+
+    joint_orients, translates = solve(joints, parents, mirror.read_world_matrices(joints), rules, parent_matrices)
+    write_orientations(joints, joint_orients, translates, roots)
+    print(f"Oriented {len(joints)} joints")
+    return joints
+
+
+def orient_in_plane(chain, plane):
+    """Orient a joint chain in the plane of three nodes (hand, index, thumb).
+
+    The first joint keeps its position under its parent, the others are
+    moved back to their world position. Returns the oriented joints.
+    """
+    missing = [node for node in list(chain) + list(plane) if not cmds.objExists(node)]
+    if missing:
+        cmds.warning(f"Orientation skipped for {chain[0]}, not found: {', '.join(missing)}")
+        return []
+    parent = (cmds.listRelatives(chain[0], parent=True) or [None])[0]
+    nodes = list(chain) + list(plane) + ([parent] if parent else [])
+    matrices = mirror.read_world_matrices(nodes)
+    count = len(chain)
+    positions = matrices[:count, 3, :3]
+    rotations = plane_frames(positions, matrices[count:count + 3, 3, :3], rotation_rows(matrices[:count]))
+
+    parents = {joint: previous for previous, joint in zip([parent] + list(chain[:-1]), chain)}
+    parent_matrices = {parent: matrices[-1]} if parent else None
+    joint_orients, translates = local_values(list(chain), parents, positions, rotations, parent_matrices)
+    write_orientations(list(chain), joint_orients, translates, roots=chain[:1])
+    return list(chain)
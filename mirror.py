@@ -0,0 +1,166 @@
+import maya.cmds as cmds
+import numpy as np
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:  # Standalone backends without the API
+    om = None
+
+import attr_batch
+import joint_orient
+
+# Mirror planes by name: (normal, distance of the plane to the origin)
+PLANES = {
+    "YZ": ((1.0, 0.0, 0.0), 0.0),
+    "XY": ((0.0, 0.0, 1.0), 0.0),
+    "XZ": ((0.0, 1.0, 0.0), 0.0),
+}
+
+
+###########
+## Math
+###########
+def reflection_matrices(plane="YZ"):
+    """Return (local, world) 4x4 reflections for a plane name or (normal, distance).
+
+    Maya matrices are row vectors (world = local @ matrix), a world matrix M
+    mirrors to local @ M @ world, the local reflection flips the same axis
+    in the child frame so the result stays a proper rotation.
+    """
+    normal, distance = PLANES[plane] if isinstance(plane, str) else plane
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    householder = np.eye(3) - 2.0 * np.outer(normal, normal)
+
+    local = np.eye(4)
+    local[:3, :3] = householder
+    world = local.copy()
+    world[3, :3] = 2.0 * distance * normal
+    return local, world
+
+
+def mirror_matrices(matrices, plane="YZ"):
+    """Mirror (N, 4, 4) world matrices across a plane in one pass."""
+    local, world = reflection_matrices(plane)
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    return local @ matrices @ world
+
+
+###########
+## Scene IO
+###########
+def read_world_matrices(nodes):
+    """World matrices of nodes as a (N, 4, 4) array.
+
+    Uses a single selection list through the API when available, falls back
+    to one xform query per node.
+    """
+    if om is not None:
+        selection = om.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+        flat = [list(selection.getDagPath(i).inclusiveMatrix()) for i in range(len(nodes))]
+    else:
+        flat = [cmds.xform(node, query=True, matrix=True, worldSpace=True) for node in nodes]
+    return np.asarray(flat, dtype=np.float64).reshape(-1, 4, 4)
+
+
+def local_channels(matrices, parent_matrices):
+    """(translates, rotations, scales) of (N, 4, 4) world matrices under
+    parent world matrices, rotations as xyz euler angles in degrees."""
+    local = matrices @ np.linalg.inv(parent_matrices)
+    scales = np.linalg.norm(local[:, :3, :3], axis=2)
+    rotations = joint_orient.euler_xyz(local[:, :3, :3] / scales[:, :, None])
+    return local[:, 3, :3], rotations, scales
+
+
+def write_world_matrices(nodes, matrices):
+    """Set the world matrix of each node.
+
+    Without undo (farm builds) the matrices are made local to the parents
+    (their new matrix when they are written too) and written as translate,
+    rotate (jointOrient for joints, rotate order xyz) and scale through one
+    attribute batch, otherwise one undoable xform per node.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    if not attr_batch.use_modifier():
+        for node, matrix in zip(nodes, matrices.reshape(-1, 16).tolist()):
+            cmds.xform(node, matrix=matrix, worldSpace=True)
+        return
+
+    selection = om.MSelectionList()
+    for node in nodes:
+        selection.add(node)
+    paths = [selection.getDagPath(i) for i in range(len(nodes))]
+    index = {path.fullPathName(): i for i, path in enumerate(paths)}
+    parents = []
+    for path in paths:
+        parent = om.MDagPath(path).pop().fullPathName()
+        parents.append(matrices[index[parent]] if parent in index else list(path.exclusiveMatrix()))
+    parents = np.asarray(parents, dtype=np.float64).reshape(-1, 4, 4)
+    translates, rotations, scales = local_channels(matrices, parents)
+    joints = set(cmds.ls(nodes, type="joint") or [])
+    with attr_batch.attribute_batch(modifier=True) as batch:
+        for node, translate, rotate, scale in zip(nodes, translates.tolist(), rotations.tolist(), scales.tolist()):
+            batch.set(f"{node}.translate", translate)
+            batch.set(f"{node}.scale", scale)
+            if node in joints:
+                batch.set(f"{node}.jointOrient", rotate)
+                batch.set(f"{node}.rotate", 0.0, 0.0, 0.0)
+            else:
+                batch.set(f"{node}.rotate", rotate)
+
+
+def duplicate_nodes(sources, names):
+    """Duplicate sources and name the copies, returns the names.
+
+    Sources under another source are not duplicated twice: only the topmost
+    ones are, in one call, and the copies of the others are found at the
+    same place in the duplicated hierarchy.
+    """
+    paths = {path.split("|")[-1]: path for path in cmds.ls(sources, long=True) or []}
+    paths = [paths[source.split("|")[-1]] for source in sources]
+    roots = [path for path in paths if not any(path.startswith(other + "|") for other in paths)]
+    copies = dict(zip(roots, cmds.duplicate(roots, renameChildren=True, returnRootsOnly=True)))
+    for root in roots:
+        if any(path.startswith(root + "|") for path in paths):
+            # An exact copy lists its descendants in the same order
+            copies.update(zip(cmds.listRelatives(root, allDescendents=True, fullPath=True) or [],
+                              cmds.listRelatives(copies[root], allDescendents=True, fullPath=True) or []))
+    # Deepest first, renaming a node changes the path of its descendants
+    order = sorted(range(len(paths)), key=lambda i: -paths[i].count("|"))
+    renamed = {i: cmds.rename(copies[paths[i]], names[i]) for i in order}
+    return [renamed[i] for i in range(len(paths))]
+
+
+###########
+## Mirroring
+###########
+def mirror_nodes(sources, targets, plane="YZ", update_only=False):
+    """Mirror every source node onto its target node in bulk.
+
+    Missing targets are duplicated from their source (see duplicate_nodes), unless
+    update_only is set in which case they are skipped. Existing targets are
+    only moved, so connections and user attributes on them are kept.
+    Returns the list of targets that were written.
+    """
+    sources = list(sources)
+    targets = list(targets)
+    missing = set(targets) - set(cmds.ls(targets) or [])
+    if update_only:
+        for target in sorted(missing):
+            cmds.warning(f"{target} not found, skipped in update mode.")
+        pairs = [(s, t) for s, t in zip(sources, targets) if t not in missing]
+    else:
+        pairs = list(zip(sources, targets))
+        to_create = [(s, t) for s, t in pairs if t in missing]
+        if to_create:
+            duplicate_nodes([s for s, _ in to_create], [t for _, t in to_create])
+    if not pairs:
+        return []
+
+    matrices = mirror_matrices(read_world_matrices([s for s, _ in pairs]), plane)
+    written = [t for _, t in pairs]
+    write_world_matrices(written, matrices)
+    print(f"Mirrored {len(written)} nodes across {plane}")
+    return written
@@ -0,0 +1,114 @@
+"""Nodes of the build recorded by role, resolved without name lookups.
+
+    from node_registry import registry
+    group = registry.register("Locator_grp", cmds.group(locators, name="Locator_grp"))
+    cmds.hide(registry.get("Locator_grp"))
+
+A role is the name the build intends to give the node ("joint_left_hand",
+"Locator_grp", "root_Ctrl"). The registry keeps a persistent handle on the
+node actually created, which may have another name when the scene already
+had one, and gives back its current name even after a rename:
+
+- with the Maya API an MObjectHandle, resolved in memory without any command;
+- otherwise the node UUID, a batch of roles is resolved with two ls calls.
+
+Roles that were not registered (rigs built before the registry, a rebuild
+in a new session) resolve to their own name, so existing scenes keep
+working.
+"""
+import maya.cmds as cmds
+
+try:
+    import maya.api.OpenMaya as om
+except ImportError:  # Standalone backends without the API
+    om = None
+
+
+class NodeRegistry:
+    """Handles of the created nodes by role."""
+
+    def __init__(self):
+        self.handles = {}  # role -> MObjectHandle, or UUID without the API
+
+    def __contains__(self, role):
+        return role in self.handles
+
+    def __len__(self):
+        return len(self.handles)
+
+    def clear(self):
+        """Forget every node, at the start of a new build."""
+        self.handles.clear()
+
+    def register(self, role, node):
+        """Record node under role, returns node."""
+        self.register_many([role], [node])
+        return node
+
+    def register_many(self, roles, nodes):
+        """Record nodes under their roles in one pass, returns nodes."""
+        roles, nodes = list(roles), list(nodes)
+        if not nodes:
+            return nodes
+        if om is not None:
+            selection = om.MSelectionList()
+            for node in nodes:
+                selection.add(node)
+            handles = [om.MObjectHandle(selection.getDependNode(i)) for i in range(len(nodes))]
+        else:
+            handles = cmds.ls(nodes, uuid=True) or []
+            if len(handles) != len(nodes):
+                raise ValueError(f"Cannot register missing nodes: {', '.join(nodes)}")
+        self.handles.update(zip(roles, handles))
+        return nodes
+
+    def get(self, role):
+        """Current name of the node of role, None when it was deleted."""
+        return self.names([role])[0]
+
+    def names(self, roles):
+        """Current names of the nodes of roles, in order.
+
+        Unregistered roles are returned as they are, deleted nodes as None.
+        """
+        roles = list(roles)
+        if om is not None:
+            return [self._api_name(role) for role in roles]
+        uuids = list(dict.fromkeys(self.handles[role] for role in roles if role in self.handles))
+        resolved = {}
+        if uuids:
+            # ls keeps neither the order of its arguments nor one name per UUID
+            # (deleted nodes are dropped, instances give several paths): the
+            # names are mapped back to their UUID, one UUID per call when they
+            # do not line up
+            found = cmds.ls(uuids) or []
+            if found and (cmds.ls(found, uuid=True) or []) == uuids:
+                resolved = dict(zip(uuids, found))
+            else:
+                resolved = {uuid: (cmds.ls(uuid) or [None])[0] for uuid in uuids}
+        deleted = [role for role in roles if role in self.handles and resolved[self.handles[role]] is None]
+        if deleted:
+            cmds.warning(f"Registered nodes deleted: {', '.join(deleted)}")
+        return [resolved[self.handles[role]] if role in self.handles else role for role in roles]
+
+    def _api_name(self, role):
+        handle = self.handles.get(role)
+        if handle is None:
+            return role
+        if not handle.isValid():
+            return None
+        node = handle.object()
+        if node.hasFn(om.MFn.kDagNode):
+            return om.MFnDagNode(node).partialPathName()
+        return om.MFnDependencyNode(node).name()
+
+    def mapping(self, roles):
+        """{role: current name} of the roles whose node exists."""
+        roles = list(roles)
+        unregistered = [role for role in roles if role not in self.handles]
+        existing = set(cmds.ls(unregistered) or []) if unregistered else set()
+        return {role: name for role, name in zip(roles, self.names(roles))
+                if name is not None and (role in self.handles or role in existing)}
+
+
+registry = NodeRegistry()  # Shared by the build stages
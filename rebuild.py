@@ -0,0 +1,121 @@
+"""Incremental rebuild: regenerate only the limbs whose guides changed.
+
+After a model change, move the guide locators (or load a guide file) and
+run:
+
+    import rebuild
+    rebuild.rebuild()                           # guides as placed in the scene
+    rebuild.rebuild("character_guides.json")    # guides from a file
+
+Every limb (left leg, spine, left hand fingers...) is hashed from its guide
+positions, CreaJoint stores the hashes of the build on Locator_grp. Only the
+joints of changed limbs are moved and re-oriented, with their parents (which
+aim at them) and children (which stay where they are), the other chains are
+not touched.
+"""
+import maya.cmds as cmds
+import numpy as np
+
+import autorig2
+import batch_build
+import build_context
+import guide_template
+import joint_orient
+import mirror
+from node_registry import registry
+
+
+def changed_limbs(hashes, stored):
+    """Limbs whose hash differs from the stored one, in template order."""
+    return [limb for limb, value in hashes.items()
+            if limb != guide_template.BASE_LIMB and stored.get(limb) != value]
+
+
+def load_guides(guide_path):
+    """Move the guide locators to a guide file, the right side guides missing
+    from the file are mirrored from the left like symmetrize does."""
+    positions = batch_build.read_guide_file(guide_path)["positions"]
+    batch_build.apply_guides(positions)
+    pairs = [(f"loc_{guide[0]}", f"loc_{guide_template.mirror_name(guide[0])}")
+             for guide in guide_template.BIPED_GUIDES if guide[3]]
+    pairs = [(left, right) for left, right in pairs if right not in positions]
+    if pairs:
+        mirror.mirror_nodes([left for left, _ in pairs], [right for _, right in pairs],
+                            autorig2.symmetry_plane(), update_only=True)
+
+
+def update_joints(limbs, positions):
+    """Move and re-orient the joints of limbs to the guide positions.
+
+    Returns the list of joints written.
+    """
+    limb_locators = guide_template.guide_limbs()
+    dirty_locators = {locator for limb in limbs for locator in limb_locators[limb]}
+    hierarchy = [(joint, locator, parent) for joint, locator, parent, _ in guide_template.joint_hierarchy()]
+    existing = registry.mapping(joint for joint, _, _ in hierarchy)
+    hierarchy = [entry for entry in hierarchy if entry[0] in existing]
+    joints = [joint for joint, _, _ in hierarchy]
+    nodes = [existing[joint] for joint in joints]
+    parents = {joint: parent for joint, _, parent in hierarchy}
+    children = {}
+    for joint, _, parent in hierarchy:
+        children.setdefault(parent, []).append(joint)
+
+    matrices = mirror.read_world_matrices(nodes)
+    dirty = set()
+    for i, (joint, locator, _) in enumerate(hierarchy):
+        if locator in dirty_locators and positions.get(locator) is not None:
+            matrices[i, 3, :3] = positions[locator]
+            dirty.add(joint)
+    if not dirty:
+        return []
+
+    # Parents aim at the moved joints and leaves follow their parent, they are
+    # solved again. Every other joint keeps its current world rotation.
+    solved = dirty | {parents[joint] for joint in dirty if parents[joint] in existing}
+    solved |= {child for joint in solved for child in children.get(joint, ()) if child not in children}
+    rotations = joint_orient.solve_rotations(joints, parents, matrices, autorig2.ORIENT_RULES)
+    current = joint_orient.rotation_rows(matrices)
+    keep = np.array([joint not in solved for joint in joints])
+    rotations[keep] = current[keep]
+    # IK/FK joints are copies of their bind joint
+    index = {joint: i for i, joint in enumerate(joints)}
+    for i, (joint, locator, _) in enumerate(hierarchy):
+        bind = f"joint_{locator[len('loc_'):]}"
+        if joint in solved and bind != joint and bind in index:
+            rotations[i] = rotations[index[bind]]
+
+    joint_orients, translates = joint_orient.local_values(joints, parents, matrices[:, 3, :3], rotations)
+    written = solved | {child for joint in solved for child in children.get(joint, ())}
+    ids = [i for i, joint in enumerate(joints) if joint in written]
+    joint_orient.write_orientations([nodes[i] for i in ids], joint_orients[ids], translates[ids])
+    return [nodes[i] for i in ids]
+
+
+def rebuild(guide_path=None):
+    """Rebuild the limbs whose guides changed since the last build.
+
+    Returns the list of rebuilt limbs.
+    """
+    if guide_path:
+        load_guides(guide_path)
+    positions = batch_build.read_guide_positions()
+    stored = autorig2.stored_guide_hashes()
+    if not stored:
+        cmds.warning("No guide hashes on Locator_grp, run the full build first.")
+        return []
+    limbs = changed_limbs(guide_template.limb_hashes(positions), stored)
+    if not limbs:
+        print("Guides unchanged, nothing to rebuild")
+        return []
+
+    with build_context.build_transaction("rebuild"):
+        written = update_joints(limbs, positions)
+        # The thumbs have their own orientation, from the hand and index guides
+        sides = sorted({limb.split("_")[0] for limb in limbs if limb.endswith(("_hand", "_arm"))})
+        if sides:
+            autorig2.orient_thumbs(sides)
+            autorig2.orient_thumb_ends(sides)
+        autorig2.store_guide_hashes(positions)
+    print(f"Rebuilt {', '.join(limbs)}: {len(written)} joints updated")
+    return limbs
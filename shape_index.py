@@ -0,0 +1,217 @@
+"""On-disk index of a control shape library.
+
+The index maps every shape name ("zoo_shapes/godnode_reg") and tag to its
+source file, its byte range in the library pack when there is one, and
+precomputed CV count and bounding box. It is stored next to the shapes in
+INDEX_FILE and refreshed incrementally: only files whose mtime or size
+changed are parsed again.
+
+Tags come from the folder names, the words of the file name and the
+optional TAGS_FILE ({"zoo_shapes/godnode_reg": ["root", "world"]}).
+"""
+import json
+import os
+
+from shape_pack import PACK_EXT, ShapePack, iter_shape_files, parse_shape_file, shape_name_from_path
+
+INDEX_FILE = ".shape_index.json"
+TAGS_FILE = "tags.json"
+INDEX_VERSION = 1
+
+
+def normalize_name(name):
+    """Library name with "/" separators and without the .shape extension."""
+    name = name.replace("\\", "/").strip("/")
+    if name.endswith(".shape"):
+        name = name[:-len(".shape")]
+    return name
+
+
+def default_tags(name):
+    """Tags derived from a name: its folders and the words of the file name."""
+    parts = name.split("/")
+    tags = set(parts[:-1])
+    tags.update(word for word in parts[-1].split("_") if word)
+    return tags
+
+
+def shape_metadata(shapes):
+    """CV count, curve count and bounding box of parsed shapes."""
+    cv_count = 0
+    bbox_min = [float("inf")] * 3
+    bbox_max = [float("-inf")] * 3
+    for shape in shapes.values():
+        cv_count += len(shape["cvs"])
+        for cv in shape["cvs"]:
+            for axis in range(3):
+                bbox_min[axis] = min(bbox_min[axis], cv[axis])
+                bbox_max[axis] = max(bbox_max[axis], cv[axis])
+    if not cv_count:
+        bbox_min = bbox_max = [0.0, 0.0, 0.0]
+    return {"cv_count": cv_count, "curve_count": len(shapes), "bbox": [bbox_min, bbox_max]}
+
+
+class ShapeIndex:
+    """Name and tag lookup over a shape library folder."""
+
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.entries = {}  # name -> entry dict
+        self._by_basename = {}
+        self._by_tag = {}
+
+    @property
+    def path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    @property
+    def pack_path(self):
+        return self.root + PACK_EXT
+
+    ###########
+    ## Persistence
+    ###########
+    @classmethod
+    def open(cls, root, refresh=True):
+        """Load the index of a library from disk, refreshing it when asked."""
+        index = cls(root)
+        try:
+            with open(index.path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") == INDEX_VERSION:
+                index.entries = data["entries"]
+        except (OSError, ValueError):
+            pass
+        if refresh:
+            index.refresh()
+        else:
+            index._build_lookups()
+        return index
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, file, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """Bring the index up to date with the library, parsing only changed files.
+
+        Returns the number of entries added, updated or removed.
+        """
+        tags_file = self._read_tags()
+        pack = self._open_pack()
+        changed = 0
+        seen = set()
+        for file_path in iter_shape_files(self.root):
+            name = shape_name_from_path(file_path, self.root)
+            seen.add(name)
+            stat = os.stat(file_path)
+            entry = self.entries.get(name)
+            if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                try:
+                    shapes = parse_shape_file(file_path)
+                except (OSError, ValueError) as e:
+                    print(f"Skipped {file_path}: {e}")
+                    continue
+                entry = {
+                    "file": os.path.relpath(file_path, self.root).replace(os.sep, "/"),
+                    "mtime": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                }
+                entry.update(shape_metadata(shapes))
+                self.entries[name] = entry
+                changed += 1
+            tags = sorted(default_tags(name) | set(tags_file.get(name, ())))
+            offset = self._pack_range(pack, name)
+            if entry.get("tags") != tags or entry.get("pack_range") != offset:
+                entry["tags"] = tags
+                entry["pack_range"] = offset
+                changed += 1
+
+        for name in set(self.entries) - seen:
+            del self.entries[name]
+            changed += 1
+
+        self._build_lookups()
+        if changed:
+            self.save()
+        return changed
+
+    def _read_tags(self):
+        try:
+            with open(os.path.join(self.root, TAGS_FILE), 'r') as file:
+                return {normalize_name(name): tags for name, tags in json.load(file).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _open_pack(self):
+        try:
+            return ShapePack(self.pack_path)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _pack_range(pack, name):
+        """[byte offset, byte length] of a shape CVs in the pack, or None."""
+        if pack is None or name not in pack:
+            return None
+        curves = pack.files[name]
+        if not curves:
+            return None
+        start = pack.data_offset + curves[0]["cv_offset"] * 12
+        return [start, sum(curve["cv_count"] for curve in curves) * 12]
+
+    def _build_lookups(self):
+        self._by_basename = {}
+        self._by_tag = {}
+        for name, entry in self.entries.items():
+            self._by_basename.setdefault(name.rsplit("/", 1)[-1], []).append(name)
+            for tag in entry.get("tags", ()):
+                self._by_tag.setdefault(tag, []).append(name)
+
+    ###########
+    ## Queries
+    ###########
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return sorted(self.entries)
+
+    def tags(self):
+        return sorted(self._by_tag)
+
+    def resolve(self, name):
+        """Canonical name of a shape from a full name, any separator, or a unique file name."""
+        name = normalize_name(name)
+        if name in self.entries:
+            return name
+        matches = self._by_basename.get(name, [])
+        if len(matches) == 1:
+            return matches[0]
+        return None
+
+    def get(self, name):
+        """Index entry of a shape, None when it is not in the library."""
+        name = self.resolve(name)
+        return self.entries[name] if name is not None else None
+
+    def file_path(self, name):
+        """Absolute path of the .shape file of a shape."""
+        entry = self.get(name)
+        if entry is None:
+            raise KeyError(f"Shape '{name}' not found in {self.root}")
+        return os.path.join(self.root, *entry["file"].split("/"))
+
+    def find(self, *tags):
+        """Names of the shapes carrying every given tag."""
+        if not tags:
+            return self.names()
+        result = set(self._by_tag.get(tags[0], ()))
+        for tag in tags[1:]:
+            result &= set(self._by_tag.get(tag, ()))
+        return sorted(result)
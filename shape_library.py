@@ -0,0 +1,284 @@
+import maya.cmds as cmds
+import os
+from collections import OrderedDict
+
+from attr_batch import attribute_batch
+from shape_index import ShapeIndex
+from shape_pack import PACK_EXT, ShapePack, pack_library, parse_shape_file
+
+CTRL_LIB = "ControlShape"  # Folder where controlShapes are located
+CACHE_SIZE = 256  # Parsed shape files kept in memory
+
+
+###########
+## Shape cache
+###########
+class ShapeCache:
+    """LRU cache of parsed control shape files, keyed by path and mtime.
+
+    A file whose mtime changed since it was parsed is read again, so editing
+    a .shape on disk is picked up without restarting Maya.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (mtime, shapes)
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0, "evictions": 0, "pack_hits": 0}
+
+    def get(self, file_path):
+        """Return the parsed shapes of a file, reading it only when needed."""
+        file_path = os.path.normpath(file_path)
+        mtime = os.stat(file_path).st_mtime_ns
+        entry = self._entries.get(file_path)
+        if entry is not None and entry[0] == mtime:
+            self._entries.move_to_end(file_path)
+            self.stats["hits"] += 1
+            return entry[1]
+
+        if entry is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["reloads"] += 1
+        shapes = parse_shape_file(file_path)
+        self._entries[file_path] = (mtime, shapes)
+        self._entries.move_to_end(file_path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        return shapes
+
+    def invalidate(self, file_path=None):
+        """Drop one file, or the whole cache when no path is given."""
+        if file_path is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(os.path.normpath(file_path), None)
+
+    def report(self):
+        """Return the hit/miss statistics with the current cache size."""
+        hits = self.stats["hits"] + self.stats["pack_hits"]
+        lookups = hits + self.stats["misses"] + self.stats["reloads"]
+        hit_rate = hits / lookups if lookups else 0.0
+        return dict(self.stats, entries=len(self._entries), hit_rate=hit_rate)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, file_path):
+        return os.path.normpath(file_path) in self._entries
+
+shape_cache = ShapeCache()
+
+
+###########
+## Library paths
+###########
+_user_script_dir = None
+
+def library_dir(directory=CTRL_LIB):
+    """Absolute path of a shape library folder in the user script dir."""
+    global _user_script_dir
+    if os.path.isabs(directory):
+        return directory
+    if _user_script_dir is None:
+        _user_script_dir = cmds.internalVar(userScriptDir=True)
+    return os.path.join(_user_script_dir, directory)
+
+_indexes = {}  # library folder -> ShapeIndex
+
+def library_index(directory=CTRL_LIB, refresh=False):
+    """Return the index of a library, brought up to date once per session."""
+    root = os.path.normpath(library_dir(directory))
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = ShapeIndex.open(root)
+    elif refresh:
+        index.refresh()
+    return index
+
+def shape_path(file_name, directory=CTRL_LIB):
+    """Path of a shape file from its library name ("zoo_shapes/godnode_reg")."""
+    index = library_index(directory)
+    if file_name not in index:
+        index.refresh()
+    return index.file_path(file_name)
+
+_packs = {}  # pack path -> ShapePack
+
+def library_pack(directory=CTRL_LIB):
+    """Return the packed version of a library, or None when it is not packed.
+
+    The pack is <library folder>.shapepack (see shape_pack.pack_library), it
+    is mapped once and mapped again only when the file changes.
+    """
+    path = os.path.normpath(library_dir(directory)) + PACK_EXT
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        _packs.pop(path, None)
+        return None
+    pack = _packs.get(path)
+    if pack is None or pack.mtime != mtime:
+        pack = _packs[path] = ShapePack(path)
+    return pack
+
+
+###########
+## Loading
+###########
+def load_shape(file_name, directory=CTRL_LIB):
+    """Return the shapes of a library file, from the pack or the JSON cache.
+
+    file_name is looked up in the library index, it can be the full name
+    ("zoo_shapes/godnode_reg", either separator) or a unique file name. A
+    file edited after the pack was written is read from the JSON cache.
+    """
+    index = library_index(directory)
+    name = index.resolve(file_name)
+    if name is None:
+        index.refresh()
+        name = index.resolve(file_name)
+        if name is None:
+            raise KeyError(f"Shape '{file_name}' not found in {index.root}")
+    file_path = index.file_path(name)
+    pack = library_pack(directory)
+    if pack is not None and name in pack and not _newer_than(file_path, pack.mtime):
+        shape_cache.stats["pack_hits"] += 1
+        return pack.get(name)
+    return shape_cache.get(file_path)
+
+def _newer_than(file_path, mtime):
+    """True when a file was modified after mtime (a file gone is not newer)."""
+    try:
+        return os.stat(file_path).st_mtime_ns > mtime
+    except OSError:
+        return False
+
+def preload(file_names=None, directory=CTRL_LIB):
+    """Warm the cache, with every shape of the library when no names are given.
+
+    A packed library only needs its pack mapped.
+    """
+    pack = library_pack(directory)
+    if pack is not None and file_names is None:
+        print(f"Mapped {len(pack)} control shapes from {pack.path}")
+        return len(pack)
+    index = library_index(directory)
+    if file_names is None:
+        file_names = index.names()
+
+    loaded = 0
+    for file_name in file_names:
+        try:
+            shape_cache.get(index.file_path(file_name))
+            loaded += 1
+        except (KeyError, OSError, ValueError) as e:
+            cmds.warning(f"Could not preload {file_name}: {e}")
+    print(f"Preloaded {loaded} control shapes")
+    return loaded
+
+def cache_stats():
+    """Return the shape cache statistics."""
+    return shape_cache.report()
+
+
+###########
+## Controller creation
+###########
+def create_curves(shapes, scale=None):
+    """Create one NURBS curve per shape of a parsed shape file.
+
+    scale (a number or (x, y, z)) is baked into the CVs, there is no
+    transform scale to freeze afterwards.
+    """
+    if scale is not None and not isinstance(scale, (tuple, list)):
+        scale = (scale, scale, scale)
+    created = []
+    with attribute_batch() as batch:
+        for shape_name, shape in shapes.items():
+            # Create the curve using the data, packed shapes hold float32 arrays
+            cvs = shape["cvs"]
+            knots = shape["knots"]
+            if hasattr(cvs, "tolist"):
+                cvs = [tuple(cv) for cv in cvs.tolist()]
+                knots = knots.tolist()
+            if scale is not None:
+                cvs = [(x * scale[0], y * scale[1], z * scale[2]) for x, y, z in cvs]
+            curve = cmds.curve(p=cvs, k=knots, d=shape["degree"])
+
+            # Rename the shape with the specified name
+            curve = cmds.rename(curve, shape_name)
+
+            # Adjust the shape based on its properties (e.g., overrideColorRGB),
+            # written with the other shapes of the file
+            color = shape["color"]
+            if color is not None:
+                batch.set(f"{curve}.overrideEnabled", 1)
+                batch.set(f"{curve}.overrideRGBColors", 1)
+                batch.set(f"{curve}.overrideColorRGB", *color[:3])
+            print(f"Controller created: {curve}")
+            created.append(curve)
+    return created
+
+def create_controller_from_path(file_path, scale=None):
+    """Creates a Maya controller from a shape file given by its path."""
+    try:
+        shapes = shape_cache.get(file_path)
+    except Exception as e:
+        cmds.error(f"Error reading the JSON file: {e}")
+        return
+    return create_curves(shapes, scale)
+
+def create_controller_from_file(file_name: str, directory: str = CTRL_LIB, scale=None):
+    """Creates a Maya controller from a library shape file."""
+    try:
+        shapes = load_shape(file_name, directory)
+    except Exception as e:
+        cmds.error(f"Error reading the shape file: {e}")
+        return
+    return create_curves(shapes, scale)
+
+def merge_curves(curves, name):
+    """Parent the shapes of every curve under the last one, delete the other
+    transforms and rename the last one, returns its new name."""
+    if len(curves) > 1:
+        shapes = cmds.listRelatives(curves[:-1], shapes=True, fullPath=True)
+        cmds.parent(shapes, curves[-1], r=True, shape=True)
+        cmds.delete(curves[:-1])
+    return cmds.rename(curves[-1], name)
+
+def pack_shape_library(directory=CTRL_LIB):
+    """Convert a library folder into its .shapepack file."""
+    path = pack_library(library_dir(directory))
+    library_index(directory, refresh=True)
+    return path
+
+
+###########
+## Shape picker
+###########
+def show_shape_picker(directory=CTRL_LIB, window_name="Shape_Picker_Window"):
+    """Window listing the library shapes, filtered by tags from the index."""
+    index = library_index(directory)
+    if cmds.window(window_name, exists=True):
+        cmds.deleteUI(window_name)
+
+    window = cmds.window(window_name, title="Control Shapes", widthHeight=(300, 400))
+    cmds.columnLayout(adjustableColumn=True)
+    cmds.text(label="Tags (space separated)")
+    tag_field = cmds.textField()
+    shape_list = cmds.textScrollList(numberOfRows=20, allowMultiSelection=False, append=index.names())
+
+    def filter_shapes(*_):
+        tags = cmds.textField(tag_field, query=True, text=True).split()
+        cmds.textScrollList(shape_list, edit=True, removeAll=True)
+        cmds.textScrollList(shape_list, edit=True, append=index.find(*tags))
+
+    def create_selected(*_):
+        for name in cmds.textScrollList(shape_list, query=True, selectItem=True) or []:
+            create_controller_from_file(name, directory)
+
+    cmds.textField(tag_field, edit=True, changeCommand=filter_shapes)
+    cmds.textScrollList(shape_list, edit=True, doubleClickCommand=create_selected)
+    cmds.button(label="Create", command=create_selected)
+    cmds.showWindow(window)
@@ -0,0 +1,181 @@
+"""Packed, memory-mapped storage for a control shape library.
+
+A pack holds every .shape file of a library in one file:
+
+    magic (8 bytes) | header size (uint32) | JSON header | float32 data
+
+The JSON header lists, per shape file, its curves with degree, form, color
+and the offsets of their CVs and knots in the float32 block. Opening a pack
+is one mmap, CVs and knots are returned as zero-copy views into it.
+
+Convert an existing library with:
+
+    mayapy shape_pack.py <ControlShape folder> [pack path]
+"""
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+SHAPE_EXT = ".shape"
+PACK_EXT = ".shapepack"
+PACK_MAGIC = b"SHPPACK1"
+PACK_ALIGN = 16  # Start of the float32 block is aligned on this many bytes
+
+
+def parse_shape_file(file_path):
+    """Read a .shape JSON file into {shape_name: curve data} with tuple CVs."""
+    with open(file_path, 'r') as file:
+        shape_data = json.load(file)
+
+    shapes = {}
+    for shape_name, shape_attributes in shape_data.items():
+        color = shape_attributes.get("overrideColorRGB")
+        shapes[shape_name] = {
+            "cvs": tuple(tuple(cv[:3]) for cv in shape_attributes.get("cvs", [])),
+            "knots": tuple(shape_attributes.get("knots", [])),
+            "degree": shape_attributes.get("degree", 3),
+            "form": shape_attributes.get("form", 0),  # 0: Open, 1: Closed, 3: Periodic
+            "color": tuple(color) if color is not None else None,
+        }
+    return shapes
+
+
+def shape_name_from_path(file_path, root):
+    """Library relative name of a shape file, always with "/" separators."""
+    rel = os.path.relpath(file_path, root)
+    return os.path.splitext(rel)[0].replace(os.sep, "/")
+
+
+def iter_shape_files(root):
+    """Yield every .shape file below a library folder, in a stable order."""
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(SHAPE_EXT):
+                yield os.path.join(folder, file)
+
+
+###########
+## Writing
+###########
+def write_pack(out_path, library):
+    """Write {name: parsed shapes} to a pack file and return its path."""
+    files = {}
+    cv_blocks = []
+    knot_blocks = []
+    cv_offset = 0
+    knot_offset = 0
+    for name in sorted(library):
+        curves = []
+        for curve_name, shape in library[name].items():
+            cvs = np.asarray(shape["cvs"], dtype=np.float32).reshape(-1, 3)
+            knots = np.asarray(shape["knots"], dtype=np.float32).reshape(-1)
+            curves.append({
+                "name": curve_name,
+                "degree": shape["degree"],
+                "form": shape["form"],
+                "color": list(shape["color"]) if shape["color"] is not None else None,
+                "cv_offset": cv_offset, "cv_count": len(cvs),
+                "knot_offset": knot_offset, "knot_count": len(knots),
+            })
+            cv_blocks.append(cvs)
+            knot_blocks.append(knots)
+            cv_offset += len(cvs)
+            knot_offset += len(knots)
+        files[name] = curves
+
+    header = {"version": 1, "cv_count": cv_offset, "knot_count": knot_offset, "files": files}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_offset = len(PACK_MAGIC) + 4 + len(header_bytes)
+    padding = -data_offset % PACK_ALIGN
+    header_bytes += b" " * padding
+
+    cvs = np.concatenate(cv_blocks) if cv_blocks else np.zeros((0, 3), np.float32)
+    knots = np.concatenate(knot_blocks) if knot_blocks else np.zeros(0, np.float32)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(PACK_MAGIC)
+        file.write(struct.pack("<I", len(header_bytes)))
+        file.write(header_bytes)
+        file.write(cvs.astype("<f4").tobytes())
+        file.write(knots.astype("<f4").tobytes())
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def pack_library(root, out_path=None):
+    """Convert every .shape file below root into a single pack file."""
+    if out_path is None:
+        out_path = os.path.normpath(root) + PACK_EXT
+    library = {}
+    for file_path in iter_shape_files(root):
+        try:
+            library[shape_name_from_path(file_path, root)] = parse_shape_file(file_path)
+        except (OSError, ValueError) as e:
+            print(f"Skipped {file_path}: {e}")
+    write_pack(out_path, library)
+    print(f"Packed {len(library)} shape files into {out_path}")
+    return out_path
+
+
+###########
+## Reading
+###########
+class ShapePack:
+    """Read-only, memory-mapped view of a pack file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns
+        with open(path, "rb") as file:
+            magic = file.read(len(PACK_MAGIC))
+            if magic != PACK_MAGIC:
+                raise ValueError(f"{path} is not a shape pack")
+            (header_size,) = struct.unpack("<I", file.read(4))
+            header = json.loads(file.read(header_size).decode("utf-8"))
+
+        self.files = header["files"]
+        self.data_offset = len(PACK_MAGIC) + 4 + header_size
+        cv_count = header["cv_count"]
+        knot_count = header["knot_count"]
+        size = cv_count * 3 + knot_count
+        if size:
+            data = np.memmap(path, dtype="<f4", mode="r", offset=self.data_offset, shape=(size,))
+        else:
+            data = np.zeros(0, dtype="<f4")
+        self._cvs = data[:cv_count * 3].reshape(-1, 3)
+        self._knots = data[cv_count * 3:]
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def __len__(self):
+        return len(self.files)
+
+    def names(self):
+        return list(self.files)
+
+    def get(self, name):
+        """Return {curve_name: curve data} for a shape, CVs and knots as views."""
+        shapes = {}
+        for curve in self.files[name]:
+            cv_start = curve["cv_offset"]
+            knot_start = curve["knot_offset"]
+            color = curve["color"]
+            shapes[curve["name"]] = {
+                "cvs": self._cvs[cv_start:cv_start + curve["cv_count"]],
+                "knots": self._knots[knot_start:knot_start + curve["knot_count"]],
+                "degree": curve["degree"],
+                "form": curve["form"],
+                "color": tuple(color) if color is not None else None,
+            }
+        return shapes
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.exit("usage: shape_pack.py <shape library folder> [pack path]")
+    pack_library(*sys.argv[1:])
@@ -0,0 +1,236 @@
+"""Sparse binary export and import of skin weights, between rig rebuilds.
+
+    import skin_io
+    skin_io.export_weights("body_geo", "body_weights.npz")
+    # ... rebuild the rig ...
+    skin_io.import_weights("body_geo", "body_weights.npz")
+
+The weights are stored in an uncompressed .npz as sparse arrays, one entry
+per non-zero weight:
+
+    influences  (J,) influence keys, see influence_key
+    vertices    (W,) int32, sorted
+    influence   (W,) uint16, index in influences
+    weights     (W,) float32
+    points      (V, 3) float32, world positions of the vertices
+
+Influences are matched by their joint_* name, whatever the namespace or
+the prefix of the skeleton they are imported on. A mesh with the same vertex
+count gets the weights by vertex index, otherwise (or with match="nearest")
+every vertex takes the weights of the closest stored point, found with a
+KD-tree: SciPy's cKDTree when it is there, PointTree otherwise.
+"""
+import math
+import time
+
+import maya.cmds as cmds
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Not shipped with Maya
+    cKDTree = None
+
+import auto_guides
+from node_registry import registry
+from skin_weights import SkinClusterWeights, find_skin_cluster
+
+CHUNK_SIZE = 20000  # Vertices read or written per skin cluster call
+PRUNE_WEIGHT = 1e-5  # Smaller weights are not exported
+LEAF_SIZE = 64  # Points per leaf of PointTree
+QUERY_CHUNK = 4096  # Points looked up at once by PointTree
+
+
+###########
+## Nearest points
+###########
+class PointTree:
+    """KD-tree of a static point cloud for nearest point queries, NumPy only.
+
+    The points are split on the median of their widest axis down to leaves
+    of about leaf_size points. A query descends to its leaf, then goes down
+    the tree again into every branch whose split plane is closer than the
+    best point found there, so the result is exact. All the queries of a
+    chunk go down level by level together.
+    """
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        count = len(self.points)
+        self.depth = max(0, math.ceil(math.log2(max(count, 1) / leaf_size)))
+        self.axes = np.zeros(2**self.depth - 1, dtype=np.intp)
+        self.splits = np.zeros(2**self.depth - 1)
+        order = np.arange(count)
+        # Node k of a level covers order[k * count // nodes:(k + 1) * count // nodes]
+        for level in range(self.depth):
+            nodes = 2**level
+            for k in range(nodes):
+                low, middle, high = (k * count) // nodes, ((2 * k + 1) * count) // (2 * nodes), \
+                    ((k + 1) * count) // nodes
+                segment = order[low:high]
+                values = self.points[segment]
+                axis = int(np.ptp(values, axis=0).argmax())
+                part = np.argpartition(values[:, axis], middle - low)
+                order[low:high] = segment[part]
+                self.axes[nodes - 1 + k] = axis
+                self.splits[nodes - 1 + k] = values[part[middle - low], axis]
+        leaves = 2**self.depth
+        bounds = (np.arange(leaves + 1) * count) // leaves
+        sizes = np.diff(bounds)
+        # Short leaves repeat their last point
+        slots = np.minimum(np.arange(sizes.max()), sizes[:, None] - 1)
+        self.leaves = order[bounds[:-1, None] + slots]
+        self.leaf_points = self.points[self.leaves]
+
+    def query(self, points):
+        """Index of the closest point of the tree for every point."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        result = np.empty(len(points), dtype=np.intp)
+        for start in range(0, len(points), QUERY_CHUNK):
+            result[start:start + QUERY_CHUNK] = self._query(points[start:start + QUERY_CHUNK])
+        return result
+
+    def _descend(self, points, best=None):
+        """(query, leaf) pairs: the leaf of every point, and with best the
+        leaves of the branches closer than sqrt(best) as well."""
+        queries = np.arange(len(points))
+        node = np.zeros(len(points), dtype=np.intp)
+        for _ in range(self.depth):
+            offset = points[queries, self.axes[node]] - self.splits[node]
+            right = offset >= 0
+            near, far = 2 * node + 1 + right, 2 * node + 2 - right
+            if best is None:
+                node = near
+                continue
+            cross = offset * offset <= best[queries]
+            queries = np.concatenate([queries, queries[cross]])
+            node = np.concatenate([near, far[cross]])
+        return queries, node - (len(self.leaves) - 1)
+
+    def _query(self, points):
+        _, leaf = self._descend(points)
+        offsets = self.leaf_points[leaf] - points[:, None, :]
+        best = np.einsum("nmk,nmk->nm", offsets, offsets).min(axis=1)
+
+        queries, leaves = self._descend(points, best)
+        offsets = self.leaf_points[leaves] - points[queries, None, :]
+        distances = np.einsum("pmk,pmk->pm", offsets, offsets)
+        closest = distances.argmin(axis=1)
+        distances = distances[np.arange(len(leaves)), closest]
+        order = np.lexsort((distances, queries))
+        first = order[np.unique(queries[order], return_index=True)[1]]
+        return self.leaves[leaves[first], closest[first]]
+
+
+def nearest_points(source, targets):
+    """Index in source of the closest point of every target point."""
+    if cKDTree is not None:
+        return cKDTree(source).query(targets)[1]
+    return PointTree(source).query(targets)
+
+
+###########
+## Influences
+###########
+def influence_key(name):
+    """Name of an influence without path, namespace and prefix before joint_."""
+    name = name.split("|")[-1].split(":")[-1]
+    start = name.find("joint_")
+    return name[start:] if start >= 0 else name
+
+
+def mesh_points(mesh, count):
+    """(count, 3) world positions of the vertices of a mesh."""
+    return np.concatenate(list(auto_guides.iter_vertex_chunks(mesh, CHUNK_SIZE, count)))
+
+
+###########
+## Export / import
+###########
+def export_weights(mesh, path):
+    """Write the skin weights of a mesh to a .npz file, returns its path."""
+    skin = find_skin_cluster(mesh)
+    if skin is None:
+        cmds.warning(f"{mesh} is not skinned, no weights to export.")
+        return None
+    start_time = time.perf_counter()
+    influences = cmds.skinCluster(skin, query=True, influence=True)
+    skin_weights = SkinClusterWeights(skin, mesh, influences)
+    count = cmds.polyEvaluate(mesh, vertex=True)
+    points = np.empty((count, 3), dtype=np.float32)
+    vertices, columns, weights = [], [], []
+    start = 0
+    for chunk in auto_guides.iter_vertex_chunks(mesh, CHUNK_SIZE, count):
+        points[start:start + len(chunk)] = chunk
+        dense = skin_weights.read(start, len(chunk))
+        rows, cols = np.nonzero(dense > PRUNE_WEIGHT)
+        vertices.append(rows + start)
+        columns.append(cols)
+        weights.append(dense[rows, cols])
+        start += len(chunk)
+
+    if not path.endswith(".npz"):
+        path += ".npz"
+    np.savez(path, influences=np.array([influence_key(name) for name in influences]),
+             vertices=np.concatenate(vertices).astype(np.int32),
+             influence=np.concatenate(columns).astype(np.uint16),
+             weights=np.concatenate(weights).astype(np.float32), points=points)
+    print(f"[skin_io] {mesh}: {count} vertices, {sum(len(w) for w in weights)} weights "
+          f"exported to {path} in {time.perf_counter() - start_time:.3f}s")
+    return path
+
+
+def padded_weights(vertices, columns, weights, count):
+    """(count, K) influence indices and weights from the sparse entries,
+    K the most influences of a vertex, padding has a weight of 0."""
+    per_vertex = np.bincount(vertices, minlength=count)
+    slots = np.arange(len(vertices)) - (np.cumsum(per_vertex) - per_vertex)[vertices]
+    indices = np.zeros((count, max(int(per_vertex.max(initial=0)), 1)), dtype=np.intp)
+    values = np.zeros(indices.shape)
+    indices[vertices, slots] = columns
+    values[vertices, slots] = weights
+    return indices, values
+
+
+def import_weights(mesh, path, match="auto"):
+    """Apply the weights of a .npz file to a mesh, returns its skin cluster.
+
+    The mesh is bound on the stored joints when it is not skinned. match is
+    "auto" (by vertex index when the vertex count matches) or "nearest".
+    """
+    start_time = time.perf_counter()
+    with np.load(path) as data:
+        keys = data["influences"].tolist()
+        vertices, columns = data["vertices"], data["influence"].astype(np.intp)
+        weights, points = data["weights"].astype(np.float64), data["points"]
+
+    skin = find_skin_cluster(mesh)
+    if skin is None:
+        joints = registry.mapping(keys)
+        skin = cmds.skinCluster(list(joints.values()), mesh, toSelectedBones=True,
+                                name=f"{mesh}_skinCluster")[0]
+    influences = cmds.skinCluster(skin, query=True, influence=True)
+    targets = {influence_key(name): i for i, name in enumerate(influences)}
+    missing = [key for key in keys if key not in targets]
+    if missing:
+        cmds.warning(f"No influence for {', '.join(missing)}, their weights are dropped.")
+    remap = np.array([targets.get(key, -1) for key in keys], dtype=np.intp)
+    columns = remap[columns]
+    weights[columns < 0] = 0.0
+    indices, values = padded_weights(vertices, np.maximum(columns, 0), weights, len(points))
+
+    count = cmds.polyEvaluate(mesh, vertex=True)
+    if match == "auto" and count == len(points):
+        source = None
+    else:
+        source = nearest_points(points, mesh_points(mesh, count))
+    skin_weights = SkinClusterWeights(skin, mesh, influences)
+    for start in range(0, count, CHUNK_SIZE):
+        rows = slice(start, min(start + CHUNK_SIZE, count)) if source is None else source[start:start + CHUNK_SIZE]
+        chunk_indices, chunk_values = indices[rows], values[rows]
+        totals = chunk_values.sum(axis=1, keepdims=True)
+        chunk_values = np.divide(chunk_values, totals, out=np.zeros_like(chunk_values), where=totals > 0)
+        skin_weights.write(start, chunk_indices, chunk_values)
+    print(f"[skin_io] {mesh}: weights of {path} imported on {count} vertices "
+          f"({'by index' if source is None else 'by nearest point'}) in {time.perf_counter() - start_time:.3f}s")
+    return skin
@@ -0,0 +1,238 @@
+"""Automatic skin weights for the bind joints built by CreaJoint.
+
+    import skin_weights
+    skin_weights.bind_skin("body_geo")
+
+Every bind joint owns the bone segments to its children, a leaf joint
+extends the bone of its parent by LEAF_EXTENT. The vertices are processed
+in chunks sized for MEMORY_BUDGET: NumPy measures the distance of each
+vertex to every segment, keeps the joints of the limb of the closest bone
+and its neighbour joints (per-limb isolation, a thigh never pulls the other
+leg), turns the distances into weights with an inverse power falloff and
+keeps the MAX_INFLUENCES largest, normalized. Each chunk is written in one
+MFnSkinCluster.setWeights call, without the API one skinPercent per vertex.
+"""
+import time
+
+import maya.cmds as cmds
+import numpy as np
+
+try:
+    import maya.api.OpenMaya as om
+    import maya.api.OpenMayaAnim as oma
+except ImportError:  # Standalone backends without the API
+    om = oma = None
+
+import auto_guides
+import guide_template
+import mirror
+from node_registry import registry
+
+MAX_INFLUENCES = 4  # Influences kept per vertex
+FALLOFF = 4.0  # Weight = distance ** -FALLOFF
+LEAF_EXTENT = 0.5  # Bone of a leaf joint, fraction of its parent bone
+MEMORY_BUDGET = 64 * 2**20  # Bytes of temporary arrays per chunk
+SKIP_SUFFIXES = ("_end",)  # Tip joints that get no weights
+
+
+###########
+## Skeleton
+###########
+def bind_joints():
+    """(joint, parent) of the bind joints, parents first, tips left out."""
+    return [(joint, parent) for joint, _, parent, _ in guide_template.joint_hierarchy(chains=False)
+            if not joint.endswith(SKIP_SUFFIXES)]
+
+
+def bone_segments(joints, parents, positions):
+    """(starts, ends, owners) of the bone segments, sorted by owner joint.
+
+    positions is the (J, 3) array of the joints, owners the joint index of
+    every segment.
+    """
+    index = {joint: i for i, joint in enumerate(joints)}
+    children = {}
+    for joint in joints:
+        if parents.get(joint) in index:
+            children.setdefault(parents[joint], []).append(index[joint])
+    starts, ends, owners = [], [], []
+    for i, joint in enumerate(joints):
+        targets = [positions[child] for child in children.get(joint, ())]
+        if not targets:
+            parent = index.get(parents.get(joint))
+            extent = positions[i] - positions[parent] if parent is not None else np.zeros(3)
+            targets = [positions[i] + extent * LEAF_EXTENT]
+        for target in targets:
+            starts.append(positions[i])
+            ends.append(target)
+            owners.append(i)
+    return np.array(starts), np.array(ends), np.array(owners)
+
+
+def limb_isolation(joints, parents):
+    """(limb of every joint, (L, J) joints allowed for each limb).
+
+    A limb allows its own joints and the joints next to it: the parent of
+    its root and the roots of the limbs hanging from it.
+    """
+    limb_of = {}
+    for limb, locators in guide_template.guide_limbs().items():
+        for locator in locators:
+            limb_of[f"joint_{locator[len('loc_'):]}"] = limb
+    limbs = sorted({limb_of[joint] for joint in joints})
+    joint_limbs = np.array([limbs.index(limb_of[joint]) for joint in joints])
+    allowed = joint_limbs[None, :] == np.arange(len(limbs))[:, None]
+    index = {joint: i for i, joint in enumerate(joints)}
+    for joint in joints:
+        parent = index.get(parents.get(joint))
+        if parent is not None and joint_limbs[parent] != joint_limbs[index[joint]]:
+            allowed[joint_limbs[index[joint]], parent] = True
+            allowed[joint_limbs[parent], index[joint]] = True
+    return joint_limbs, allowed
+
+
+def chunk_size(segments, joints, budget=MEMORY_BUDGET):
+    """Vertices per chunk so the temporary arrays stay within budget bytes."""
+    per_vertex = 8 * (segments * 8 + joints * 6)
+    return int(max(1024, budget // per_vertex))
+
+
+###########
+## Weights
+###########
+def compute_weights(points, starts, ends, owners, joint_limbs, allowed,
+                    max_influences=MAX_INFLUENCES, falloff=FALLOFF):
+    """(indices, weights) of the max_influences joints of every point.
+
+    Both are (N, max_influences) arrays, weights are normalized.
+    """
+    bones = ends - starts
+    lengths = np.maximum((bones * bones).sum(axis=1), 1e-12)
+    offsets = points[:, None, :] - starts[None, :, :]
+    t = np.clip(np.einsum("nsk,sk->ns", offsets, bones) / lengths, 0.0, 1.0)
+    offsets -= t[:, :, None] * bones[None, :, :]
+    distances = np.einsum("nsk,nsk->ns", offsets, offsets)
+    # Closest segment of every joint, the segments are sorted by owner
+    first = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    distances = np.minimum.reduceat(distances, first, axis=1)
+
+    nearest = np.argmin(distances, axis=1)
+    distances = np.where(allowed[joint_limbs[nearest]], distances, np.inf)
+    weights = (np.sqrt(distances) + 1e-6) ** -falloff
+
+    count = min(max_influences, weights.shape[1])
+    indices = np.argpartition(-weights, count - 1, axis=1)[:, :count]
+    weights = np.take_along_axis(weights, indices, axis=1)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return indices, weights
+
+
+###########
+## Scene IO
+###########
+def find_skin_cluster(mesh):
+    """Skin cluster deforming mesh, None when it is not skinned."""
+    skins = cmds.ls(cmds.listHistory(mesh) or [], type="skinCluster")
+    return skins[0] if skins else None
+
+
+class SkinClusterWeights:
+    """Read and write chunks of vertex weights on a skin cluster.
+
+    joints gives the influence order of the weight columns.
+    """
+
+    def __init__(self, skin, mesh, joints):
+        self.skin = skin
+        self.mesh = mesh
+        self.joints = list(joints)
+        if om is not None:
+            selection = om.MSelectionList()
+            selection.add(skin)
+            selection.add(mesh)
+            self.fn = oma.MFnSkinCluster(selection.getDependNode(0))
+            self.shape = selection.getDagPath(1).extendToShape()
+            # setWeights and getWeights take the position in influenceObjects
+            order = [path.partialPathName() for path in self.fn.influenceObjects()]
+            self.columns = [order.index(joint) for joint in self.joints]
+            self.influences = om.MIntArray(self.columns)
+
+    def _vertices(self, start, count):
+        component = om.MFnSingleIndexedComponent()
+        vertices = component.create(om.MFn.kMeshVertComponent)
+        component.addElements(range(start, start + count))
+        return vertices
+
+    def read(self, start, count):
+        """(count, J) weights of the vertices start, start + 1..."""
+        if om is not None:
+            weights, influences = self.fn.getWeights(self.shape, self._vertices(start, count))
+            dense = np.fromiter(weights, dtype=np.float64, count=len(weights)).reshape(count, influences)
+            return dense[:, self.columns]
+        order = cmds.skinCluster(self.skin, query=True, influence=True)
+        columns = [order.index(joint) for joint in self.joints]
+        return np.array([cmds.skinPercent(self.skin, f"{self.mesh}.vtx[{vertex}]", query=True, value=True)
+                         for vertex in range(start, start + count)]).reshape(count, -1)[:, columns]
+
+    def write(self, start, indices, weights):
+        """Write (N, K) joint indices and weights on the vertices start, start + 1...
+
+        Padding entries have a weight of 0.
+        """
+        count = len(indices)
+        if om is not None:
+            flat = (np.arange(count)[:, None] * len(self.joints) + indices).reshape(-1)
+            dense = np.bincount(flat, weights.reshape(-1), minlength=count * len(self.joints))
+            self.fn.setWeights(self.shape, self._vertices(start, count), self.influences,
+                               om.MDoubleArray(dense.tolist()), False)
+            return
+        names = self.joints
+        for offset, (row, values) in enumerate(zip(indices.tolist(), weights.tolist())):
+            cmds.skinPercent(self.skin, f"{self.mesh}.vtx[{start + offset}]", normalize=False,
+                             zeroRemainingInfluences=True,
+                             transformValue=[(names[i], w) for i, w in zip(row, values) if w > 0])
+
+
+def bind_skin(mesh=None, max_influences=MAX_INFLUENCES, budget=MEMORY_BUDGET):
+    """Skin a mesh (the selected one by default) on the bind joints.
+
+    Returns (skin cluster, [(vertices, compute seconds, write seconds) per
+    chunk]), (None, []) when there is nothing to bind.
+    """
+    mesh = mesh or auto_guides.selected_mesh()
+    if mesh is None:
+        cmds.warning("Select the character mesh to bind.")
+        return None, []
+    if find_skin_cluster(mesh):
+        cmds.warning(f"{mesh} is already skinned, unbind it first.")
+        return None, []
+
+    hierarchy = bind_joints()
+    nodes = registry.mapping(joint for joint, _ in hierarchy)
+    hierarchy = [(joint, parent) for joint, parent in hierarchy if joint in nodes]
+    roles = [joint for joint, _ in hierarchy]
+    parents = dict(hierarchy)
+    joints = [nodes[joint] for joint in roles]
+    positions = mirror.read_world_matrices(joints)[:, 3, :3]
+    starts, ends, owners = bone_segments(roles, parents, positions)
+    joint_limbs, allowed = limb_isolation(roles, parents)
+
+    skin = cmds.skinCluster(joints, mesh, toSelectedBones=True, maximumInfluences=max_influences,
+                            obeyMaxInfluences=True, normalizeWeights=1, name=f"{mesh}_skinCluster")[0]
+    writer = SkinClusterWeights(skin, mesh, joints)
+    count = cmds.polyEvaluate(mesh, vertex=True)
+    size = chunk_size(len(owners), len(joints), budget)
+    timings = []
+    start = 0
+    for points in auto_guides.iter_vertex_chunks(mesh, size, count):
+        begin = time.perf_counter()
+        indices, weights = compute_weights(points, starts, ends, owners, joint_limbs, allowed, max_influences)
+        computed = time.perf_counter()
+        writer.write(start, indices, weights)
+        timings.append((len(points), computed - begin, time.perf_counter() - computed))
+        print(f"[skin] chunk {len(timings)}: {len(points)} vertices, weights {timings[-1][1] * 1000:.1f} ms, "
+              f"write {timings[-1][2] * 1000:.1f} ms")
+        start += len(points)
+    total = sum(c + w for _, c, w in timings)
+    print(f"[skin] {skin}: {count} vertices on {len(joints)} joints in {len(timings)} chunks, {total:.3f}s")
+    return skin, timings